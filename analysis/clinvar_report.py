@@ -100,21 +100,25 @@ Section numbers below match the rendered report's headings (1 Purpose,
    prose ("covers 42 genes, none of which curated...") for large CNVs,
    unlike the clean delimited gene lists small variants get.
 
-Requires data downloaded/preprocessed per the top-level pipeline (run from
-the repo root):
+Requires data downloaded per the top-level pipeline, and the full-width
+clinvar_full.tsv -- the production clinvar.tsv only holds the columns the
+transform reads (run from the repo root):
     just download
-    just preprocess
+    just --justfile analysis/justfile preprocess
 
 Usage (run from analysis/, matching analysis/justfile's working directory):
     cd analysis && PYTHONPATH=../src uv run --project .. python clinvar_report.py
     # or: just --justfile analysis/justfile report
+
+--clinvar-table points the report at a Parquet/Arrow copy of clinvar.tsv
+(scripts/vcf_to_tsv.py data/clinvar.vcf.gz data/clinvar.parquet --fields all); each pass
+over it then loads only the columns that pass reads (clinvar_table.table_rows).
 """
 
 from __future__ import annotations
 
 import argparse
 import csv
-import gzip
 import json
 import re
 from collections import Counter
@@ -123,19 +127,24 @@ from pathlib import Path
 
 import requests
 
+from aux_cache import cached_load, load_concurrently
+from clinvar_table import table_rows
 from clinvar_helpers import (
     ASSEMBLY_PREFERENCE,
     map_CLNDISDB_to_mondo,
     map_mondo_to_hp,
     parse_CLNDISDB,
-    format_id_to_map,
+    variant_summary_rows,
     make_genes_from_row,
     make_variant_gene_map,
     make_medgen_to_mondo_map,
     make_mondo_map,
     make_variant_record_map,
+    SUBMISSION_COLUMNS,
     predicate_map,
     aggregate_star_min,
+    record_diseases,
+    record_stars,
     review_star_map,
     variant_records_to_disease,
 )
@@ -148,6 +157,10 @@ EXPERT_STAR_MIN = 2  # threshold above which a pair no longer needs "rescuing"
 ENUMERATED_LEVELS = [2, 4]
 MIN_CONCORDANT_SUBMITTERS = 2
 MAX_VARIANT_SAMPLE = 8
+# submission_summary.txt columns the report's sections read. Today that is exactly the
+# production set; a section that needs another column (SCV, DateLastEvaluated, ...) widens
+# this rather than loading the whole file.
+REPORT_SUBMISSION_COLUMNS = SUBMISSION_COLUMNS
 
 CLNSIG_BUCKETS = ["P", "LP", "P/LP", "VUS", "LB", "B", "B/LB", "Conflicting", "Other", "Not classified"]
 NOT_CLASSIFIED_VALUES = {
@@ -321,13 +334,11 @@ def load_example_variants(clinvar_tsv: Path) -> dict:
     could drift from the real record."""
     wanted = {v: k for k, v in EXAMPLE_VARIANT_IDS.items()}
     found = {}
-    with open(clinvar_tsv, newline="") as fh:
-        reader = csv.DictReader(fh, delimiter="\t")
-        for row in reader:
-            if row["ID"] in wanted:
-                found[wanted[row["ID"]]] = row
-            if len(found) == len(wanted):
-                break
+    for row in table_rows(clinvar_tsv):
+        if row["ID"] in wanted:
+            found[wanted[row["ID"]]] = row
+        if len(found) == len(wanted):
+            break
     return found
 
 
@@ -1627,35 +1638,33 @@ def build_gene_model_variants(
     contrasted (e.g. SMCHD1's FSHD2 vs. BAMS), ignoring rarer/near-duplicate
     disease terms that would otherwise clutter the legend."""
     variants = []
-    with open(clinvar_tsv, newline="") as fh:
-        reader = csv.DictReader(fh, delimiter="\t")
-        for row in reader:
-            if row["CLNVC"] != "single_nucleotide_variant":
-                continue
-            _, gene_syms = variant_genes_for(variant_genes, row["ID"])
-            if gene_symbol not in gene_syms:
-                continue
-            records = var_records.get(row["ID"])
-            if not records:
-                continue
-            dis, _, _ = variant_records_to_disease(records, map_to_mondo, star_min=0)
+    for row in table_rows(clinvar_tsv, ("ALT", "CLNVC", "ID", "POS", "REF")):
+        if row["CLNVC"] != "single_nucleotide_variant":
+            continue
+        _, gene_syms = variant_genes_for(variant_genes, row["ID"])
+        if gene_symbol not in gene_syms:
+            continue
+        records = var_records.get(row["ID"])
+        if not records:
+            continue
+        dis, _, _ = variant_records_to_disease(records, map_to_mondo, star_min=0)
+        if not dis:
+            continue
+        if disease_filter is not None:
+            dis = {d for d in dis if d in disease_filter}
             if not dis:
                 continue
-            if disease_filter is not None:
-                dis = {d for d in dis if d in disease_filter}
-                if not dis:
-                    continue
-            mondo_id = sorted(dis)[0]
-            variants.append(
-                {
-                    "id": row["ID"],
-                    "pos": int(row["POS"]),
-                    "ref": row["REF"],
-                    "alt": row["ALT"],
-                    "mondo": mondo_id,
-                    "disease_name": mondo_labels.get(mondo_id, mondo_id),
-                }
-            )
+        mondo_id = sorted(dis)[0]
+        variants.append(
+            {
+                "id": row["ID"],
+                "pos": int(row["POS"]),
+                "ref": row["REF"],
+                "alt": row["ALT"],
+                "mondo": mondo_id,
+                "disease_name": mondo_labels.get(mondo_id, mondo_id),
+            }
+        )
     return variants
 
 
@@ -1753,10 +1762,20 @@ def render_gene_model_svg(gene_symbol: str, gene_model: dict, variants: list[dic
 
 
 def load_maps(data_dir: Path):
-    var_records = make_variant_record_map(str(data_dir / "submission_summary.txt.gz"))
-    map_to_mondo = make_mondo_map(str(data_dir / "mondo.sssom.tsv"))
-    medgen_to_mondo = make_medgen_to_mondo_map(str(data_dir / "MedGenIDMappings.txt.gz"))
-    map_to_mondo.update(medgen_to_mondo)
+    maps = load_concurrently(
+        {
+            "var_records": (
+                make_variant_record_map,
+                str(data_dir / "submission_summary.txt.gz"),
+                {"columns": REPORT_SUBMISSION_COLUMNS},
+            ),
+            "map_to_mondo": (make_mondo_map, str(data_dir / "mondo.sssom.tsv"), {}),
+            "medgen_to_mondo": (make_medgen_to_mondo_map, str(data_dir / "MedGenIDMappings.txt.gz"), {}),
+        }
+    )
+    var_records, map_to_mondo = maps["var_records"], maps["map_to_mondo"]
+    map_to_mondo.update(maps["medgen_to_mondo"])
+    var_records.resolve_diseases(map_to_mondo)
     return var_records, map_to_mondo
 
 
@@ -1878,19 +1897,7 @@ def concordance_groups(record_list: list, map_to_mondo: dict) -> dict:
         if clinsig not in predicate_map:
             continue
 
-        mondo_ids = set()
-        for mg_mapping in rec["ReportedPhenotypeInfo"].split(";"):
-            mg_map = "MedGen:{}".format(mg_mapping.split(":")[0])
-            if mg_map in map_to_mondo:
-                mondo_ids.update(map_to_mondo[mg_map].keys())
-
-        if not mondo_ids:
-            for dis_id in rec["SubmittedPhenotypeInfo"].split(";"):
-                dis_id = format_id_to_map(dis_id)
-                if dis_id in map_to_mondo:
-                    mondo_ids.update(map_to_mondo[dis_id].keys())
-                elif dis_id is not None and "MONDO:" in dis_id:
-                    mondo_ids.add(dis_id)
+        mondo_ids, _ = record_diseases(rec, map_to_mondo)
 
         is_literature = rec["CollectionMethod"] == "literature only"
         for mondo_id in mondo_ids:
@@ -1925,48 +1932,46 @@ def compute_star_data(clinvar_tsv: Path, var_records: dict, map_to_mondo: dict,
     # for the ClinGen-coverage analysis: which pairs' only submitters are ClinGen-affiliated.
     pair_submitters: dict = {}
 
-    with open(clinvar_tsv, newline="") as fh:
-        reader = csv.DictReader(fh, delimiter="\t")
-        for row in reader:
-            varid = row["ID"]
-            if varid not in var_records:
-                continue
+    for row in table_rows(clinvar_tsv, ("ID",)):
+        varid = row["ID"]
+        if varid not in var_records:
+            continue
 
-            gene_ids, gene_symbols = variant_genes_for(variant_genes, varid)
-            records = var_records[varid]
+        gene_ids, gene_symbols = variant_genes_for(variant_genes, varid)
+        records = var_records[varid]
 
-            dis_by_star = {}
-            for star_min in STAR_LEVELS:
-                dis, _, _ = variant_records_to_disease(records, map_to_mondo, star_min=star_min)
-                dis_by_star[star_min] = dis
-                if not dis:
-                    continue
-                variant_sets[star_min].add(varid)
-                for gene_id, gene_sym in zip(gene_ids, gene_symbols):
-                    for disease_id in dis:
-                        pair_sets[star_min].add((gene_id, disease_id))
-                        if star_min in pair_variant_ids:
-                            key = (gene_sym, gene_id, disease_id)
-                            pair_variant_ids[star_min].setdefault(key, set()).add(varid)
-
-            dis_computed2, _, _ = variant_records_to_disease(
-                records, map_to_mondo, star_min=EXPERT_STAR_MIN, rescue_min_submitters=MIN_CONCORDANT_SUBMITTERS
-            )
-            if dis_computed2:
-                variant_set_computed2.add(varid)
-                for gene_id, gene_sym in zip(gene_ids, gene_symbols):
-                    for disease_id in dis_computed2:
-                        pair_set_computed2.add((gene_id, disease_id))
+        dis_by_star = {}
+        for star_min in STAR_LEVELS:
+            dis, _, _ = variant_records_to_disease(records, map_to_mondo, star_min=star_min)
+            dis_by_star[star_min] = dis
+            if not dis:
+                continue
+            variant_sets[star_min].add(varid)
+            for gene_id, gene_sym in zip(gene_ids, gene_symbols):
+                for disease_id in dis:
+                    pair_sets[star_min].add((gene_id, disease_id))
+                    if star_min in pair_variant_ids:
                         key = (gene_sym, gene_id, disease_id)
-                        pair_variant_ids_computed2.setdefault(key, set()).add(varid)
+                        pair_variant_ids[star_min].setdefault(key, set()).add(varid)
 
-            groups = concordance_groups(records, map_to_mondo) if gene_ids else {}
-            for (mondo_id, _clinsig), entry in groups.items():
-                for gene_id, gene_sym in zip(gene_ids, gene_symbols):
-                    key = (gene_sym, gene_id, mondo_id)
-                    pe = pair_submitters.setdefault(key, {"submitters": set(), "variants": set()})
-                    pe["submitters"].update(entry["submitters"])
-                    pe["variants"].add(varid)
+        dis_computed2, _, _ = variant_records_to_disease(
+            records, map_to_mondo, star_min=EXPERT_STAR_MIN, rescue_min_submitters=MIN_CONCORDANT_SUBMITTERS
+        )
+        if dis_computed2:
+            variant_set_computed2.add(varid)
+            for gene_id, gene_sym in zip(gene_ids, gene_symbols):
+                for disease_id in dis_computed2:
+                    pair_set_computed2.add((gene_id, disease_id))
+                    key = (gene_sym, gene_id, disease_id)
+                    pair_variant_ids_computed2.setdefault(key, set()).add(varid)
+
+        groups = concordance_groups(records, map_to_mondo) if gene_ids else {}
+        for (mondo_id, _clinsig), entry in groups.items():
+            for gene_id, gene_sym in zip(gene_ids, gene_symbols):
+                key = (gene_sym, gene_id, mondo_id)
+                pe = pair_submitters.setdefault(key, {"submitters": set(), "variants": set()})
+                pe["submitters"].update(entry["submitters"])
+                pe["variants"].add(varid)
 
     counts = {s: {"variants": len(variant_sets[s]), "gene_disease_pairs": len(pair_sets[s])} for s in STAR_LEVELS}
     counts["2c"] = {"variants": len(variant_set_computed2), "gene_disease_pairs": len(pair_set_computed2)}
@@ -2858,31 +2863,22 @@ def compare_gene_attribution(clinvar_tsv: Path, data_dir: Path) -> dict:
     """
     ensure_variant_summary_downloaded(data_dir)
 
-    vs_symbols: dict = {}
-    vs_sym_text: dict = {}
     vs_field: Counter = Counter()
     vcf_field: Counter = Counter()
-    # one row per variant per build -- keep only the most-preferred build present for each
-    # VariationID, so nothing is counted twice and GRCh37-only variants are not dropped
+    # one row per variant per build -- variant_summary_rows yields only the most-preferred
+    # build present for each VariationID, so nothing is counted twice and GRCh37-only
+    # variants are not dropped
     vs_rank = {name: i for i, name in enumerate(ASSEMBLY_PREFERENCE)}
     vs_best: dict = {}
-    with gzip.open(data_dir / "variant_summary.txt.gz", "rt") as fh:
-        for row in csv.DictReader(fh, delimiter="\t"):
-            rank = vs_rank.get(row["Assembly"])
-            if rank is None:
-                continue
-            vid = row["VariationID"]
-            seen = vs_best.get(vid)
-            if seen is not None and seen <= rank:
-                continue
-            if seen is not None:
-                # a better build supersedes what a lower-preference row contributed
-                vs_symbols.pop(vid, None)
-                vs_sym_text.pop(vid, None)
-            vs_best[vid] = rank
-            vs_symbols.setdefault(vid, set()).add(row["GeneID"])
-            vs_sym_text.setdefault(vid, set()).add(row["GeneSymbol"])
-
+    vs_symbols: dict = {}
+    vs_sym_text: dict = {}
+    vs_rows = variant_summary_rows(
+        data_dir / "variant_summary.txt.gz", ("VariationID", "Assembly", "GeneID", "GeneSymbol")
+    )
+    for vid, build, gid, sym in vs_rows:
+        vs_best[vid] = vs_rank[build]
+        vs_symbols[vid] = {gid}
+        vs_sym_text[vid] = {sym}
 
     # All four counted from the final per-variant selection rather than incrementally:
     # a variant present on both builds passes the rank test twice on its way to GRCh38,
@@ -2911,33 +2907,32 @@ def compare_gene_attribution(clinvar_tsv: Path, data_dir: Path) -> dict:
         "vs_field": vs_field,
     }
 
-    with open(clinvar_tsv, newline="") as fh:
-        for row in csv.DictReader(fh, delimiter="\t"):
-            vcf_field["rows"] += 1
-            for col in ("CLNDISDB", "GENEINFO", "MC", "RS"):
-                if row[col] == ".":
-                    vcf_field[f"empty_{col}"] += 1
-            gene_ids, gene_syms = make_genes_from_row(row["GENEINFO"])
-            if not gene_ids:
-                continue
-            stats["geneinfo_hist"][min(len(gene_ids), 5)] += 1
-            stats["geneinfo_attributions"] += len(gene_ids)
-            stats["geneinfo_artifact"] += sum(1 for s in gene_syms if classify_gene_symbol(s) != "protein-coding")
+    for row in table_rows(clinvar_tsv, ("ID", "CLNDISDB", "GENEINFO", "MC", "RS")):
+        vcf_field["rows"] += 1
+        for col in ("CLNDISDB", "GENEINFO", "MC", "RS"):
+            if row[col] == ".":
+                vcf_field[f"empty_{col}"] += 1
+        gene_ids, gene_syms = make_genes_from_row(row["GENEINFO"])
+        if not gene_ids:
+            continue
+        stats["geneinfo_hist"][min(len(gene_ids), 5)] += 1
+        stats["geneinfo_attributions"] += len(gene_ids)
+        stats["geneinfo_artifact"] += sum(1 for s in gene_syms if classify_gene_symbol(s) != "protein-coding")
 
-            gids = vs_symbols.get(row["ID"])
-            if gids is None:
-                stats["no_vs_row"] += 1
-                continue
-            if gids == {"-1"}:
-                stats["vs_minus1"] += 1
-            syms = vs_sym_text.get(row["ID"], set())
-            stats["vs_hist"][min(len(gids), 5)] += 1
-            stats["vs_attributions"] += len(gids)
-            stats["vs_artifact"] += sum(1 for s in syms if classify_gene_symbol(s) != "protein-coding")
-            if len(gene_ids) > 1:
-                stats["multi_gene_variants"] += 1
-                if len(gids) == 1:
-                    stats["multi_resolved_to_one"] += 1
+        gids = vs_symbols.get(row["ID"])
+        if gids is None:
+            stats["no_vs_row"] += 1
+            continue
+        if gids == {"-1"}:
+            stats["vs_minus1"] += 1
+        syms = vs_sym_text.get(row["ID"], set())
+        stats["vs_hist"][min(len(gids), 5)] += 1
+        stats["vs_attributions"] += len(gids)
+        stats["vs_artifact"] += sum(1 for s in syms if classify_gene_symbol(s) != "protein-coding")
+        if len(gene_ids) > 1:
+            stats["multi_gene_variants"] += 1
+            if len(gids) == 1:
+                stats["multi_resolved_to_one"] += 1
 
     return stats
 
@@ -3173,25 +3168,24 @@ def build_phenotype_profile(
     hp_usage: Counter = Counter()
     disease_sets: dict = {}
 
-    with open(clinvar_tsv, newline="") as fh:
-        for row in csv.DictReader(fh, delimiter="\t"):
-            groups = parse_CLNDISDB(row["CLNDISDB"])
-            hp_terms = {hp for g in groups for hp in g["HP"]}
-            hist_all[min(len(hp_terms), PHENO_HIST_CAP)] += 1
-            for hp in hp_terms:
-                hp_usage[hp] += 1
-
-            records = var_records.get(row["ID"])
-            if records is None:
-                continue
-            dis, _, _ = variant_records_to_disease(records, map_to_mondo, star_min=0)
-            if not dis:
-                continue
-            hist_plp[min(len(hp_terms), PHENO_HIST_CAP)] += 1
+    for row in table_rows(clinvar_tsv, ("CLNDISDB", "ID")):
+        groups = parse_CLNDISDB(row["CLNDISDB"])
+        hp_terms = {hp for g in groups for hp in g["HP"]}
+        hist_all[min(len(hp_terms), PHENO_HIST_CAP)] += 1
+        for hp in hp_terms:
+            hp_usage[hp] += 1
+
+        records = var_records.get(row["ID"])
+        if records is None:
+            continue
+        dis, _, _ = variant_records_to_disease(records, map_to_mondo, star_min=0)
+        if not dis:
+            continue
+        hist_plp[min(len(hp_terms), PHENO_HIST_CAP)] += 1
 
-            mapped, _ = map_CLNDISDB_to_mondo(groups, map_to_mondo)
-            for mondo_id, hps in map_mondo_to_hp(mapped, dis).items():
-                disease_sets.setdefault(mondo_id, Counter())[frozenset(hps)] += 1
+        mapped, _ = map_CLNDISDB_to_mondo(groups, map_to_mondo)
+        for mondo_id, hps in map_mondo_to_hp(mapped, dis).items():
+            disease_sets.setdefault(mondo_id, Counter())[frozenset(hps)] += 1
 
     rows = []
     for mondo_id, sets in disease_sets.items():
@@ -3308,66 +3302,65 @@ def build_evidence_tiers(
     lit_only_variants: set = set()
     clnvc_counts: Counter = Counter()
 
-    with open(clinvar_tsv, newline="") as fh:
-        for row in csv.DictReader(fh, delimiter="\t"):
-            varid = row["ID"]
-            stage_variants[1].add(varid)
-            clnvc_counts[row["CLNVC"]] += 1
+    for row in table_rows(clinvar_tsv, ("CLNREVSTAT", "CLNVC", "ID")):
+        varid = row["ID"]
+        stage_variants[1].add(varid)
+        clnvc_counts[row["CLNVC"]] += 1
 
-            records = var_records.get(varid)
-            if records is None:
-                continue
-            gene_entry = variant_genes.get(varid)
-            gene_id = gene_entry[0] if gene_entry else None
+        records = var_records.get(varid)
+        if records is None:
+            continue
+        gene_entry = variant_genes.get(varid)
+        gene_id = gene_entry[0] if gene_entry else None
 
-            dis_any, _, _ = variant_records_to_disease(records, map_to_mondo, star_min=0)
-            if not dis_any:
-                continue
-            stage_variants[2].add(varid)
+        dis_any, _, _ = variant_records_to_disease(records, map_to_mondo, star_min=0)
+        if not dis_any:
+            continue
+        stage_variants[2].add(varid)
+        if gene_id:
+            stage_genes[2].add(gene_id)
+        stage_diseases[2].update(dis_any)
+
+        agg_star = review_star_map.get(row["CLNREVSTAT"], 0)
+        groups = concordance_groups(records, map_to_mondo)
+        conc_diseases = {
+            mondo_id
+            for (mondo_id, _cs), entry in groups.items()
+            if len(entry["submitters"]) >= MIN_CONCORDANT_SUBMITTERS
+        }
+        has_pub = varid in pubmed_variants
+        if any(r["CollectionMethod"] == "literature only" for r in records):
+            lit_only_variants.add(varid)
+
+        # stage 3: ClinVar's own aggregate
+        causes_dis = set(dis_any) if agg_star >= aggregate_star_min else set()
+        if causes_dis:
+            stage_variants[3].add(varid)
             if gene_id:
-                stage_genes[2].add(gene_id)
-            stage_diseases[2].update(dis_any)
+                stage_genes[3].add(gene_id)
+            stage_diseases[3].update(causes_dis)
 
-            agg_star = review_star_map.get(row["CLNREVSTAT"], 0)
-            groups = concordance_groups(records, map_to_mondo)
-            conc_diseases = {
-                mondo_id
-                for (mondo_id, _cs), entry in groups.items()
-                if len(entry["submitters"]) >= MIN_CONCORDANT_SUBMITTERS
-            }
-            has_pub = varid in pubmed_variants
-            if any(r["CollectionMethod"] == "literature only" for r in records):
-                lit_only_variants.add(varid)
-
-            # stage 3: ClinVar's own aggregate
-            causes_dis = set(dis_any) if agg_star >= aggregate_star_min else set()
-            if causes_dis:
-                stage_variants[3].add(varid)
-                if gene_id:
-                    stage_genes[3].add(gene_id)
-                stage_diseases[3].update(causes_dis)
-
-            # stage 4: inferred 2 star via concordance
-            causes_dis |= conc_diseases
-            if causes_dis:
-                stage_variants[4].add(varid)
-                if gene_id:
-                    stage_genes[4].add(gene_id)
-                stage_diseases[4].update(causes_dis)
-
-            # stage 5: 1-star with a publication, for whatever is left
-            assoc_dis = (set(dis_any) - causes_dis) if (has_pub and agg_star >= 1) else set()
-            if causes_dis or assoc_dis:
-                stage_variants[5].add(varid)
-                if gene_id:
-                    stage_genes[5].add(gene_id)
-                stage_diseases[5].update(causes_dis | assoc_dis)
+        # stage 4: inferred 2 star via concordance
+        causes_dis |= conc_diseases
+        if causes_dis:
+            stage_variants[4].add(varid)
+            if gene_id:
+                stage_genes[4].add(gene_id)
+            stage_diseases[4].update(causes_dis)
 
+        # stage 5: 1-star with a publication, for whatever is left
+        assoc_dis = (set(dis_any) - causes_dis) if (has_pub and agg_star >= 1) else set()
+        if causes_dis or assoc_dis:
+            stage_variants[5].add(varid)
             if gene_id:
-                for d in causes_dis:
-                    pairs_causes.add((gene_id, d))
-                for d in assoc_dis:
-                    pairs_assoc.add((gene_id, d))
+                stage_genes[5].add(gene_id)
+            stage_diseases[5].update(causes_dis | assoc_dis)
+
+        if gene_id:
+            for d in causes_dis:
+                pairs_causes.add((gene_id, d))
+            for d in assoc_dis:
+                pairs_assoc.add((gene_id, d))
 
     # the stronger tier wins where a pair qualifies both ways
     pairs_assoc -= pairs_causes
@@ -3416,59 +3409,47 @@ def build_filter_cube(clinvar_tsv: Path, var_records: dict, map_to_mondo: dict,
     def conc_bucket(n: int) -> int:
         return min(n, CONCORDANCE_LEVELS[-1])
 
-    with open(clinvar_tsv, newline="") as fh:
-        for row in csv.DictReader(fh, delimiter="\t"):
-            varid = row["ID"]
-            records = var_records.get(varid)
-            if records is None:
-                continue
-            agg_star = review_star_map.get(row["CLNREVSTAT"], 0)
+    for row in table_rows(clinvar_tsv, ("CLNREVSTAT", "ID")):
+        varid = row["ID"]
+        records = var_records.get(varid)
+        if records is None:
+            continue
+        agg_star = review_star_map.get(row["CLNREVSTAT"], 0)
 
-            # per-disease max review-star among supporting P/LP records
-            star_by_disease: dict = {}
-            for rec in records:
-                clinsig = rec["ClinicalSignificance"]
-                if clinsig not in predicate_map:
-                    continue
-                stars = review_star_map[rec["ReviewStatus"].replace(" ", "_")]
-                mondo_ids = set()
-                for mg in rec["ReportedPhenotypeInfo"].split(";"):
-                    key = "MedGen:{}".format(mg.split(":")[0])
-                    if key in map_to_mondo:
-                        mondo_ids.update(map_to_mondo[key])
-                if not mondo_ids:
-                    for dis_id in rec["SubmittedPhenotypeInfo"].split(";"):
-                        dis_id = format_id_to_map(dis_id)
-                        if dis_id in map_to_mondo:
-                            mondo_ids.update(map_to_mondo[dis_id])
-                        elif dis_id is not None and "MONDO:" in dis_id:
-                            mondo_ids.add(dis_id)
-                for mondo_id in mondo_ids:
-                    if stars > star_by_disease.get(mondo_id, -1):
-                        star_by_disease[mondo_id] = stars
-
-            if not star_by_disease:
+        # per-disease max review-star among supporting P/LP records
+        star_by_disease: dict = {}
+        for rec in records:
+            clinsig = rec["ClinicalSignificance"]
+            if clinsig not in predicate_map:
                 continue
+            stars = record_stars(rec)
+            mondo_ids, _ = record_diseases(rec, map_to_mondo)
+            for mondo_id in mondo_ids:
+                if stars > star_by_disease.get(mondo_id, -1):
+                    star_by_disease[mondo_id] = stars
 
-            # per-disease max concordant-submitter count, across ClinicalSignificance values
-            groups = concordance_groups(records, map_to_mondo)
-            conc_by_disease: dict = {}
-            for (mondo_id, _clinsig), entry in groups.items():
-                n = len(entry["submitters"])
-                if n > conc_by_disease.get(mondo_id, 0):
-                    conc_by_disease[mondo_id] = n
-
-            for mondo_id, stars in star_by_disease.items():
-                edge_cube[(stars, conc_bucket(conc_by_disease.get(mondo_id, 1)), agg_star)] += 1
-
-            variant_cube[
-                (
-                    max(star_by_disease.values()),
-                    conc_bucket(max(conc_by_disease.values()) if conc_by_disease else 1),
-                    agg_star,
-                    variant_genes.get(varid) is not None,
-                )
-            ] += 1
+        if not star_by_disease:
+            continue
+
+        # per-disease max concordant-submitter count, across ClinicalSignificance values
+        groups = concordance_groups(records, map_to_mondo)
+        conc_by_disease: dict = {}
+        for (mondo_id, _clinsig), entry in groups.items():
+            n = len(entry["submitters"])
+            if n > conc_by_disease.get(mondo_id, 0):
+                conc_by_disease[mondo_id] = n
+
+        for mondo_id, stars in star_by_disease.items():
+            edge_cube[(stars, conc_bucket(conc_by_disease.get(mondo_id, 1)), agg_star)] += 1
+
+        variant_cube[
+            (
+                max(star_by_disease.values()),
+                conc_bucket(max(conc_by_disease.values()) if conc_by_disease else 1),
+                agg_star,
+                variant_genes.get(varid) is not None,
+            )
+        ] += 1
 
     return {
         "variants": [{"s": k[0], "c": k[1], "a": k[2], "g": k[3], "n": v} for k, v in sorted(variant_cube.items())],
@@ -3529,58 +3510,56 @@ def build_clnsig_cube(
     pair_index: dict = {}
     pair_gene_symbol: dict = {}
 
-    with open(clinvar_tsv, newline="") as fh:
-        reader = csv.DictReader(fh, delimiter="\t")
-        for row in reader:
-            star = review_star_map.get(row["CLNREVSTAT"])
-            if star is None:
-                star = 0
-            clnsig = classify_clnsig(row["CLNSIG"])
-            clnvc = row["CLNVC"] if row["CLNVC"] != "." else "unspecified"
-            clnvc_types.add(clnvc)
-            size = classify_size(row["REF"], row["ALT"])
-            in_strchive_flag = in_strchive(row["CHROM"], int(row["POS"]), len(row["REF"]), strchive_intervals)
-
-            records = var_records.get(row["ID"])
-            has_literature = False
-            has_concordance = False
-            in_production = False
-            dis: dict = {}
-            if records is not None:
-                has_literature = any(rec["CollectionMethod"] == "literature only" for rec in records)
-                groups = concordance_groups(records, map_to_mondo)
-                has_concordance = any(
-                    len(entry["submitters"]) >= MIN_CONCORDANT_SUBMITTERS for entry in groups.values()
-                )
-                dis, _, _ = variant_records_to_disease(records, map_to_mondo, star_min=0)
-                prod_dis, _, _ = variant_records_to_disease(
-                    records,
-                    map_to_mondo,
-                    star_min=PRODUCTION_STAR_MIN,
-                    rescue_min_submitters=MIN_CONCORDANT_SUBMITTERS,
-                )
-                in_production = bool(prod_dis)
+    for row in table_rows(clinvar_tsv, ("ALT", "CHROM", "CLNREVSTAT", "CLNSIG", "CLNVC", "ID", "POS", "REF")):
+        star = review_star_map.get(row["CLNREVSTAT"])
+        if star is None:
+            star = 0
+        clnsig = classify_clnsig(row["CLNSIG"])
+        clnvc = row["CLNVC"] if row["CLNVC"] != "." else "unspecified"
+        clnvc_types.add(clnvc)
+        size = classify_size(row["REF"], row["ALT"])
+        in_strchive_flag = in_strchive(row["CHROM"], int(row["POS"]), len(row["REF"]), strchive_intervals)
+
+        records = var_records.get(row["ID"])
+        has_literature = False
+        has_concordance = False
+        in_production = False
+        dis: dict = {}
+        if records is not None:
+            has_literature = any(rec["CollectionMethod"] == "literature only" for rec in records)
+            groups = concordance_groups(records, map_to_mondo)
+            has_concordance = any(
+                len(entry["submitters"]) >= MIN_CONCORDANT_SUBMITTERS for entry in groups.values()
+            )
+            dis, _, _ = variant_records_to_disease(records, map_to_mondo, star_min=0)
+            prod_dis, _, _ = variant_records_to_disease(
+                records,
+                map_to_mondo,
+                star_min=PRODUCTION_STAR_MIN,
+                rescue_min_submitters=MIN_CONCORDANT_SUBMITTERS,
+            )
+            in_production = bool(prod_dis)
 
-            cell_key = (star, clnsig, clnvc, size, has_literature, has_concordance, in_strchive_flag, in_production)
-            counts[cell_key] += 1
+        cell_key = (star, clnsig, clnvc, size, has_literature, has_concordance, in_strchive_flag, in_production)
+        counts[cell_key] += 1
 
-            if not dis:
-                continue
-            gene_ids, gene_symbols = variant_genes_for(variant_genes, row["ID"])
-            cell_map = cell_pairs.setdefault(cell_key, {})
-            for gene_id, gene_sym in zip(gene_ids, gene_symbols):
-                pair_gene_symbol.setdefault(gene_id, gene_sym)
-                for mondo_id in dis:
-                    # keyed by (gene_id, disease) only, matching section the star-cutoff section's canonical pair
-                    # identity -- the HGNC id is what production actually emits; a handful of
-                    # ids (135 observed) carry >1 symbol spelling across records (gene renames),
-                    # which would otherwise inflate this count vs section the star-cutoff section's headline number.
-                    pkey = (gene_id, mondo_id)
-                    idx = pair_index.setdefault(pkey, len(pair_index))
-                    entry = cell_map.setdefault(idx, {"n": 0, "sample": []})
-                    entry["n"] += 1
-                    if len(entry["sample"]) < MAX_VARIANT_SAMPLE:
-                        entry["sample"].append(row["ID"])
+        if not dis:
+            continue
+        gene_ids, gene_symbols = variant_genes_for(variant_genes, row["ID"])
+        cell_map = cell_pairs.setdefault(cell_key, {})
+        for gene_id, gene_sym in zip(gene_ids, gene_symbols):
+            pair_gene_symbol.setdefault(gene_id, gene_sym)
+            for mondo_id in dis:
+                # keyed by (gene_id, disease) only, matching section the star-cutoff section's canonical pair
+                # identity -- the HGNC id is what production actually emits; a handful of
+                # ids (135 observed) carry >1 symbol spelling across records (gene renames),
+                # which would otherwise inflate this count vs section the star-cutoff section's headline number.
+                pkey = (gene_id, mondo_id)
+                idx = pair_index.setdefault(pkey, len(pair_index))
+                entry = cell_map.setdefault(idx, {"n": 0, "sample": []})
+                entry["n"] += 1
+                if len(entry["sample"]) < MAX_VARIANT_SAMPLE:
+                    entry["sample"].append(row["ID"])
 
     cube = [
         {
@@ -3671,7 +3650,7 @@ def ensure_variant_summary_downloaded(data_dir: Path) -> Path:
 
 
 def build_sv_summary(data_dir: Path, map_to_mondo: dict) -> dict:
-    """Two passes over variant_summary.txt.gz tallying the Type
+    """Two column-projected loads of variant_summary.txt.gz tallying the Type
     distribution and, for the SV_TYPES specifically: count, how many resolve to a
     disease id (PhenotypeIDS not '-'/empty) vs not, genomic span (Stop - Start), and
     every row (resolved AND unresolved, any ClinicalSignificance) for the full
@@ -3686,11 +3665,12 @@ def build_sv_summary(data_dir: Path, map_to_mondo: dict) -> dict:
     invisible to production's SNV/indel-only pipeline (clinvar.vcf.gz has no
     way to represent a CNV/inversion at all).
 
-    The file carries one row per variant per genome build. The first pass records
-    which build should represent each VariationID (ASSEMBLY_PREFERENCE: GRCh38,
-    else GRCh37) and the second tallies exactly one row per variant, so a variant
-    present on both builds is never counted twice and one ClinVar has only placed
-    on GRCh37 is not silently dropped.
+    The file carries one row per variant per genome build. The first pass, over
+    three columns of every row, records which build should represent each VariationID
+    (ASSEMBLY_PREFERENCE: GRCh38, else GRCh37) and its Type; the second,
+    variant_summary_rows, yields just the SV-typed rows of those builds. So a variant
+    present on both builds is never counted twice and one ClinVar has only placed on
+    GRCh37 is not silently dropped.
     """
     path = ensure_variant_summary_downloaded(data_dir)
 
@@ -3699,98 +3679,101 @@ def build_sv_summary(data_dir: Path, map_to_mondo: dict) -> dict:
     sv_rows = []
     gene_disease_pairs: dict = {}
 
-    with gzip.open(path, "rt") as fh:
-        header = fh.readline().rstrip("\n").lstrip("#").split("\t")
-        hcols = {k: i for i, k in enumerate(header)}
-        # First pass: which build should represent each variant. Buffering the rows
-        # themselves would mean holding millions of split lines in memory, so this
-        # re-reads the file instead and keeps only a rank per VariationID.
-        sv_rank = {name: i for i, name in enumerate(ASSEMBLY_PREFERENCE)}
-        sv_best: dict = {}
-        sv_unplaced: set = set()
-        for line in fh:
-            cols = line.rstrip("\n").split("\t")
-            varid = cols[hcols["VariationID"]]
-            rank = sv_rank.get(cols[hcols["Assembly"]])
-            if rank is None:
-                # NCBI36 / "na" -- unusable. Track SV-typed ones so the count of variants
-                # this section cannot place is reported rather than silently dropped.
-                if cols[hcols["Type"]] in SV_TYPES:
-                    sv_unplaced.add(varid)
-                continue
-            seen = sv_best.get(varid)
-            if seen is None or rank < seen:
-                sv_best[varid] = rank
+    # First pass: which build should represent each variant, and its Type there. Buffering
+    # the rows themselves would mean holding millions of split lines in memory, so this
+    # streams three columns and keeps only a rank and Type per VariationID.
+    sv_rank = {name: i for i, name in enumerate(ASSEMBLY_PREFERENCE)}
+    sv_best: dict = {}
+    sv_unplaced: set = set()
+    every_row = variant_summary_rows(path, ("VariationID", "Assembly", "Type"), assembly_preference=None)
+    for varid, build, vtype in every_row:
+        rank = sv_rank.get(build)
+        if rank is None:
+            # NCBI36 / "na" -- unusable. Track SV-typed ones so the count of variants
+            # this section cannot place is reported rather than silently dropped.
+            if vtype in SV_TYPES:
+                sv_unplaced.add(varid)
+            continue
+        seen = sv_best.get(varid)
+        if seen is None or rank < seen[0]:
+            sv_best[varid] = (rank, vtype)
 
     sv_unplaced -= set(sv_best)
+    type_counts.update(vtype for _rank, vtype in sv_best.values())
+    del sv_best
+
+    # Exactly one row per variant: its preferred build's, first occurrence only
+    columns = (
+        "VariationID",
+        "Assembly",
+        "Type",
+        "PhenotypeIDS",
+        "Start",
+        "Stop",
+        "ClinicalSignificance",
+        "Name",
+        "AlleleID",
+        "PhenotypeList",
+        "ReviewStatus",
+        "NumberSubmitters",
+        "GeneSymbol",
+        "HGNC_ID",
+    )
     sv_build_stats: dict = {name: {"count": 0, "resolved": 0} for name in ASSEMBLY_PREFERENCE}
 
-    sv_done: set = set()
-    with gzip.open(path, "rt") as fh:
-        fh.readline()
-        for line in fh:
-            cols = line.rstrip("\n").split("\t")
-            rank = sv_rank.get(cols[hcols["Assembly"]])
-            varid = cols[hcols["VariationID"]]
-            # exactly one row per variant: the preferred build, first occurrence only
-            if rank is None or rank != sv_best.get(varid) or varid in sv_done:
-                continue
-            sv_done.add(varid)
-
-            vtype = cols[hcols["Type"]]
-            type_counts[vtype] += 1
-            if vtype not in SV_TYPES:
-                continue
-
-            stat = sv_stats[vtype]
-            stat["count"] += 1
-            pheno_ids = cols[hcols["PhenotypeIDS"]]
-            resolved = pheno_ids not in ("-", "")
+    # only the SV-typed rows come back, filtered before they are built
+    for values in variant_summary_rows(path, columns, where={"Type": SV_TYPES}):
+        row = dict(zip(columns, values))
+        vtype = row["Type"]
+        stat = sv_stats[vtype]
+        stat["count"] += 1
+        pheno_ids = row["PhenotypeIDS"]
+        resolved = pheno_ids not in ("-", "")
+        if resolved:
+            stat["resolved"] += 1
+        build = row["Assembly"]
+        if build in sv_build_stats:
+            sv_build_stats[build]["count"] += 1
             if resolved:
-                stat["resolved"] += 1
-            build = cols[hcols["Assembly"]]
-            if build in sv_build_stats:
-                sv_build_stats[build]["count"] += 1
-                if resolved:
-                    sv_build_stats[build]["resolved"] += 1
-
-            try:
-                span = int(cols[hcols["Stop"]]) - int(cols[hcols["Start"]])
-            except ValueError:
-                span = None
-            if span is not None:
-                stat["spans"].append(span)
-
-            if span is not None:
-                variation_id = cols[hcols["VariationID"]]
-                clinsig = cols[hcols["ClinicalSignificance"]]
-                sv_rows.append(
-                    {
-                        "name": cols[hcols["Name"]],
-                        "type": vtype,
-                        "allele_id": cols[hcols["AlleleID"]],
-                        "variation_id": variation_id,
-                        "clinsig": clinsig,
-                        "phenotype": cols[hcols["PhenotypeList"]],
-                        "phenotype_ids": pheno_ids,
-                        "resolved": resolved,
-                        "span": span,
-                        "review_status": cols[hcols["ReviewStatus"]],
-                        "num_submitters": int(cols[hcols["NumberSubmitters"]]),
-                    }
-                )
+                sv_build_stats[build]["resolved"] += 1
+
+        try:
+            span = int(row["Stop"]) - int(row["Start"])
+        except ValueError:
+            span = None
+        if span is not None:
+            stat["spans"].append(span)
+
+        if span is not None:
+            variation_id = row["VariationID"]
+            clinsig = row["ClinicalSignificance"]
+            sv_rows.append(
+                {
+                    "name": row["Name"],
+                    "type": vtype,
+                    "allele_id": row["AlleleID"],
+                    "variation_id": variation_id,
+                    "clinsig": clinsig,
+                    "phenotype": row["PhenotypeList"],
+                    "phenotype_ids": pheno_ids,
+                    "resolved": resolved,
+                    "span": span,
+                    "review_status": row["ReviewStatus"],
+                    "num_submitters": int(row["NumberSubmitters"]),
+                }
+            )
 
-                gene_symbol = cols[hcols["GeneSymbol"]]
-                if resolved and clinsig in predicate_map and is_single_clean_gene_symbol(gene_symbol):
-                    # HGNC, to match the id space the ingest and snv_pair_set use
-                    gene_id = cols[hcols["HGNC_ID"]].strip()
-                    if not gene_id or gene_id == "-":
-                        continue
-                    for mondo_id in resolve_phenotype_ids_to_mondo(pheno_ids, map_to_mondo):
-                        key = (gene_symbol, gene_id, mondo_id)
-                        entry = gene_disease_pairs.setdefault(key, {"types": set(), "variants": set()})
-                        entry["types"].add(vtype)
-                        entry["variants"].add(variation_id)
+            gene_symbol = row["GeneSymbol"]
+            if resolved and clinsig in predicate_map and is_single_clean_gene_symbol(gene_symbol):
+                # HGNC, to match the id space the ingest and snv_pair_set use
+                gene_id = row["HGNC_ID"].strip()
+                if not gene_id or gene_id == "-":
+                    continue
+                for mondo_id in resolve_phenotype_ids_to_mondo(pheno_ids, map_to_mondo):
+                    key = (gene_symbol, gene_id, mondo_id)
+                    entry = gene_disease_pairs.setdefault(key, {"types": set(), "variants": set()})
+                    entry["types"].add(vtype)
+                    entry["variants"].add(variation_id)
 
     sv_rows.sort(key=lambda e: -e["span"])
 
@@ -7201,15 +7184,21 @@ def main():
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("--data-dir", type=Path, default=Path("../data"))
     parser.add_argument("--output", type=Path, default=Path("clinvar_report.html"))
+    parser.add_argument(
+        "--clinvar-table",
+        type=Path,
+        help="Full-width ClinVar table (vcf_to_tsv.py --fields all), TSV or .parquet/.arrow "
+        "(default: <data-dir>/clinvar_full.tsv)",
+    )
     args = parser.parse_args()
 
     var_records, map_to_mondo = load_maps(args.data_dir)
     mondo_labels = load_mondo_labels(args.data_dir)
-    clinvar_tsv = args.data_dir / "clinvar.tsv"
+    clinvar_tsv = args.clinvar_table or args.data_dir / "clinvar_full.tsv"
 
     # Same curated attribution the production transform uses -- see variant_genes_for()
     ensure_variant_summary_downloaded(args.data_dir)
-    variant_genes = make_variant_gene_map(args.data_dir / "variant_summary.txt.gz")
+    variant_genes = cached_load(make_variant_gene_map, args.data_dir / "variant_summary.txt.gz")
     print(f"Gene attribution: {len(variant_genes):,} variants with a ClinVar-asserted gene")
 
     submission_profile = summarize_submission_file(var_records)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark make_variant_record_map() single-process against its multi-process parser.
+
+Writes a synthetic submission_summary.txt.gz shaped like the real file (same header,
+records grouped by VariationID, ClinVar-like value distributions), loads it with jobs=1
+and with each requested job count, checks every load produced an identical store, and
+prints wall-clock time per load.
+
+    uv run python scripts/bench_submission_summary.py --records 4000000 --jobs 2 4 8
+
+A real file can be benchmarked instead with --input data/submission_summary.txt.gz.
+"""
+
+import argparse
+import gzip
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+INGEST_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(INGEST_DIR / "src"))
+
+from clinvar_helpers import SUBMISSION_COLUMNS, make_variant_record_map  # noqa: E402
+
+HEADER = [
+    "VariationID",
+    "ClinicalSignificance",
+    "DateLastEvaluated",
+    "Description",
+    "SubmittedPhenotypeInfo",
+    "ReportedPhenotypeInfo",
+    "ReviewStatus",
+    "CollectionMethod",
+    "OriginCounts",
+    "Submitter",
+    "SCV",
+    "SubmittedGeneSymbol",
+    "ExplanationOfInterpretation",
+    "SomaticClinicalImpact",
+    "Oncogenicity",
+    "ContributesToAggregateClassification",
+]
+SIGNIFICANCE = [
+    ("Uncertain significance", 40),
+    ("Likely benign", 25),
+    ("Benign", 15),
+    ("Pathogenic", 9),
+    ("Likely pathogenic", 6),
+    ("not provided", 3),
+    ("Conflicting classifications of pathogenicity", 2),
+]
+REVIEW = [
+    ("criteria provided, single submitter", 80),
+    ("no assertion criteria provided", 15),
+    ("reviewed by expert panel", 4),
+    ("practice guideline", 1),
+]
+METHOD = [("clinical testing", 85), ("literature only", 8), ("research", 5), ("curation", 2)]
+
+
+def write_synthetic(path: Path, n_records: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+
+    def pick(choices):
+        values, weights = zip(*choices)
+        return rng.choices(values, weights, k=1)[0]
+
+    with gzip.open(path, "wt") as fh:
+        fh.write("#Submitted variant data\n#" + "\t".join(HEADER) + "\n")
+        varid = 0
+        written = 0
+        while written < n_records:
+            varid += rng.randint(1, 3)
+            for _ in range(min(rng.choice((1, 1, 1, 2, 2, 3, 5, 12)), n_records - written)):
+                written += 1
+                cui = "C{:07d}".format(rng.randint(0, 30000))
+                row = [
+                    str(varid),
+                    pick(SIGNIFICANCE),
+                    "Jan 01, 2020",
+                    "-",
+                    "MedGen:" + cui,
+                    "{}:disease name {}".format(cui, cui),
+                    pick(REVIEW),
+                    pick(METHOD),
+                    "germline:1",
+                    "Lab{}".format(rng.randint(0, 3000)),
+                    "SCV{:09d}".format(written),
+                    "GENE{}".format(rng.randint(0, 20000)),
+                    "-",
+                    "-",
+                    "-",
+                    "yes",
+                ]
+                fh.write("\t".join(row) + "\n")
+
+
+def snapshot(store):
+    return [(varid, [tuple(rec.values()) for rec in store[varid]]) for varid in store]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the submission_summary loader")
+    parser.add_argument("--input", type=Path, help="Existing submission_summary.txt.gz (default: synthetic)")
+    parser.add_argument("--records", type=int, default=4_000_000, help="Synthetic file size in records")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[2, 4, 8], help="Worker counts to compare")
+    parser.add_argument("--pathogenic-only", action="store_true", help="Load as src/transform.py does")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.input
+        if path is None:
+            path = Path(tmp) / "submission_summary.txt.gz"
+            start = time.perf_counter()
+            write_synthetic(path, args.records)
+            print(f"Wrote {args.records:,} synthetic records in {time.perf_counter() - start:.1f}s")
+        elif not path.exists():
+            print(f"Error: file not found: {path}", file=sys.stderr)
+            sys.exit(1)
+
+        baseline = None
+        for jobs in [1] + [j for j in args.jobs if j > 1]:
+            start = time.perf_counter()
+            store = make_variant_record_map(
+                path, columns=SUBMISSION_COLUMNS, pathogenic_only=args.pathogenic_only, jobs=jobs
+            )
+            elapsed = time.perf_counter() - start
+            if baseline is None:
+                baseline = (elapsed, snapshot(store))
+                print(f"jobs=1: {elapsed:.2f}s  ({store.n_records:,} records, {len(store):,} variants)")
+                continue
+            identical = snapshot(store) == baseline[1]
+            print(f"jobs={jobs}: {elapsed:.2f}s  ({baseline[0] / elapsed:.2f}x)  identical={identical}")
+            if not identical:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
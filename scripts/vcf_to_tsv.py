@@ -3,16 +3,56 @@
 Convert ClinVar VCF to TSV format for Koza processing.
 
 Uses cyvcf2 to parse VCF and expand INFO fields into separate columns.
+
+By default only the columns src/transform.yaml's reader lists are written -- the
+fields the transform reads. --fields all writes every VCF column and INFO field
+(ALL_FIELDS), as analysis/clinvar_report.py needs; --fields A,B,... picks others.
+
+An output path ending in .parquet or .arrow writes the same table as Parquet or
+Arrow IPC instead (src/clinvar_table.py; needs pyarrow), for consumers that read
+only a few of its columns.
+
+With --jobs N the VCF is cut into genomic windows using its tabix index
+(clinvar.vcf.gz.tbi, fetched by download.yaml), the windows are converted in N
+worker processes, and the results are concatenated in file order -- the output
+is byte-identical to a single-process conversion.
+
+A manifest beside the output (<output>.manifest.json, see src/vcf_manifest.py)
+records the VCF's hash, the fields and the converter's own source hash. A rerun
+with all three unchanged leaves the output alone; when only some contigs' variants
+changed, an indexed VCF has just those converted again and the rest of the rows
+copied from the previous TSV. --force converts everything regardless.
 """
 
 import argparse
+import multiprocessing
+import os
+import shutil
 import sys
+import tempfile
 from pathlib import Path
 
+import yaml
 from cyvcf2 import VCF
 
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from clinvar_table import ColumnarWriter, columnar_format, require_pyarrow  # noqa: E402
+from clinvar_vcf import info_value, region_windows, tabix_contigs  # noqa: E402
+from vcf_manifest import (  # noqa: E402
+    build_manifest,
+    contig_sha256s,
+    file_sha256,
+    is_current,
+    load_manifest,
+    remove_manifest,
+    reusable_contigs,
+    source_sha256,
+    write_manifest,
+)
 
-# INFO fields to extract (based on transform.yaml columns)
+# INFO fields that can be extracted (--fields all writes every one)
 INFO_FIELDS = [
     "AF_ESP",
     "AF_EXAC",
@@ -55,50 +95,180 @@ INFO_FIELDS = [
 # Standard VCF columns
 VCF_COLUMNS = ["CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER"]
 
+ALL_FIELDS = VCF_COLUMNS + INFO_FIELDS
 
-def get_info_value(variant, field):
-    """Extract INFO field value, returning '.' if missing."""
-    try:
-        value = variant.INFO.get(field)
-        if value is None:
-            return "."
-        if isinstance(value, tuple):
-            return "|".join(str(v) for v in value)
-        return str(value)
-    except KeyError:
-        return "."
-
-
-def convert_vcf_to_tsv(vcf_path: Path, output_path: Path):
-    """Convert VCF file to TSV with expanded INFO fields."""
+# How each standard column is written
+_VCF_VALUES = {
+    "CHROM": lambda v: v.CHROM,
+    "POS": lambda v: str(v.POS),
+    "ID": lambda v: v.ID or ".",
+    "REF": lambda v: v.REF,
+    "ALT": lambda v: ",".join(v.ALT) if v.ALT else ".",
+    "QUAL": lambda v: str(v.QUAL) if v.QUAL else ".",
+    "FILTER": lambda v: v.FILTER or "PASS",
+}
+
+
+# Windows per worker, so one window of dense variants does not leave the others idle
+WINDOWS_PER_JOB = 8
+
+# Everything that decides what a row looks like; a change to any of them is a new converter
+CONVERTER_SOURCES = [Path(__file__).resolve(), SRC_DIR / "clinvar_vcf.py", SRC_DIR / "clinvar_table.py"]
+
+
+def transform_fields(config_path=SRC_DIR / "transform.yaml"):
+    """The columns the transform's Koza reader is configured with."""
+    with open(config_path) as fh:
+        return list(yaml.safe_load(fh)["reader"]["columns"])
+
+
+def parse_fields(spec):
+    """--fields: "transform" (transform_fields()), "all" (ALL_FIELDS) or a comma-separated
+    list of column names, written in the order given."""
+    if spec == "transform":
+        return transform_fields()
+    if spec == "all":
+        return list(ALL_FIELDS)
+    fields = [f.strip() for f in spec.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in ALL_FIELDS]
+    if unknown or not fields:
+        raise ValueError("unknown field(s) {}; choose from {}".format(", ".join(unknown), ", ".join(ALL_FIELDS)))
+    return fields
+
+
+def variant_values(variant, fields=ALL_FIELDS):
+    """A variant's values for `fields`, in that order."""
+    info = variant.INFO
+    return [_VCF_VALUES[f](variant) if f in _VCF_VALUES else info_value(info, f) for f in fields]
+
+
+def variant_line(variant, fields=ALL_FIELDS):
+    """One TSV line for a variant."""
+    return "\t".join(variant_values(variant, fields)) + "\n"
+
+
+def convert_vcf_to_tsv(vcf_path: Path, output_path: Path, fields=ALL_FIELDS):
+    """Convert VCF file to TSV with expanded INFO fields, one column per field. Returns
+    {contig: (start, end)}, the byte range of each contig's rows in a TSV output ({} for
+    a columnar one)."""
     vcf = VCF(str(vcf_path))
 
-    # Build header
-    header = VCF_COLUMNS + INFO_FIELDS
+    if columnar_format(output_path):
+        with ColumnarWriter(output_path, fields) as out:
+            for variant in vcf:
+                out.write_row(variant_values(variant, fields))
+        vcf.close()
+        return {}
 
+    ranges = {}
+    contig, start = None, None
     with open(output_path, "w") as out:
         # Write header
-        out.write("\t".join(header) + "\n")
+        out.write("\t".join(fields) + "\n")
 
         # Process each variant
         for variant in vcf:
-            row = [
-                variant.CHROM,
-                str(variant.POS),
-                variant.ID or ".",
-                variant.REF,
-                ",".join(variant.ALT) if variant.ALT else ".",
-                str(variant.QUAL) if variant.QUAL else ".",
-                variant.FILTER or "PASS",
-            ]
-
-            # Add INFO fields
-            for field in INFO_FIELDS:
-                row.append(get_info_value(variant, field))
-
-            out.write("\t".join(row) + "\n")
+            if variant.CHROM != contig:
+                if contig is not None:
+                    ranges[contig] = (start, out.tell())
+                contig, start = variant.CHROM, out.tell()
+            out.write(variant_line(variant, fields))
+        if contig is not None:
+            ranges[contig] = (start, out.tell())
+
+    vcf.close()
+    return ranges
+
+
+def has_index(vcf_path) -> bool:
+    return any(Path(str(vcf_path) + suffix).exists() for suffix in (".tbi", ".csi"))
+
+
+def convert_vcf_to_tsv_incremental(vcf_path: Path, output_path: Path, fields, contigs, reuse):
+    """Rewrite the TSV at output_path for `contigs` (names, in file order), copying the
+    rows of those in `reuse` ({contig: (start, end)}) from its current content and
+    converting the others by region query, so the VCF must be indexed. Returns the new
+    file's contig byte ranges, as convert_vcf_to_tsv() does."""
+    partial = Path(str(output_path) + ".partial")
+    vcf = VCF(str(vcf_path))
+    ranges = {}
+    try:
+        with open(output_path, "rb") as old, open(partial, "wb") as out:
+            out.write(("\t".join(fields) + "\n").encode("utf-8"))
+            for contig in contigs:
+                start = out.tell()
+                if contig in reuse:
+                    begin, end = reuse[contig]
+                    old.seek(begin)
+                    out.write(old.read(end - begin))
+                else:
+                    for variant in vcf(contig):
+                        out.write(variant_line(variant, fields).encode("utf-8"))
+                ranges[contig] = (start, out.tell())
+        os.replace(partial, output_path)
+    finally:
+        vcf.close()
+        partial.unlink(missing_ok=True)
+    return ranges
+
 
+def _convert_window(task):
+    """Worker: the TSV lines of the variants starting in one window, written to part_path."""
+    vcf_path, (contig, start, end), part_path, fields = task
+    # A region query also returns variants that start before the window and overlap it;
+    # those belong to the previous window
+    region = "{}:{}-{}".format(contig, start, "" if end is None else end)
+    vcf = VCF(str(vcf_path))
+    n = 0
+    with open(part_path, "w") as out:
+        for variant in vcf(region):
+            if variant.POS < start or (end is not None and variant.POS > end):
+                continue
+            out.write(variant_line(variant, fields))
+            n += 1
     vcf.close()
+    return part_path, n
+
+
+def convert_vcf_to_tsv_parallel(
+    vcf_path: Path, output_path: Path, jobs: int, tbi_path: Path = None, fields=ALL_FIELDS
+):
+    """convert_vcf_to_tsv() split by tabix region across `jobs` worker processes. Returns
+    the number of variants written and, as convert_vcf_to_tsv() does, the contigs' byte
+    ranges. Workers always write TSV parts; a .parquet/.arrow output_path is filled from
+    them in window order."""
+    tbi_path = tbi_path or Path(str(vcf_path) + ".tbi")
+    if not tbi_path.exists():
+        raise FileNotFoundError(f"--jobs needs the tabix index {tbi_path}")
+    windows = region_windows(tabix_contigs(tbi_path), jobs * WINDOWS_PER_JOB)
+
+    work_dir = Path(tempfile.mkdtemp(prefix=".vcf_to_tsv-", dir=Path(output_path).parent))
+    try:
+        tasks = [
+            (str(vcf_path), window, str(work_dir / f"{i:05d}.tsv"), list(fields)) for i, window in enumerate(windows)
+        ]
+        total = 0
+        ranges = {}
+        columnar = columnar_format(output_path)
+        with ColumnarWriter(output_path, fields) if columnar else open(output_path, "w") as out:
+            if not columnar:
+                out.write("\t".join(fields) + "\n")
+            with multiprocessing.Pool(jobs) as pool:
+                # imap hands the parts back in window order while later windows still run
+                for (contig, _, _), (part_path, n) in zip(windows, pool.imap(_convert_window, tasks)):
+                    with open(part_path) as part:
+                        if columnar:
+                            for line in part:
+                                out.write_row(line.rstrip("\n").split("\t"))
+                        else:
+                            start = out.tell()
+                            shutil.copyfileobj(part, out, 1 << 20)
+                            ranges[contig] = (ranges.get(contig, (start,))[0], out.tell())
+                    Path(part_path).unlink()
+                    total += n
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return total, ranges
 
 
 def main():
@@ -106,15 +276,59 @@ def main():
         description="Convert ClinVar VCF to TSV format for Koza processing"
     )
     parser.add_argument("vcf", type=Path, help="Input VCF file (can be gzipped)")
-    parser.add_argument("output", type=Path, help="Output TSV file")
+    parser.add_argument("output", type=Path, help="Output TSV file (.parquet / .arrow for a columnar table)")
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="Worker processes; >1 splits the VCF by region via its .tbi index"
+    )
+    parser.add_argument(
+        "--fields",
+        default="transform",
+        help='Columns to write: "transform" (those src/transform.yaml reads; default), "all", or A,B,...',
+    )
+    parser.add_argument("--force", action="store_true", help="Convert even if the manifest says nothing changed")
 
     args = parser.parse_args()
+    if columnar_format(args.output):
+        try:
+            require_pyarrow()
+        except ImportError as e:
+            parser.error(str(e))
+
+    try:
+        fields = parse_fields(args.fields)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
     if not args.vcf.exists():
         print(f"Error: VCF file not found: {args.vcf}", file=sys.stderr)
         sys.exit(1)
 
-    convert_vcf_to_tsv(args.vcf, args.output)
+    converter = source_sha256(CONVERTER_SOURCES)
+    input_sha256 = file_sha256(args.vcf)
+    manifest = None if args.force else load_manifest(args.output)
+    if is_current(manifest, args.output, input_sha256, fields, converter):
+        print(f"{args.output} is up to date with {args.vcf}; nothing to do (--force converts anyway)")
+        return
+
+    # per-contig hashes cost one decompressing read of the VCF; only a TSV output can reuse rows
+    digests = None if columnar_format(args.output) else contig_sha256s(args.vcf)
+    reuse = reusable_contigs(manifest, args.output, digests, fields, converter) if digests else {}
+    remove_manifest(args.output)
+
+    if reuse and has_index(args.vcf):
+        ranges = convert_vcf_to_tsv_incremental(args.vcf, args.output, fields, list(digests), reuse)
+        print(f"Reused {len(reuse)} of {len(digests)} contigs from the previous {args.output}")
+    elif args.jobs > 1:
+        try:
+            n, ranges = convert_vcf_to_tsv_parallel(args.vcf, args.output, args.jobs, fields=fields)
+        except FileNotFoundError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Converted {n:,} variants with {args.jobs} jobs")
+    else:
+        ranges = convert_vcf_to_tsv(args.vcf, args.output, fields)
+    write_manifest(args.output, build_manifest(args.output, input_sha256, fields, converter, digests, ranges))
     print(f"Converted {args.vcf} -> {args.output}")
 
 
@@ -0,0 +1,249 @@
+"""On-disk cache of the auxiliary maps built from the downloaded source files.
+
+make_variant_record_map(), make_mondo_map(), make_medgen_to_mondo_map() and
+make_variant_gene_map() re-parse hundreds of MB of gzip text on every run, and every
+run of the transform, the report or a review build needs the same four results.
+cached_load() pickles what a loader built to data/.cache/ and hands it back on the next
+call with the same inputs instead of parsing again.
+
+An entry is keyed on:
+  - the source file's content hash. The hash is remembered against the file's
+    size/mtime, so an untouched file is not re-read just to be hashed; a re-downloaded
+    one is, and a byte-identical re-download still hits,
+  - the loader's name and arguments (e.g. the column projection),
+  - the source of the module defining the loader -- any edit to clinvar_helpers.py
+    invalidates every entry built by it -- and CACHE_FORMAT.
+
+Nothing needs clearing by hand: a changed key simply misses, and the entry it replaces
+is deleted when the new one is written. Set CLINVAR_INGEST_CACHE=0 to bypass the cache
+entirely.
+
+load_concurrently() builds several of these at once, one worker process per file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Bump when the on-disk layout of an entry changes
+CACHE_FORMAT = 1
+
+CACHE_DIR_NAME = ".cache"
+_CHUNK = 1 << 20
+_MISS = object()
+
+
+def cache_enabled() -> bool:
+    return os.environ.get("CLINVAR_INGEST_CACHE", "1") not in ("0", "false", "no", "")
+
+
+def default_cache_dir(source_path) -> Path:
+    """data/.cache/ for a file in data/ -- the cache lives beside what it caches."""
+    return Path(source_path).resolve().parent / CACHE_DIR_NAME
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write via a temporary file and rename, so a concurrent or interrupted run never
+    sees a half-written entry."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def content_hash(source_path, cache_dir: Path, rehash=True):
+    """Content hash of source_path, re-read only when its size or mtime has changed since
+    the hash was last recorded in cache_dir. With rehash=False a stale record gives None
+    instead of reading the file.
+
+    Each source file's record is its own small file, so loads of different files running
+    in parallel never race on it.
+    """
+    source = Path(source_path).resolve()
+    st = source.stat()
+    stamp = [st.st_size, st.st_mtime_ns]
+
+    stamp_path = cache_dir / "{}-{}.hash".format(source.name, _digest(str(source).encode())[:12])
+    try:
+        known = json.loads(stamp_path.read_text())
+    except (OSError, ValueError):
+        known = None
+    if known is not None and known[:2] == stamp:
+        return known[2]
+    if not rehash:
+        return None
+
+    h = hashlib.blake2b(digest_size=16)
+    with open(source, "rb") as fh:
+        while chunk := fh.read(_CHUNK):
+            h.update(chunk)
+    digest = h.hexdigest()
+    _write_atomic(stamp_path, json.dumps(stamp + [digest]).encode())
+    return digest
+
+
+def code_version(loader) -> str:
+    """Hash of the source file defining loader, plus CACHE_FORMAT and the Python version
+    the entry is pickled under."""
+    source = Path(inspect.getsourcefile(loader)).read_bytes()
+    return _digest(b"%d:%d.%d:" % (CACHE_FORMAT, *sys.version_info[:2]) + source)
+
+
+def _entry_prefix(loader, source_path, args, kwargs) -> str:
+    # entries for the same loader, file and arguments share a prefix; only the last part
+    # changes when the file contents or the code do
+    # `jobs` changes how a loader builds its result, never the result itself
+    call = repr((args, sorted((k, v) for k, v in kwargs.items() if k != "jobs")))
+    return "{}-{}-{}".format(loader.__name__, Path(source_path).name, _digest(call.encode())[:12])
+
+
+def _read_entry(entry: Path):
+    try:
+        with open(entry, "rb") as fh:
+            return pickle.load(fh)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        # missing, truncated or unreadable entry
+        return _MISS
+
+
+def _lookup(loader, source_path, args, kwargs, cache_dir: Path, rehash=True):
+    """(entry path, cached result or _MISS); entry is None when rehash=False and the
+    source's recorded hash is stale."""
+    digest = content_hash(source_path, cache_dir, rehash=rehash)
+    if digest is None:
+        return None, _MISS
+    key = _digest("{}:{}".format(digest, code_version(loader)).encode())
+    entry = cache_dir / "{}-{}.pickle".format(_entry_prefix(loader, source_path, args, kwargs), key)
+    return entry, _read_entry(entry)
+
+
+def cached_load(loader, source_path, *args, cache_dir=None, **kwargs):
+    """loader(source_path, *args, **kwargs), served from the on-disk cache when an entry
+    for the same file contents, arguments and loader code exists.
+
+    The arguments must have a stable repr() (strings, numbers, tuples, booleans) -- it is
+    what distinguishes e.g. a projected load from a full one.
+    """
+    if not cache_enabled():
+        return loader(source_path, *args, **kwargs)
+
+    cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir(source_path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    entry, result = _lookup(loader, source_path, args, kwargs, cache_dir)
+    if result is not _MISS:
+        return result
+
+    result = loader(source_path, *args, **kwargs)
+    _write_atomic(entry, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+    for stale in cache_dir.glob(_entry_prefix(loader, source_path, args, kwargs) + "-*.pickle"):
+        if stale != entry:
+            stale.unlink(missing_ok=True)
+    return result
+
+
+def load_concurrently(calls, max_workers=None):
+    """Several cached_load() calls at once: {name: (loader, source_path, kwargs)} ->
+    {name: result}, in the order of `calls`.
+
+    The loaders are gzip-decompression and split bound, so they run in worker processes
+    rather than threads; each result comes back pickled, which for the column-wise
+    SubmissionStore is a handful of arrays and pooled strings. Whatever is already in the
+    cache is read here instead, without a round trip through a worker, and a single miss
+    is simply built in this process. Callers merge the results themselves, in a fixed
+    order, so the outcome never depends on which load finished first.
+    """
+    results = {}
+    misses = {}
+    for name, (loader, source_path, kwargs) in calls.items():
+        if cache_enabled():
+            cache_dir = default_cache_dir(source_path)
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            _entry, result = _lookup(loader, source_path, (), kwargs, cache_dir, rehash=False)
+            if result is not _MISS:
+                results[name] = result
+                continue
+        misses[name] = (loader, source_path, kwargs)
+
+    if len(misses) == 1:
+        [(name, (loader, source_path, kwargs))] = misses.items()
+        results[name] = cached_load(loader, source_path, **kwargs)
+    elif misses:
+        workers = min(len(misses), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                name: pool.submit(cached_load, loader, source_path, **kwargs)
+                for name, (loader, source_path, kwargs) in misses.items()
+            }
+            for name, future in futures.items():
+                results[name] = future.result()
+    return {name: results[name] for name in calls}
+
+
+def load_transform_maps(sub_path, sssom_path, medgen_path, variant_summary_path, submission_jobs=None):
+    """The auxiliary maps the transform runs on -- (var_records, map_to_mondo,
+    variant_genes) -- built as transform.py builds them at import, so every runner that
+    needs them shares its cache entries. variant_genes is a memory-mapped
+    variant_gene_index.VariantGeneIndex (a plain dict with the cache off)."""
+    from clinvar_helpers import (
+        SUBMISSION_COLUMNS,
+        make_medgen_to_mondo_map,
+        make_mondo_map,
+        make_variant_gene_map,
+        make_variant_record_map,
+    )
+    from variant_gene_index import build_gene_index, load_gene_index
+
+    if submission_jobs is None:
+        submission_jobs = max(1, (os.cpu_count() or 1) - 3)
+    # ClinVar's own per-variant gene attribution -- see make_variant_gene_map for why this
+    # replaces the VCF's positional GENEINFO field as the source of variant-gene edges.
+    # With the cache on, the worker writes the memory-mapped index and returns its path;
+    # the dict itself is built and pickled back only when there is nowhere to keep one.
+    gene_loader = build_gene_index if cache_enabled() else make_variant_gene_map
+    aux_maps = load_concurrently(
+        {
+            # Map records to each clinvar variant id, keeping only the columns the ingest
+            # reads and only the Pathogenic/Likely-pathogenic records it can ever act on. It
+            # is by far the largest file, so it also gets whatever cores the other three
+            # loads leave free.
+            "var_records": (
+                make_variant_record_map,
+                sub_path,
+                {"columns": SUBMISSION_COLUMNS, "pathogenic_only": True, "jobs": submission_jobs},
+            ),
+            # General map back to mondo terms
+            "map_to_mondo": (make_mondo_map, sssom_path, {}),
+            "medgen_to_mondo": (make_medgen_to_mondo_map, medgen_path, {}),
+            "variant_genes": (gene_loader, variant_summary_path, {}),
+        }
+    )
+    var_records = aux_maps["var_records"]
+
+    # Mapped here from the index the load above left in data/.cache/ (built now only if
+    # make_variant_gene_map's code changed since that load's entry was written)
+    variant_genes = load_gene_index(variant_summary_path) if cache_enabled() else aux_maps["variant_genes"]
+
+    # Merge medgen into the mondo map -- always in this order, whichever load finished first
+    map_to_mondo = aux_maps["map_to_mondo"]
+    map_to_mondo.update(aux_maps["medgen_to_mondo"])
+
+    # Resolve each submission record's phenotypes to MONDO ids once, now the map is complete
+    var_records.resolve_diseases(map_to_mondo)
+    return var_records, map_to_mondo, variant_genes
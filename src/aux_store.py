@@ -0,0 +1,475 @@
+"""A read-only, memory-mapped file holding the auxiliary maps, for worker processes.
+
+A worker running process_row() needs var_records, map_to_mondo and variant_genes.
+Pickled into each worker they are a full copy per process; inherited through fork they
+start shared, but every lookup bumps the reference counts of the objects it touches, so
+page by page each worker ends up with its own copy anyway. write_store() lays the three
+maps out once in a single flat file and attach() maps it: the pages are the page cache's,
+shared by every process that attaches, nothing is deserialised, and attaching costs the
+same whatever the size.
+
+Layout, after a header naming each section's offset, type and length:
+
+  - every distinct string (VariationIDs, CURIEs, column values) once, as UTF-8 in one
+    blob plus an array of offsets into it; every other section refers to strings by id,
+  - per map, the key string ids in the order the map iterates and an open-addressing
+    hash table (zlib.crc32 of the key, linear probing) over them,
+  - variant_genes: (gene, symbol) string ids per key,
+  - map_to_mondo: CSR offsets and target string ids per key; MONDO self-mappings
+    ("MONDO:x" / "MONDO:MONDO:x" -> "MONDO:x") are a table of their own, keyed on the
+    MONDO id, as in clinvar_helpers.MondoMap,
+  - var_records: per variant the range of its records, per record a string id per
+    column, its review stars and -- when the maps were resolved against each other (see
+    SubmissionStore.resolve_diseases) -- its resolved diseases, one CSR table shared by
+    equal resolutions.
+
+The views attach() returns answer the lookups process_row() and qualifying_diseases()
+make, as the loaders' own objects do: var_records[varid] is a SubmissionRecords over a
+StoredSubmissions, map_to_mondo[curie] a MondoTargets, variant_genes.get(varid) a
+(gene, symbol) tuple. sharded_transform.run_sharded(aux_store=...) hands them to its
+workers in place of the forked maps.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from array import array
+from collections.abc import Mapping
+from pathlib import Path
+
+from clinvar_helpers import MondoTargets, SubmissionRecords, review_star_map
+
+MAGIC = b"CVAUXST1"
+
+# Bump when the layout of a store changes
+STORE_FORMAT = 1
+
+_ALIGN = 8
+_HEADER = struct.Struct("<8sQ")
+
+# MONDO self-mapping flags: which of a MONDO id's two keys map to it
+_SELF_KEY, _DOUBLE_PREFIXED_KEY = 1, 2
+
+
+class _Strings:
+    """String ids -> str over the store's blob."""
+
+    __slots__ = ("_offsets", "_blob")
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def raw(self, i):
+        return self._blob[self._offsets[i] : self._offsets[i + 1]]
+
+    def __getitem__(self, i):
+        return str(self.raw(i), "utf-8")
+
+
+class _Table:
+    """One map's keys and their hash table."""
+
+    __slots__ = ("_strings", "_keys", "_slots", "_mask")
+
+    def __init__(self, strings, keys, slots):
+        self._strings = strings
+        self._keys = keys
+        self._slots = slots
+        self._mask = len(slots) - 1
+
+    def find(self, key):
+        """The row of `key`, or -1."""
+        encoded = key.encode("utf-8")
+        i = zlib.crc32(encoded) & self._mask
+        while True:
+            k = self._slots[i]
+            if not k:
+                return -1
+            if self._strings.raw(self._keys[k - 1]) == encoded:
+                return k - 1
+            i = (i + 1) & self._mask
+
+    def __iter__(self):
+        return map(self._strings.__getitem__, self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def _hash_slots(keys):
+    """The open-addressing table over `keys` (str), at most half full."""
+    size = 8
+    while size < 2 * len(keys):
+        size *= 2
+    slots = array("I", [0]) * size
+    mask = size - 1
+    for row, key in enumerate(keys):
+        i = zlib.crc32(key.encode("utf-8")) & mask
+        while slots[i]:
+            i = (i + 1) & mask
+        slots[i] = row + 1
+    return slots
+
+
+class StoredGenes(Mapping):
+    """VariationID -> (gene curie, symbol)."""
+
+    __slots__ = ("_table", "_strings", "_values")
+
+    def __init__(self, table, strings, values):
+        self._table = table
+        self._strings = strings
+        self._values = values
+
+    def __getitem__(self, varid):
+        row = self._table.find(varid)
+        if row < 0:
+            raise KeyError(varid)
+        return (self._strings[self._values[2 * row]], self._strings[self._values[2 * row + 1]])
+
+    def __contains__(self, varid):
+        return self._table.find(varid) >= 0
+
+    def __iter__(self):
+        return iter(self._table)
+
+    def __len__(self):
+        return len(self._table)
+
+
+class StoredMondoMap(Mapping):
+    """Source CURIE -> MondoTargets, as clinvar_helpers.MondoMap answers it."""
+
+    __slots__ = ("_table", "_strings", "_offsets", "_targets", "_self_table", "_self_keys")
+
+    def __init__(self, table, strings, offsets, targets, self_table, self_keys):
+        self._table = table
+        self._strings = strings
+        self._offsets = offsets
+        self._targets = targets
+        self._self_table = self_table
+        self._self_keys = self_keys
+
+    def _self_target(self, key):
+        if key.startswith("MONDO:MONDO:"):
+            key, flag = key[6:], _DOUBLE_PREFIXED_KEY
+        elif key.startswith("MONDO:"):
+            flag = _SELF_KEY
+        else:
+            return -1
+        row = self._self_table.find(key)
+        return row if row >= 0 and self._self_keys[row] & flag else -1
+
+    def __getitem__(self, key):
+        row = self._table.find(key)
+        if row >= 0:
+            return MondoTargets(self._strings, self._targets[self._offsets[row] : self._offsets[row + 1]])
+        row = self._self_target(key)
+        if row < 0:
+            raise KeyError(key)
+        return MondoTargets(self._strings, self._self_table._keys[row : row + 1])
+
+    def __contains__(self, key):
+        return self._table.find(key) >= 0 or self._self_target(key) >= 0
+
+    def __iter__(self):
+        yield from self._table
+        for row, mondo_id in enumerate(self._self_table):
+            for flag, key in ((_SELF_KEY, mondo_id), (_DOUBLE_PREFIXED_KEY, "MONDO:" + mondo_id)):
+                if self._self_keys[row] & flag and self._table.find(key) < 0:
+                    yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class StoredSubmissions(Mapping):
+    """VariationID -> SubmissionRecords, read the way SubmissionStore is read."""
+
+    __slots__ = (
+        "columns",
+        "_table",
+        "_strings",
+        "_offsets",
+        "_values",
+        "_stars",
+        "_disease_codes",
+        "_disease_offsets",
+        "_disease_targets",
+        "_from_reported",
+        "_resolved_for",
+    )
+
+    def __init__(self, columns, table, strings, offsets, values, stars, diseases=None):
+        self.columns = tuple(columns)
+        self._table = table
+        self._strings = strings
+        self._offsets = offsets
+        self._values = values
+        self._stars = stars
+        if diseases is None:
+            diseases = (None, None, None, None)
+        self._disease_codes, self._disease_offsets, self._disease_targets, self._from_reported = diseases
+        # set by attach() to the map the stored resolutions belong to
+        self._resolved_for = None
+
+    def __getitem__(self, varid):
+        row = self._table.find(varid)
+        if row < 0:
+            raise KeyError(varid)
+        return SubmissionRecords(self, self._offsets[row], self._offsets[row + 1])
+
+    def __contains__(self, varid):
+        return self._table.find(varid) >= 0
+
+    def __iter__(self):
+        return iter(self._table)
+
+    def __len__(self):
+        return len(self._table)
+
+    @property
+    def n_records(self):
+        return self._offsets[-1]
+
+    def value(self, column, row):
+        return self._strings[self._values[column][row]]
+
+    def stars(self, row):
+        stars = self._stars[row]
+        if stars < 0:
+            return review_star_map[self.value("ReviewStatus", row).replace(" ", "_")]
+        return stars
+
+    def diseases(self, row, map_to_mondo):
+        """The stored resolution of `row`, or None if not resolved against this map."""
+        if self._resolved_for is None or self._resolved_for is not map_to_mondo:
+            return None
+        k = self._disease_codes[row]
+        ids = self._disease_targets[self._disease_offsets[k] : self._disease_offsets[k + 1]]
+        return tuple(map(self._strings.__getitem__, ids)), bool(self._from_reported[k])
+
+
+class _StoreBuilder:
+    def __init__(self):
+        self.strings = {}
+        self.sections = {}
+
+    def intern(self, s):
+        i = self.strings.get(s)
+        if i is None:
+            i = self.strings[s] = len(self.strings)
+        return i
+
+    def table(self, name, keys):
+        keys = list(keys)
+        self.sections[name + ".keys"] = array("I", map(self.intern, keys))
+        self.sections[name + ".slots"] = _hash_slots(keys)
+
+    def write(self, path, meta):
+        blob = bytearray()
+        offsets = array("Q", [0])
+        for s in self.strings:
+            blob += s.encode("utf-8")
+            offsets.append(len(blob))
+        sections = {"strings.offsets": offsets, "strings.blob": bytes(blob), **self.sections}
+
+        # section offsets are from the end of the (aligned) header, which lists them
+        directory = {"format": STORE_FORMAT, **meta, "sections": {}}
+        position = 0
+        for name, data in sections.items():
+            typecode = data.typecode if isinstance(data, array) else "B"
+            directory["sections"][name] = [position, typecode, len(data)]
+            position = _align(position + len(data) * (data.itemsize if isinstance(data, array) else 1))
+        header = json.dumps(directory).encode("utf-8")
+        base = _align(_HEADER.size + len(header))
+
+        path = Path(path)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(_HEADER.pack(MAGIC, len(header)))
+                fh.write(header)
+                for name, data in sections.items():
+                    fh.write(b"\0" * (base + directory["sections"][name][0] - fh.tell()))
+                    fh.write(data.tobytes() if isinstance(data, array) else data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+def _align(n):
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _self_mapping(key, targets):
+    """(MONDO id, flag) when key -> targets is a MONDO self-mapping, else None."""
+    if len(targets) != 1 or not targets[0].startswith("MONDO:"):
+        return None
+    if key == targets[0]:
+        return targets[0], _SELF_KEY
+    if key == "MONDO:" + targets[0]:
+        return targets[0], _DOUBLE_PREFIXED_KEY
+    return None
+
+
+def write_store(path, var_records, map_to_mondo, variant_genes):
+    """Write the three maps to `path` (atomically), as attach() reads them back.
+
+    Each record's diseases are stored as resolved when var_records was resolved against
+    this map_to_mondo (SubmissionStore.resolve_diseases), so the workers skip that too."""
+    builder = _StoreBuilder()
+    intern = builder.intern
+
+    builder.table("genes", variant_genes)
+    builder.sections["genes.values"] = array(
+        "I", (intern(part) for varid in variant_genes for part in variant_genes[varid][:2])
+    )
+
+    explicit, self_keys = {}, {}
+    for key, targets in map_to_mondo.items():
+        targets = list(targets)
+        self_mapping = _self_mapping(key, targets)
+        if self_mapping is None:
+            explicit[key] = targets
+        else:
+            mondo_id, flag = self_mapping
+            self_keys[mondo_id] = self_keys.get(mondo_id, 0) | flag
+    builder.table("mondo", explicit)
+    offsets, targets = array("I", [0]), array("I")
+    for ids in explicit.values():
+        targets.extend(map(intern, ids))
+        offsets.append(len(targets))
+    builder.sections["mondo.offsets"] = offsets
+    builder.sections["mondo.targets"] = targets
+    builder.table("mondo_self", self_keys)
+    builder.sections["mondo_self.flags"] = array("B", self_keys.values())
+
+    columns = getattr(var_records, "columns", None)
+    if columns is None:
+        columns = list(dict.fromkeys(c for records in var_records.values() for rec in records for c in rec))
+    builder.table("records", var_records)
+    offsets = array("I", [0])
+    values = {c: array("I") for c in columns}
+    stars = array("b")
+    resolved = True
+    resolutions, codes = {}, array("I")
+    for records in var_records.values():
+        for rec in records:
+            for c in columns:
+                values[c].append(intern(rec[c]))
+            status = rec["ReviewStatus"] if "ReviewStatus" in columns else None
+            stars.append(-1 if status is None else review_star_map.get(status.replace(" ", "_"), -1))
+            if resolved:
+                resolution = rec.diseases(map_to_mondo) if hasattr(rec, "diseases") else None
+                if resolution is None:
+                    resolved = False
+                else:
+                    codes.append(resolutions.setdefault(resolution, len(resolutions)))
+        offsets.append(offsets[-1] + len(records))
+    builder.sections["records.offsets"] = offsets
+    for c in columns:
+        builder.sections["records.column." + c] = values[c]
+    builder.sections["records.stars"] = stars
+    if resolved:
+        disease_offsets, disease_targets = array("I", [0]), array("I")
+        for ids, _from_reported in resolutions:
+            disease_targets.extend(map(intern, ids))
+            disease_offsets.append(len(disease_targets))
+        builder.sections["records.disease_codes"] = codes
+        builder.sections["diseases.offsets"] = disease_offsets
+        builder.sections["diseases.targets"] = disease_targets
+        builder.sections["diseases.from_reported"] = array("B", (r for _ids, r in resolutions))
+
+    builder.write(path, {"columns": list(columns), "resolved": resolved})
+
+
+class AuxStore:
+    """A store file mapped into this process; var_records, map_to_mondo and variant_genes
+    are views over it, valid until close()."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError("{} is not an auxiliary map store".format(path))
+        directory = json.loads(self._mmap[_HEADER.size : _HEADER.size + header_length])
+        if directory["format"] != STORE_FORMAT:
+            self._mmap.close()
+            raise ValueError("{} is store format {}, not {}".format(path, directory["format"], STORE_FORMAT))
+        self._view = memoryview(self._mmap)
+        self._base = _align(_HEADER.size + header_length)
+        self._sections = directory["sections"]
+
+        strings = _Strings(self._section("strings.offsets"), self._section("strings.blob"))
+
+        def table(name):
+            return _Table(strings, self._section(name + ".keys"), self._section(name + ".slots"))
+
+        self.variant_genes = StoredGenes(table("genes"), strings, self._section("genes.values"))
+        self.map_to_mondo = StoredMondoMap(
+            table("mondo"),
+            strings,
+            self._section("mondo.offsets"),
+            self._section("mondo.targets"),
+            table("mondo_self"),
+            self._section("mondo_self.flags"),
+        )
+        columns = directory["columns"]
+        diseases = None
+        if directory["resolved"]:
+            diseases = tuple(
+                self._section(name)
+                for name in ("records.disease_codes", "diseases.offsets", "diseases.targets", "diseases.from_reported")
+            )
+        self.var_records = StoredSubmissions(
+            columns,
+            table("records"),
+            strings,
+            self._section("records.offsets"),
+            {c: self._section("records.column." + c) for c in columns},
+            self._section("records.stars"),
+            diseases,
+        )
+        if diseases is not None:
+            self.var_records._resolved_for = self.map_to_mondo
+
+    def _section(self, name):
+        offset, typecode, length = self._sections[name]
+        start = self._base + offset
+        return self._view[start : start + length * array(typecode).itemsize].cast(typecode)
+
+    def maps(self):
+        """(var_records, map_to_mondo, variant_genes), process_row()'s order."""
+        return self.var_records, self.map_to_mondo, self.variant_genes
+
+    def close(self):
+        """Unmap the file. A view still referenced elsewhere keeps the map alive; it is
+        unmapped when the last one goes instead."""
+        self.var_records = self.map_to_mondo = self.variant_genes = None
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(path) -> AuxStore:
+    """Map the store at `path`; see AuxStore."""
+    return AuxStore(path)
@@ -1,5 +1,11 @@
 import gzip
+import hashlib
 import uuid
+from array import array
+from bisect import bisect_right
+from collections import Counter, deque
+from collections.abc import Mapping, Sequence
+from itertools import accumulate, compress, groupby, repeat
 
 from biolink_model.datamodel.pydanticmodel_v2 import (
     AgentTypeEnum,
@@ -9,6 +15,13 @@ from biolink_model.datamodel.pydanticmodel_v2 import (
     VariantToGeneAssociation,
 )
 
+from kgx_records import (
+    SequenceVariantRecord,
+    VariantToDiseaseAssociationRecord,
+    VariantToGeneAssociationRecord,
+    check_record,
+)
+
 # Variant to gene predicate
 IS_SEQUENCE_VARIANT_OF = "biolink:is_sequence_variant_of"
 
@@ -112,24 +125,618 @@ predicate_map = {
     "Likely pathogenic, low penetrance": CAUSES,
 }
 
+# How edge ids are minted (see edge_id):
+#   "uuid5"  a UUID derived from the edge's subject, predicate, object and primary
+#            knowledge source, so an unchanged edge keeps its id from build to build and
+#            downstream diffs / incremental KG loads can recognise it
+#   "uuid4"  a fresh random UUID per edge per build
+# A run selects it with `edge_id_scheme:` under transform.yaml's `transform:` section.
+# Every (subject, predicate, object) is emitted at most once per build -- one gene edge
+# per variant, one predicate per (variant, disease) -- so uuid5 ids never collide.
+EDGE_ID_SCHEMES = ("uuid5", "uuid4")
+edge_id_scheme = "uuid5"
+EDGE_ID_NAMESPACE = uuid.UUID("aaa70020-1c17-5e9a-9ffb-ad64c70ec57b")
+
+# What process_row() builds its entities as:
+#   "pydantic"           the biolink_model pydantic classes, validated on construction
+#   "records"            kgx_records' slotted dataclasses: the same fields and written
+#                        values, no validation -- a fraction of the cost per entity
+#   "validated_records"  records, each also rebuilt as its pydantic class and checked to
+#                        dump identically (kgx_records.check_record); for tests and for
+#                        spot-checking a build, as slow as "pydantic" or slower
+# A run selects it with `entity_mode:` under transform.yaml's `transform:` section; the
+# default here is transform.yaml's, so a caller that never calls configure_from() builds
+# the same entities Koza does.
+ENTITY_MODES = ("pydantic", "records", "validated_records")
+entity_mode = "records"
+_ENTITY_CLASSES = {
+    "pydantic": (SequenceVariant, VariantToGeneAssociation, VariantToDiseaseAssociation),
+    "records": (SequenceVariantRecord, VariantToGeneAssociationRecord, VariantToDiseaseAssociationRecord),
+}
+_ENTITY_CLASSES["validated_records"] = _ENTITY_CLASSES["records"]
+
+# The submission_summary.txt.gz columns the ingest actually reads -- review status and
+# classification for the tier logic, the two phenotype columns for disease mapping,
+# CollectionMethod for the publication tier and Submitter for concordance. Passing this as
+# make_variant_record_map(columns=...) drops every other column at parse time. Anything
+# that starts reading another column from a submission record must add it here.
+SUBMISSION_COLUMNS = (
+    "ReviewStatus",
+    "ClinicalSignificance",
+    "ReportedPhenotypeInfo",
+    "SubmittedPhenotypeInfo",
+    "CollectionMethod",
+    "Submitter",
+)
+
 
-def make_variant_record_map(submission_path):
-    var_records = {}
-    with gzip.open(submission_path, "rt") as infile:
-        for line in infile:
-            line = line.strip("\r").strip("\n")
-            if line[0] == "#":
-                header = line.split("\t")
-                header[0] = header[0][1:]
-                hcols = {k: i for i, k in enumerate(header)}
+# submission_summary.txt.gz columns with a handful of distinct values spread over millions
+# of rows -- a few dozen at most, a few thousand for Submitter. SubmissionStore holds
+# these as small-int codes into a per-column value table rather than one str per record.
+CATEGORICAL_SUBMISSION_COLUMNS = frozenset(
+    {
+        "ReviewStatus",
+        "ClinicalSignificance",
+        "CollectionMethod",
+        "Submitter",
+    }
+)
+
+# Free-text columns that still repeat heavily across records ("C3661900:not provided" alone
+# is on a large share of them), so equal values are stored as one shared str.
+_POOLED_SUBMISSION_COLUMNS = frozenset({"ReportedPhenotypeInfo", "SubmittedPhenotypeInfo"})
+
+# Bytes of submission_summary.txt read per SubmissionStore batch -- large enough to
+# amortise the per-column work, small enough that one batch's cells are a negligible share
+# of memory.
+_SUBMISSION_BATCH_BYTES = 1 << 22
+
+
+def _extend_codes(codes, pool, values):
+    """Append the pool code of each of `values` to `codes`, numbering unseen values in
+    first-seen order."""
+    for value in dict.fromkeys(values):
+        if value not in pool:
+            pool[value] = len(pool)
+    codes.extend(map(pool.__getitem__, values))
+
+
+def _compact_codes(codes, n_values):
+    """The narrowest array typecode that holds every code in `codes`."""
+    if n_values <= 0xFF:
+        return array("B", codes)
+    if n_values <= 0xFFFF:
+        return array("H", codes)
+    return codes
+
+
+class SubmissionRecord(Mapping):
+    """Read-only view of one row of a SubmissionStore.
+
+    Indexes like the per-record dict make_variant_record_map() used to build
+    (rec["ClinicalSignificance"], rec.get(...), dict(rec)), so consumers written against
+    those dicts take either unchanged.
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def __getitem__(self, column):
+        return self._store.value(column, self._row)
+
+    def stars(self):
+        return self._store.stars(self._row)
+
+    def diseases(self, map_to_mondo):
+        return self._store.diseases(self._row, map_to_mondo)
+
+    def __iter__(self):
+        return iter(self._store.columns)
+
+    def __len__(self):
+        return len(self._store.columns)
+
+    def __repr__(self):
+        return "SubmissionRecord({!r})".format(dict(self))
+
+
+class SubmissionRecords(Sequence):
+    """The records of one VariationID: a contiguous row range of a SubmissionStore, in the
+    order they appear in submission_summary.txt."""
+
+    __slots__ = ("_store", "_start", "_stop")
+
+    def __init__(self, store, start, stop):
+        self._store = store
+        self._start = start
+        self._stop = stop
+
+    def __getitem__(self, i):
+        rows = range(self._start, self._stop)[i]
+        if isinstance(i, slice):
+            return [SubmissionRecord(self._store, row) for row in rows]
+        return SubmissionRecord(self._store, rows)
+
+    def __iter__(self):
+        store = self._store
+        for row in range(self._start, self._stop):
+            yield SubmissionRecord(store, row)
+
+    def __len__(self):
+        return self._stop - self._start
+
+
+class SubmissionStore(Mapping):
+    """VariationID -> submission records, held column-wise.
+
+    A dict per row of submission_summary.txt.gz -- millions of them, one str per column
+    each -- dominated the resident memory of both the transform and the report. Here each
+    column is one array (CATEGORICAL_SUBMISSION_COLUMNS) or one list, rows are grouped by
+    VariationID, and each variant owns the row range offsets[k]:offsets[k + 1]. Looking a
+    variant up returns a SubmissionRecords view over that range, so
+    variant_records_to_disease(), concordant_disease_pairs() and literature_only_variants()
+    read it exactly as they read the old dict-of-list-of-dicts.
+
+    resolve_diseases() additionally attaches each record's MONDO ids, so the tier logic
+    does not re-split and re-map the phenotype columns of the same record on every pass.
+    """
+
+    __slots__ = (
+        "columns",
+        "_codes",
+        "_values",
+        "_text",
+        "_index",
+        "_offsets",
+        "_variants",
+        "_review_stars",
+        "_resolved_for",
+        "_disease_codes",
+        "_disease_table",
+    )
+
+    def __init__(self, columns, codes, values, text, index, offsets):
+        self.columns = tuple(columns)
+        self._codes = codes
+        self._values = values
+        self._text = text
+        self._index = index
+        self._offsets = offsets
+        self._variants = list(index)
+        # stars per ReviewStatus code; None for a status review_star_map does not know, which
+        # stars() then reports exactly as a plain dict lookup would
+        self._review_stars = [
+            review_star_map.get(status.replace(" ", "_")) for status in values.get("ReviewStatus", ())
+        ]
+        self._resolved_for = None
+        self._disease_codes = None
+        self._disease_table = None
+
+    def __getitem__(self, varid):
+        k = self._index[varid]
+        return SubmissionRecords(self, self._offsets[k], self._offsets[k + 1])
+
+    def __contains__(self, varid):
+        return varid in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def n_records(self):
+        return self._offsets[-1]
+
+    def value(self, column, row):
+        codes = self._codes.get(column)
+        if codes is not None:
+            return self._values[column][codes[row]]
+        if column == "VariationID" and column in self.columns:
+            return self._variants[bisect_right(self._offsets, row) - 1]
+        return self._text[column][row]
+
+    def __getstate__(self):
+        # a disease resolution belongs to one map_to_mondo object (see resolve_diseases),
+        # so it is not carried across a pickle
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state.update(_resolved_for=None, _disease_codes=None, _disease_table=None)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def stars(self, row):
+        stars = self._review_stars[self._codes["ReviewStatus"][row]]
+        if stars is None:
+            return review_star_map[self.value("ReviewStatus", row).replace(" ", "_")]
+        return stars
+
+    def resolve_diseases(self, map_to_mondo):
+        """Map every record's phenotype columns to MONDO ids (resolve_phenotype_ids) once.
+
+        Records sharing the same ReportedPhenotypeInfo/SubmittedPhenotypeInfo pair -- the
+        large majority -- share one resolution, stored as a small-int code per record.
+        Afterwards record_diseases() reads the result instead of recomputing it, but only
+        when handed this same map_to_mondo object, so resolve after the map is complete
+        (i.e. after any update() merging further mappings into it).
+        """
+        pairs = list(zip(self._text["ReportedPhenotypeInfo"], self._text["SubmittedPhenotypeInfo"]))
+        table = {}
+        codes = array("I")
+        _extend_codes(codes, table, pairs)
+        del pairs
+        self._disease_table = [
+            resolve_phenotype_ids(reported, submitted, map_to_mondo) for reported, submitted in table
+        ]
+        self._disease_codes = _compact_codes(codes, len(table))
+        self._resolved_for = map_to_mondo
+        return self
+
+    def diseases(self, row, map_to_mondo):
+        """resolve_diseases()'s result for `row`, or None if not resolved against this map."""
+        if self._resolved_for is not map_to_mondo:
+            return None
+        return self._disease_table[self._disease_codes[row]]
+
+
+class _SubmissionStoreBuilder:
+    """Accumulates rows in file order; build() groups them by VariationID."""
+
+    def __init__(self, header, columns=None, keep_clinsig=None):
+        self.width = len(header)
+        self.columns = tuple(header) if columns is None else tuple(columns)
+        missing = [c for c in self.columns if c not in header]
+        if missing:
+            raise ValueError("submission_summary.txt has no column(s) {}".format(", ".join(missing)))
+        # VariationID is always read -- it is the grouping key -- whether or not it is kept,
+        # and so is ClinicalSignificance when rows are filtered on it
+        read = (*self.columns, "VariationID")
+        if keep_clinsig is not None:
+            read += ("ClinicalSignificance",)
+        self.positions = {c: header.index(c) for c in read}
+        self.keep_clinsig = keep_clinsig
+        self.codes = {c: array("I") for c in self.columns if c in CATEGORICAL_SUBMISSION_COLUMNS}
+        self.pools = {c: {} for c in self.codes}
+        # VariationID is not stored per row: it is the key of the row range the row sits in
+        self.text = {c: [] for c in self.columns if c not in self.codes and c != "VariationID"}
+        self.text_pool = {}
+        self.index = {}
+        self.row_variants = array("I")
+
+    def add_lines(self, lines):
+        """Append a batch of raw lines from the file."""
+        self.add_text("".join(lines))
+
+    def add_text(self, text):
+        """Append a block of whole lines from the file.
+
+        The block is split in one str.split() call and each column sliced out of the flat
+        result, so no per-row list is ever built; the per-value work (dict lookups,
+        interning) then runs inside map() a column at a time rather than in a Python loop
+        over every cell.
+        """
+        text = text.replace("\r\n", "\n")
+        if text.endswith("\n"):
+            text = text[:-1]
+        if not text:
+            return
+        width = self.width
+        lines = text.split("\n")
+        # Every line's width is checked, not the block's cell total: a long row and a short
+        # one in the same block would cancel out and shift every later cell a column over.
+        if set(map(str.count, lines, repeat("\t", len(lines)))) == {width - 1}:
+            del lines
+            cells = text.replace("\n", "\t").split("\t")
+            # Only the projected columns are sliced out; the rest are dropped with `cells`.
+            columns = {c: cells[i::width] for c, i in self.positions.items()}
+            del cells
+        else:
+            # a ragged row somewhere in the block -- fall back to splitting line by line,
+            # which ignores trailing extra columns and fails on a short row
+            rows = [line.split("\t") for line in lines]
+            columns = {c: [row[i] for row in rows] for c, i in self.positions.items()}
+            del lines, rows
+        del text
+
+        if self.keep_clinsig is not None:
+            keep = list(map(self.keep_clinsig.__contains__, columns["ClinicalSignificance"]))
+            if not all(keep):
+                columns = {c: list(compress(values, keep)) for c, values in columns.items()}
+            if "ClinicalSignificance" not in self.columns:
+                del columns["ClinicalSignificance"]
+
+        for column, values in columns.items():
+            if column == "VariationID":
+                _extend_codes(self.row_variants, self.index, values)
+            elif column in self.codes:
+                _extend_codes(self.codes[column], self.pools[column], values)
+            elif column in _POOLED_SUBMISSION_COLUMNS:
+                self.text[column].extend(map(self.text_pool.setdefault, values, values))
             else:
-                cols = line.split("\t")
-                varid = cols[hcols["VariationID"]]
-                if varid not in var_records:
-                    var_records[varid] = []
-                rec = {k: cols[hcols[k]] for k in hcols}
-                var_records[varid].append(rec)
-    return var_records
+                self.text[column].extend(values)
+
+    def part(self):
+        """This builder's rows in a form that pickles compactly, for merge() into another
+        builder: every column that has few distinct values travels as those values plus
+        one small-int code per row."""
+        pooled = {}
+        for column in self.text:
+            if column in _POOLED_SUBMISSION_COLUMNS:
+                codes, pool = array("I"), {}
+                _extend_codes(codes, pool, self.text[column])
+                pooled[column] = (list(pool), codes)
+        return {
+            "variants": (list(self.index), self.row_variants),
+            "codes": {c: (list(self.pools[c]), codes) for c, codes in self.codes.items()},
+            "pooled": pooled,
+            "text": {c: values for c, values in self.text.items() if c not in pooled},
+        }
+
+    def merge(self, part):
+        """Append the rows of another builder's part(), after the rows already held.
+
+        Its codes are translated into this builder's pools through a table built from its
+        (few) distinct values, so no per-row string is hashed again.
+        """
+
+        def translate(codes, pool, part_values, part_codes):
+            table = array("I")
+            _extend_codes(table, pool, part_values)
+            codes.extend(map(table.__getitem__, part_codes))
+
+        translate(self.row_variants, self.index, *part["variants"])
+        for column, (part_values, part_codes) in part["codes"].items():
+            translate(self.codes[column], self.pools[column], part_values, part_codes)
+        for column, (part_values, part_codes) in part["pooled"].items():
+            part_values = list(map(self.text_pool.setdefault, part_values, part_values))
+            self.text[column].extend(map(part_values.__getitem__, part_codes))
+        for column, values in part["text"].items():
+            self.text[column].extend(values)
+
+    def build(self):
+        n_variants = len(self.index)
+        row_variants = self.row_variants
+        counts = Counter(row_variants)
+        offsets = array("I", accumulate((counts[k] for k in range(n_variants)), initial=0))
+
+        # submission_summary.txt is sorted by VariationID, so the rows of a variant are
+        # normally already contiguous and in first-seen order. If they are not, a stable
+        # counting sort groups them without disturbing each variant's record order, which
+        # is what record-order tie-breaking downstream depends on.
+        order = None
+        if sum(1 for _ in groupby(row_variants)) != n_variants:
+            order = array("I", [0]) * len(row_variants)
+            fill = array("I", offsets[:-1])
+            for row, k in enumerate(row_variants):
+                order[fill[k]] = row
+                fill[k] += 1
+
+        codes, values, text = {}, {}, {}
+        for column, column_codes in self.codes.items():
+            if order is not None:
+                column_codes = array(column_codes.typecode, (column_codes[i] for i in order))
+            codes[column] = _compact_codes(column_codes, len(self.pools[column]))
+            values[column] = list(self.pools[column])
+        for column, column_text in self.text.items():
+            text[column] = [column_text[i] for i in order] if order is not None else column_text
+
+        return SubmissionStore(self.columns, codes, values, text, self.index, offsets)
+
+
+def _read_submission_header(infile):
+    """Consume the "#"-prefixed preamble of a binary submission_summary stream. Returns
+    (header, first data line or b"") -- the preamble's last line is the column header."""
+    header = None
+    for line in infile:
+        if line[:1] != b"#":
+            break
+        header = line.decode("utf-8").rstrip("\r\n").split("\t")
+        header[0] = header[0][1:]
+    else:
+        line = b""
+    if header is None:
+        raise ValueError("submission_summary.txt has no '#' header line")
+    return header, line
+
+
+def _submission_chunks(infile, first):
+    """Blocks of about _SUBMISSION_BATCH_BYTES of whole lines, the first starting with
+    `first`."""
+    block = first + infile.read(_SUBMISSION_BATCH_BYTES)
+    while block:
+        if not block.endswith(b"\n"):
+            block += infile.readline()
+        yield block
+        block = infile.read(_SUBMISSION_BATCH_BYTES)
+
+
+def _parse_submission_chunk(header, columns, keep_clinsig, block):
+    """Worker side of make_variant_record_map(jobs > 1): one block parsed into a part()."""
+    builder = _SubmissionStoreBuilder(header, columns, keep_clinsig)
+    builder.add_text(block.decode("utf-8"))
+    return builder.part()
+
+
+def make_variant_record_map(submission_path, columns=None, pathogenic_only=False, jobs=1):
+    """Submission records from submission_summary.txt.gz, grouped by VariationID.
+
+    Returns a SubmissionStore -- a read-only mapping of VariationID -> sequence of
+    records, each record indexable by column name.
+
+    `columns` projects the records down to those columns (the transform passes
+    SUBMISSION_COLUMNS); the rest are discarded as each batch is parsed rather than held
+    for the life of the run. None keeps every column in the file.
+
+    `pathogenic_only` keeps only records whose ClinicalSignificance is in predicate_map.
+    Every consumer in the transform skips any other record on sight, and the P/LP records
+    with CollectionMethod "literature only" that literature_only_variants() looks for are
+    kept by the same test, so the emitted graph is unchanged while the Benign/VUS bulk of
+    the file is never stored. A variant with no P/LP record is then absent altogether,
+    which process_row() already treats the same as a variant with no qualifying record.
+    The report profiles the whole file and must not use it.
+
+    `jobs` > 1 parses in that many worker processes. The file is still decompressed once,
+    here -- a gzip stream cannot be entered mid-way -- and cut into blocks of whole lines
+    that workers split, filter and intern; their results are merged back strictly in file
+    order, so the store is identical to a single-process load, record order included.
+    Decompression is about a tenth of the load, the rest is what the workers take over.
+    """
+    keep_clinsig = frozenset(predicate_map) if pathogenic_only else None
+    with gzip.open(submission_path, "rb") as infile:
+        header, first = _read_submission_header(infile)
+        builder = _SubmissionStoreBuilder(header, columns, keep_clinsig)
+        chunks = _submission_chunks(infile, first)
+        if jobs <= 1:
+            for block in chunks:
+                builder.add_text(block.decode("utf-8"))
+            return builder.build()
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        # at most two blocks per worker in flight, so the decompressed file is never
+        # held in memory all at once
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for block in chunks:
+                pending.append(pool.submit(_parse_submission_chunk, header, columns, keep_clinsig, block))
+                if len(pending) >= 2 * jobs:
+                    builder.merge(pending.popleft().result())
+            while pending:
+                builder.merge(pending.popleft().result())
+    return builder.build()
+
+
+class MondoTargets(Mapping):
+    """The MONDO ids one source CURIE maps to, read-only, in mapping-file order. Indexes
+    like the {mondo_id: ""} dict make_mondo_map() used to build per source."""
+
+    __slots__ = ("_terms", "_ids")
+
+    def __init__(self, terms, ids):
+        self._terms = terms
+        self._ids = ids
+
+    def __getitem__(self, mondo_id):
+        if mondo_id not in self:
+            raise KeyError(mondo_id)
+        return ""
+
+    def __contains__(self, mondo_id):
+        return any(self._terms[i] == mondo_id for i in self._ids)
+
+    def __iter__(self):
+        return map(self._terms.__getitem__, self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __repr__(self):
+        return "MondoTargets({!r})".format(list(self))
+
+
+class MondoMap(Mapping):
+    """Source CURIE (MedGen, OMIM, Orphanet, mesh, MONDO) -> the MONDO ids it maps to.
+
+    make_mondo_map() and make_medgen_to_mondo_map() used to build a dict of dicts holding a
+    fresh str per cell, plus two self-mapping entries ("MONDO:x" and "MONDO:MONDO:x") for
+    every MONDO id the SSSOM file names. Here every CURIE is one str in a single term
+    table, each mapping is a row of CSR-style offsets into one array of target term ids,
+    and the self-mappings are not stored at all: a MONDO id flagged in `_self_mapped`
+    answers for both its keys. Looking a source up returns a MondoTargets view, so
+    resolve_phenotype_ids() and map_CLNDISDB_to_mondo() read it exactly as the old dict.
+    It pickles as the term table and four arrays.
+
+    Precedence is the old dict's: a self-mapping replaces a mapping file row for the same
+    key, and update() replaces both, as dict.update() would.
+    """
+
+    __slots__ = ("_terms", "_term_ids", "_sources", "_offsets", "_targets", "_self_mapped", "_index")
+
+    def __init__(self, mapping=(), self_mapped=()):
+        self._terms = []
+        self._term_ids = {}
+        self._sources = array("I")
+        self._offsets = array("I", [0])
+        self._targets = array("I")
+        self._self_mapped = bytearray()
+        self._index = {}
+        for mondo_id in self_mapped:
+            term = self._intern(mondo_id)
+            self._self_mapped[term] = 1
+        items = mapping.items() if isinstance(mapping, Mapping) else mapping
+        for source, targets in items:
+            if self._self_target(source) is None:
+                self._add(source, targets)
+
+    def _intern(self, curie):
+        term = self._term_ids.get(curie)
+        if term is None:
+            term = self._term_ids[curie] = len(self._terms)
+            self._terms.append(curie)
+            self._self_mapped.append(0)
+        return term
+
+    def _add(self, source, targets):
+        self._targets.extend(map(self._intern, dict.fromkeys(targets)))
+        term = self._intern(source)
+        self._index[self._terms[term]] = len(self._sources)
+        self._sources.append(term)
+        self._offsets.append(len(self._targets))
+
+    def _self_target(self, key):
+        """The term id of the MONDO id a self-mapping key stands for, else None."""
+        if key.startswith("MONDO:MONDO:"):
+            key = key[6:]
+        elif not key.startswith("MONDO:"):
+            return None
+        term = self._term_ids.get(key)
+        return term if term is not None and self._self_mapped[term] else None
+
+    def update(self, other):
+        """Add (or replace) every mapping of `other`, a MondoMap or {source: targets} dict."""
+        for source, targets in other.items():
+            self._add(source, targets)
+
+    def __getitem__(self, key):
+        row = self._index.get(key)
+        if row is not None:
+            return MondoTargets(self._terms, self._targets[self._offsets[row] : self._offsets[row + 1]])
+        term = self._self_target(key)
+        if term is None:
+            raise KeyError(key)
+        return MondoTargets(self._terms, (term,))
+
+    def __contains__(self, key):
+        return key in self._index or self._self_target(key) is not None
+
+    def __iter__(self):
+        yield from self._index
+        for term, flagged in enumerate(self._self_mapped):
+            if flagged:
+                mondo_id = self._terms[term]
+                for key in (mondo_id, "MONDO:" + mondo_id):
+                    if key not in self._index:
+                        yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __getstate__(self):
+        # the two dicts are rebuilt from the term table and the rows on load
+        return {name: getattr(self, name) for name in ("_terms", "_sources", "_offsets", "_targets", "_self_mapped")}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._term_ids = {curie: term for term, curie in enumerate(self._terms)}
+        # a later row for the same source replaced an earlier one (update())
+        self._index = {self._terms[term]: row for row, term in enumerate(self._sources)}
 
 
 def make_mondo_map(sssom_path):
@@ -157,15 +764,10 @@ def make_mondo_map(sssom_path):
                     dups += 1
                 map_to_mondo[obj_id][subj_id] = ""
 
-    # Add mondo_id mapping to self
-    mondo_set = {k.split(":")[-1]: "" for kv in map_to_mondo for k in map_to_mondo[kv]}
-    for k in mondo_set:
-        v = "MONDO:{}".format(k)
-        kv = "MONDO:MONDO:{}".format(k)
-        map_to_mondo[v] = {v: ""}
-        map_to_mondo[kv] = {v: ""}
-
-    return map_to_mondo
+    # Add mondo_id mapping to self ("MONDO:x" and "MONDO:MONDO:x" -> "MONDO:x"); MondoMap
+    # answers for those keys without storing them
+    mondo_set = {"MONDO:{}".format(k.split(":")[-1]): "" for kv in map_to_mondo for k in map_to_mondo[kv]}
+    return MondoMap(map_to_mondo, self_mapped=mondo_set)
 
 
 def make_medgen_to_mondo_map(medgen_path):
@@ -183,7 +785,7 @@ def make_medgen_to_mondo_map(medgen_path):
                     if mdg_id not in map_to_mondo:
                         map_to_mondo[mdg_id] = {}
                     map_to_mondo[mdg_id][dis_id] = ""
-    return map_to_mondo
+    return MondoMap(map_to_mondo)
 
 
 # variant_summary.txt.gz carries one row per variant per genome build, so a variant
@@ -194,6 +796,129 @@ def make_medgen_to_mondo_map(medgen_path):
 ASSEMBLY_PREFERENCE = ("GRCh38", "GRCh37")
 
 
+def variant_summary_rows(path, columns, assembly_preference=ASSEMBLY_PREFERENCE, where=None, engine=None):
+    """Yield the named columns of variant_summary.txt.gz as tuples, one row per
+    VariationID: the first row of its most-preferred build in assembly_preference, in
+    file order. A variant with no row on any of those builds is left out. With
+    assembly_preference=None every row is yielded as it is.
+
+    `where` ({column: collection of values}) keeps only the selected rows whose value in
+    each named column is among the given ones -- it filters each variant's chosen row,
+    never which row is chosen.
+
+    engine "pyarrow" reads just the columns needed with pyarrow.csv, picks each variant's
+    row with a group-by over (build rank, row number), filters it with `where`, and
+    converts only the surviving rows, a record batch at a time. "python" streams the file
+    instead: one read picks each variant's row by VariationID and Assembly alone, a
+    second yields those rows. Neither holds the file's rows as Python objects. The
+    default is pyarrow when it is installed; both yield the same rows.
+    """
+    if engine is None:
+        try:
+            import pyarrow.csv  # noqa: F401
+
+            engine = "pyarrow"
+        except ImportError:
+            engine = "python"
+    if engine not in ("pyarrow", "python"):
+        raise ValueError("engine must be 'pyarrow' or 'python', not {!r}".format(engine))
+    columns = list(columns)
+    where = {c: frozenset(values) for c, values in (where or {}).items()}
+    keys = ["VariationID", "Assembly"] if assembly_preference is not None else []
+    read = list(dict.fromkeys(columns + keys + list(where)))
+    rows = _variant_summary_arrow if engine == "pyarrow" else _variant_summary_python
+    return rows(path, columns, read, assembly_preference, where)
+
+
+def _variant_summary_lines(path):
+    """(header, data lines) of variant_summary.txt.gz, the header's "#" removed."""
+    with gzip.open(path, "rt") as infile:
+        header = infile.readline().rstrip("\r\n").lstrip("#").split("\t")
+        for line in infile:
+            line = line.rstrip("\r\n")
+            if line:
+                yield header, line
+
+
+def _variant_summary_python(path, columns, read, assembly_preference, where):
+    selected = None
+    if assembly_preference is not None:
+        # First read: the row number of each variant's chosen row, from the two key
+        # columns alone. Only a rank and row number per VariationID is held, then one
+        # flag per row.
+        rank_of = {name: i for i, name in enumerate(assembly_preference)}
+        best = {}
+        n_rows = 0
+        for header, line in _variant_summary_lines(path):
+            if not n_rows:
+                varid_at, assembly_at = header.index("VariationID"), header.index("Assembly")
+                split_at = max(varid_at, assembly_at) + 1
+            cols = line.split("\t", split_at)
+            rank = rank_of.get(cols[assembly_at])
+            if rank is not None:
+                seen = best.get(cols[varid_at])
+                if seen is None or rank < seen[0]:
+                    best[cols[varid_at]] = (rank, n_rows)
+            n_rows += 1
+        selected = bytearray(n_rows)
+        for _rank, row in best.values():
+            selected[row] = 1
+        del best
+
+    positions = None
+    for row, (header, line) in enumerate(_variant_summary_lines(path)):
+        if positions is None:
+            positions = [header.index(c) for c in columns]
+            tests = [(header.index(c), values) for c, values in where.items()]
+            # split no further than the last column read -- ~40 columns per row, the
+            # rest never looked at
+            split_at = max(header.index(c) for c in read) + 1
+        if selected is not None and not selected[row]:
+            continue
+        cols = line.split("\t", split_at)
+        if all(cols[i] in values for i, values in tests):
+            yield tuple(cols[i] for i in positions)
+
+
+def _variant_summary_arrow(path, columns, read, assembly_preference, where):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pcsv
+
+    with gzip.open(path, "rt") as infile:
+        header = infile.readline().rstrip("\r\n").lstrip("#").split("\t")
+    table = pcsv.read_csv(
+        path,
+        # the "#"-prefixed header line is skipped and named here instead
+        read_options=pcsv.ReadOptions(column_names=header, skip_rows=1),
+        parse_options=pcsv.ParseOptions(delimiter="\t", quote_char=False),
+        convert_options=pcsv.ConvertOptions(include_columns=read, column_types={c: pa.string() for c in read}),
+    )
+    n = len(table)
+    rows = None
+    if assembly_preference is not None and n:
+        rank = pc.index_in(table["Assembly"], value_set=pa.array(list(assembly_preference), pa.string()))
+        # one int64 per row ordering it by build rank, then by row number; null off-build
+        key = pc.add(pc.multiply(pc.cast(rank, pa.int64()), n), pa.array(range(n), pa.int64()))
+        keys = pa.table({"VariationID": table["VariationID"], "key": key}).filter(pc.is_valid(key))
+        first = keys.group_by("VariationID").aggregate([("key", "min")])["key_min"]
+        rows = pc.subtract(first, pc.multiply(pc.divide(first, n), n))
+        rows = pc.take(rows, pc.array_sort_indices(rows))
+    if where:
+        keep = None
+        for column, values in where.items():
+            match = pc.is_in(table[column], value_set=pa.array(sorted(values), pa.string()))
+            keep = match if keep is None else pc.and_(keep, match)
+        keep = pc.fill_null(keep, False)
+        rows = pc.indices_nonzero(keep) if rows is None else pc.filter(rows, pc.take(keep, rows))
+    # only the surviving rows of the named columns are ever converted to Python strings
+    table = table.select(columns)
+    if rows is not None:
+        table = table.take(rows)
+    for batch in table.to_batches():
+        yield from zip(*(column.to_pylist() for column in batch.columns))
+
+
 def make_variant_gene_map(variant_summary_path, assembly_preference=ASSEMBLY_PREFERENCE):
     """ClinVar's own per-variant gene attribution, from variant_summary.txt.gz.
 
@@ -225,51 +950,31 @@ def make_variant_gene_map(variant_summary_path, assembly_preference=ASSEMBLY_PRE
     with no HGNC_ID is treated exactly like GeneID == -1: no gene edge, disease edges
     unaffected. variant_summary.txt.gz carries HGNC_ID alongside GeneID, so this costs
     no extra input.
+
+    The file is read, and each variant's build chosen, by variant_summary_rows().
     """
+    rows = variant_summary_rows(
+        variant_summary_path, ("VariationID", "GeneID", "HGNC_ID", "GeneSymbol"), assembly_preference
+    )
     gene_map = {}
-    best_rank = {}
     symbol_pool = {}
-    rank_of = {name: i for i, name in enumerate(assembly_preference)}
-    hcols = None
-    with gzip.open(variant_summary_path, "rt") as infile:
-        for line in infile:
-            line = line.strip("\r").strip("\n")
-            if not line:
-                continue
-            if line[0] == "#":
-                header = line.split("\t")
-                header[0] = header[0][1:]
-                hcols = {k: i for i, k in enumerate(header)}
-                continue
-            cols = line.split("\t")
-            rank = rank_of.get(cols[hcols["Assembly"]])
-            if rank is None:
-                continue
-            varid = cols[hcols["VariationID"]]
-            seen = best_rank.get(varid)
-            if seen is not None and seen <= rank:
-                continue
-            best_rank[varid] = rank
-            gene_id = cols[hcols["GeneID"]]
-            hgnc_id = cols[hcols["HGNC_ID"]].strip()
-            # Both must be present. GeneID == -1 is ClinVar declining to attribute the
-            # variant at all; a blank or "-" HGNC_ID means the gene it attributes has no
-            # HGNC record (mostly LOC placeholders and non-coding loci), and an id the KG
-            # cannot resolve is worse than no edge -- it dangles silently.
-            if gene_id == "-1" or not gene_id or not hgnc_id or hgnc_id == "-":
-                # the preferred build declines to attribute a gene -- drop any attribution
-                # picked up from a lower-preference build rather than letting it stand
-                gene_map.pop(varid, None)
-                continue
-            symbol = cols[hcols["GeneSymbol"]]
-            # gene symbols repeat across millions of rows -- intern them so the map
-            # holds one string per gene rather than one per variant
-            symbol = symbol_pool.setdefault(symbol, symbol)
-            # HGNC ids repeat as often as symbols do (one per gene across millions of
-            # rows), so intern them through the same pool rather than holding ~4.5M
-            # separate equal strings.
-            hgnc_id = symbol_pool.setdefault(hgnc_id, hgnc_id)
-            gene_map[varid] = (hgnc_id, symbol)
+    for varid, gene_id, hgnc_id, symbol in rows:
+        hgnc_id = hgnc_id.strip()
+        # Both must be present. GeneID == -1 is ClinVar declining to attribute the
+        # variant at all; a blank or "-" HGNC_ID means the gene it attributes has no
+        # HGNC record (mostly LOC placeholders and non-coding loci), and an id the KG
+        # cannot resolve is worse than no edge -- it dangles silently. This is the
+        # preferred build's row, so a lower-preference build never overrides it.
+        if gene_id == "-1" or not gene_id or not hgnc_id or hgnc_id == "-":
+            continue
+        # gene symbols repeat across millions of rows -- intern them so the map
+        # holds one string per gene rather than one per variant
+        symbol = symbol_pool.setdefault(symbol, symbol)
+        # HGNC ids repeat as often as symbols do (one per gene across millions of
+        # rows), so intern them through the same pool rather than holding ~4.5M
+        # separate equal strings.
+        hgnc_id = symbol_pool.setdefault(hgnc_id, hgnc_id)
+        gene_map[varid] = (hgnc_id, symbol)
     return gene_map
 
 
@@ -302,6 +1007,50 @@ def format_id_to_map(info):
     return idname
 
 
+def resolve_phenotype_ids(reported, submitted, map_to_mondo):
+    """The MONDO ids one submission record names, and whether they came from its
+    ReportedPhenotypeInfo.
+
+    ReportedPhenotypeInfo's MedGen CUIs are mapped first. Only when none of them maps does
+    SubmittedPhenotypeInfo get a turn, its ids formatted by format_id_to_map() and taken
+    as-is when already MONDO. Returns (mondo_ids, from_reported) with mondo_ids in
+    first-seen order and free of repeats; ((), False) when neither column maps.
+    """
+    mondo_ids = {}
+    for mg_mapping in reported.split(";"):
+        mg_map = "MedGen:{}".format(mg_mapping.split(":")[0])
+        if mg_map in map_to_mondo:
+            mondo_ids.update(dict.fromkeys(map_to_mondo[mg_map].keys()))
+    if mondo_ids:
+        return tuple(mondo_ids), True
+
+    for dis_id in submitted.split(";"):
+        dis_id = format_id_to_map(dis_id)
+        if dis_id in map_to_mondo:
+            mondo_ids.update(dict.fromkeys(map_to_mondo[dis_id].keys()))
+        elif dis_id is not None and "MONDO:" in dis_id:
+            mondo_ids[dis_id] = None
+    return tuple(mondo_ids), False
+
+
+def record_diseases(rec, map_to_mondo):
+    """resolve_phenotype_ids() for one submission record -- read from the SubmissionStore
+    when it has already been resolved against this map (see
+    SubmissionStore.resolve_diseases), computed on the spot otherwise."""
+    if isinstance(rec, SubmissionRecord):
+        resolved = rec.diseases(map_to_mondo)
+        if resolved is not None:
+            return resolved
+    return resolve_phenotype_ids(rec["ReportedPhenotypeInfo"], rec["SubmittedPhenotypeInfo"], map_to_mondo)
+
+
+def record_stars(rec):
+    """review_star_map score of one submission record's own ReviewStatus."""
+    if isinstance(rec, SubmissionRecord):
+        return rec.stars()
+    return review_star_map[rec["ReviewStatus"].replace(" ", "_")]
+
+
 def concordant_disease_pairs(record_list, map_to_mondo, min_submitters):
     """(mondo_id, ClinicalSignificance) pairs supported by >=min_submitters
     distinct Submitters across record_list. Used by variant_records_to_disease()
@@ -319,23 +1068,10 @@ def concordant_disease_pairs(record_list, map_to_mondo, min_submitters):
         clinsig = rec["ClinicalSignificance"]
         if clinsig not in predicate_map:
             continue
-        if review_star_map[rec["ReviewStatus"].replace(" ", "_")] < min_review_stars:
+        if record_stars(rec) < min_review_stars:
             continue
 
-        mondo_ids = set()
-        for mg_mapping in rec["ReportedPhenotypeInfo"].split(";"):
-            mg_map = "MedGen:{}".format(mg_mapping.split(":")[0])
-            if mg_map in map_to_mondo:
-                mondo_ids.update(map_to_mondo[mg_map].keys())
-
-        if not mondo_ids:
-            for dis_id in rec["SubmittedPhenotypeInfo"].split(";"):
-                dis_id = format_id_to_map(dis_id)
-                if dis_id in map_to_mondo:
-                    mondo_ids.update(map_to_mondo[dis_id].keys())
-                elif dis_id is not None and "MONDO:" in dis_id:
-                    mondo_ids.add(dis_id)
-
+        mondo_ids, _from_reported = record_diseases(rec, map_to_mondo)
         for mondo_id in mondo_ids:
             groups.setdefault((mondo_id, clinsig), set()).add(rec["Submitter"])
 
@@ -355,7 +1091,7 @@ def variant_records_to_disease(record_list, map_to_mondo, star_min=3, rescue_min
     preds = {}
     org_preds = {}
     for rec in record_list:
-        stars = int(review_star_map[rec["ReviewStatus"].replace(" ", "_")])
+        stars = record_stars(rec)
         clinsig = rec["ClinicalSignificance"]
 
         if clinsig not in predicate_map:
@@ -364,51 +1100,20 @@ def variant_records_to_disease(record_list, map_to_mondo, star_min=3, rescue_min
         mapped_predicate = predicate_map[clinsig]
         org_predicate = clinsig
 
-        mapped_terms = 0
-        for mg_mapping in rec["ReportedPhenotypeInfo"].split(";"):
-            mg_map = "MedGen:{}".format(mg_mapping.split(":")[0])
-            mondo_ids = []
-
-            if mg_map in map_to_mondo:
-                mondo_ids = list(map_to_mondo[mg_map].keys())
-
-            if len(mondo_ids) == 0:
+        # The aggregate path only ever applied to diseases reached through
+        # ReportedPhenotypeInfo; a SubmittedPhenotypeInfo fallback still needs the record's
+        # own stars or concordance.
+        mondo_ids, from_reported = record_diseases(rec, map_to_mondo)
+        accepted = stars >= star_min or (accept_on_aggregate and from_reported)
+        for d in mondo_ids:
+            if not accepted and (d, clinsig) not in concordant_pairs:
                 continue
-
-            for d in mondo_ids:
-                mapped_terms += 1
-                if not accept_on_aggregate and stars < star_min and (d, clinsig) not in concordant_pairs:
-                    continue
-                dis[d] = ""
-                if d not in preds:
-                    preds[d] = {}
-                    org_preds[d] = {}
-                preds[d][mapped_predicate] = ""
-                org_preds[d][org_predicate] = ""
-
-        if mapped_terms == 0:
-            for dis_id in rec["SubmittedPhenotypeInfo"].split(";"):
-                dis_id = format_id_to_map(dis_id)
-                mondo_ids = []
-
-                if dis_id in map_to_mondo:
-                    mondo_ids = list(map_to_mondo[dis_id].keys())
-                elif dis_id is not None and "MONDO:" in dis_id:
-                    mondo_ids = [dis_id]
-
-                if len(mondo_ids) == 0:
-                    continue
-
-                for d in mondo_ids:
-                    mapped_terms += 1
-                    if stars < star_min and (d, clinsig) not in concordant_pairs:
-                        continue
-                    dis[d] = ""
-                    if d not in preds:
-                        preds[d] = {}
-                        org_preds[d] = {}
-                    preds[d][mapped_predicate] = ""
-                    org_preds[d][org_predicate] = ""
+            dis[d] = ""
+            if d not in preds:
+                preds[d] = {}
+                org_preds[d] = {}
+            preds[d][mapped_predicate] = ""
+            org_preds[d][org_predicate] = ""
 
     return dis, preds, org_preds
 
@@ -465,12 +1170,57 @@ def map_mondo_to_hp(group_info, disease_ids):
     return mondo_to_hp
 
 
+_EDGE_ID_NAMESPACE_BYTES = EDGE_ID_NAMESPACE.bytes
+_UUID_VARIANT = {c: "89ab"[int(c, 16) & 0x3] for c in "0123456789abcdef"}
+
+
+def set_entity_mode(mode):
+    """Select what process_row() builds its entities as; one of ENTITY_MODES."""
+    global entity_mode
+    if mode not in ENTITY_MODES:
+        raise ValueError("entity_mode must be one of {}, not {!r}".format(", ".join(ENTITY_MODES), mode))
+    entity_mode = mode
+
+
+def set_edge_id_scheme(scheme):
+    """Select how edge_id() mints ids for the rest of the run; one of EDGE_ID_SCHEMES."""
+    global edge_id_scheme
+    if scheme not in EDGE_ID_SCHEMES:
+        raise ValueError(
+            "edge_id_scheme must be one of {}, not {!r}".format(", ".join(EDGE_ID_SCHEMES), scheme)
+        )
+    edge_id_scheme = scheme
+
+
+def configure_from(settings):
+    """Apply the run settings found in `settings` -- transform.yaml's `transform:` section
+    -- leaving anything it does not set at its current value."""
+    if settings.get("edge_id_scheme") is not None:
+        set_edge_id_scheme(settings["edge_id_scheme"])
+    if settings.get("entity_mode") is not None:
+        set_entity_mode(settings["entity_mode"])
+
+
+def edge_id(subject, predicate, object_, source="infores:clinvar"):
+    """The id of the edge subject -predicate-> object asserted by `source`.
+
+    Under the default "uuid5" scheme this is uuid.uuid5(EDGE_ID_NAMESPACE, name) with name
+    the four parts joined by tabs, computed here with one sha1 call and string slicing
+    rather than through uuid.UUID objects, at well under the cost of uuid4()'s urandom.
+    """
+    if edge_id_scheme == "uuid4":
+        return str(uuid.uuid4())
+    h = hashlib.sha1(_EDGE_ID_NAMESPACE_BYTES + f"{subject}\t{predicate}\t{object_}\t{source}".encode()).hexdigest()
+    # RFC 4122: version nibble 5, variant bits 10
+    return f"{h[:8]}-{h[8:12]}-5{h[13:16]}-{_UUID_VARIANT[h[16]]}{h[17:20]}-{h[20:32]}"
+
+
 def _disease_edge(subject, dis_id, predicate, og_preds, row):
     """One VariantToDiseaseAssociation. Exactly one predicate is emitted per
     (variant, disease): the strong tier claims a disease first, and the publication
     tier only sees what is left, so the two can never contradict each other."""
-    return VariantToDiseaseAssociation(
-        id=str(uuid.uuid4()),
+    return _ENTITY_CLASSES[entity_mode][2](
+        id=edge_id(subject, predicate, dis_id),
         subject=subject,
         predicate=predicate,
         qualifiers=[row["CLNREVSTAT"]],
@@ -479,8 +1229,8 @@ def _disease_edge(subject, dis_id, predicate, og_preds, row):
         original_predicate=":".join(og_preds),
         primary_knowledge_source="infores:clinvar",
         aggregator_knowledge_source=["infores:monarchinitiative"],
-        knowledge_level=KnowledgeLevelEnum.knowledge_assertion,
-        agent_type=AgentTypeEnum.manual_agent,
+        knowledge_level=KnowledgeLevelEnum.knowledge_assertion.value,
+        agent_type=AgentTypeEnum.manual_agent.value,
     )
 
 
@@ -541,30 +1291,73 @@ def qualifying_diseases(row, records, map_to_mondo, lit_only_variants):
     return causes, causes_org, assoc, assoc_org
 
 
-def build_pair_variant_counts(clinvar_tsv, var_records, map_to_mondo, variant_genes, lit_only_variants):
-    """(gene, disease) -> how many distinct variants qualify for it.
+def pack_qualification(causes, causes_org, assoc, assoc_org, pool=None):
+    """qualifying_diseases()'s result in the compact form process_row() consumes.
 
-    A pre-pass over the same rows the transform will stream, applying the same tier logic,
-    so process_row() can drop pairs supported by fewer than min_variants_per_pair variants.
-    Inclusion is otherwise a per-variant decision and a pair can enter the graph on one
-    variant alone.
+    Returns (causes, assoc), each a tuple of (mondo_id, original_predicates) in the order
+    the tier logic produced them, original_predicates being the sorted ClinicalSignificance
+    values behind the disease. Equal predicate tuples are shared through `pool` when given
+    -- there are only a handful of distinct ones across the whole file.
     """
+    if pool is None:
+        pool = {}
+
+    def pack(ids, org):
+        packed = []
+        for d in ids:
+            og_preds = tuple(sorted(org[d]))
+            packed.append((d, pool.setdefault(og_preds, og_preds)))
+        return tuple(packed)
+
+    return pack(causes, causes_org), pack(assoc, assoc_org)
+
+
+def clinvar_rows(clinvar_source):
+    """The rows of clinvar.tsv as dicts, or -- for a .vcf/.vcf.gz path -- the rows
+    clinvar_vcf.read_vcf_rows() builds straight from the VCF."""
+    from clinvar_vcf import is_vcf, read_vcf_rows
+
+    if is_vcf(clinvar_source):
+        yield from read_vcf_rows(clinvar_source)
+        return
     import csv as _csv
 
+    with open(clinvar_source, newline="") as fh:
+        yield from _csv.DictReader(fh, delimiter="\t")
+
+
+def build_pair_variant_counts(clinvar_tsv, var_records, map_to_mondo, variant_genes, lit_only_variants, qualified=None):
+    """(gene, disease) -> how many distinct variants qualify for it.
+
+    A pre-pass over the same rows the transform will stream (clinvar_rows() of clinvar_tsv,
+    which may also be the VCF), applying the same tier logic, so process_row() can drop
+    pairs supported by fewer than min_variants_per_pair variants. Inclusion is otherwise
+    a per-variant decision and a pair can enter the graph on one variant alone.
+
+    If a dict is passed as `qualified`, it is filled with every variant's tier result
+    (pack_qualification()), keyed by VariationID -- gene-less variants included, since
+    they still get disease edges. Variants that qualify for nothing are left out. Handing
+    the same dict to process_row() means the tier logic runs once per variant per build
+    instead of once here and again on the emit pass.
+    """
     counts = {}
-    with open(clinvar_tsv, newline="") as fh:
-        for row in _csv.DictReader(fh, delimiter="\t"):
-            varid = row["ID"]
-            records = var_records.get(varid)
-            if records is None or row["CLNVC"] not in KEPT_VARIANT_CLASSES:
-                continue
-            gene_entry = variant_genes.get(varid)
-            if gene_entry is None:
-                continue
-            causes, _co, assoc, _ao = qualifying_diseases(row, records, map_to_mondo, lit_only_variants)
-            for d in list(causes) + list(assoc):
-                key = (gene_entry[0], d)
-                counts[key] = counts.get(key, 0) + 1
+    pool = {}
+    for row in clinvar_rows(clinvar_tsv):
+        varid = row["ID"]
+        records = var_records.get(varid)
+        if records is None or row["CLNVC"] not in KEPT_VARIANT_CLASSES:
+            continue
+        gene_entry = variant_genes.get(varid)
+        if gene_entry is None and qualified is None:
+            continue
+        causes, co, assoc, ao = qualifying_diseases(row, records, map_to_mondo, lit_only_variants)
+        if qualified is not None and (causes or assoc):
+            qualified[varid] = pack_qualification(causes, co, assoc, ao, pool)
+        if gene_entry is None:
+            continue
+        for d in list(causes) + list(assoc):
+            key = (gene_entry[0], d)
+            counts[key] = counts.get(key, 0) + 1
     return counts
 
 
@@ -575,11 +1368,16 @@ def process_row(
     variant_genes,
     lit_only_variants=frozenset(),
     pair_variant_counts=None,
+    qualified=None,
 ):
     """Process a single row from the ClinVar VCF and return a list of biolink entities.
 
     Returns an empty list if the row should be skipped (no records, no associations).
 
+    `qualified` is the per-variant tier result filled by build_pair_variant_counts() over
+    this same file. When given, it replaces the call to qualifying_diseases(), and a
+    variant absent from it qualifies for nothing.
+
     Gene attribution comes from variant_genes (see make_variant_gene_map), NOT from
     the row's GENEINFO field -- GENEINFO lists every locus overlapping the variant's
     position, which would mint gene-disease associations for antisense transcripts and
@@ -613,23 +1411,25 @@ def process_row(
     gene_entry = variant_genes.get(varid)
     gene_ids = [gene_entry[0]] if gene_entry else []
 
-    records = var_records[varid]
-    disease_ids, org_predicates, assoc_ids, assoc_org = qualifying_diseases(
-        row, records, map_to_mondo, lit_only_variants
-    )
+    if qualified is not None:
+        causes, assoc = qualified.get(varid, ((), ()))
+    else:
+        causes, assoc = pack_qualification(
+            *qualifying_diseases(row, var_records[varid], map_to_mondo, lit_only_variants)
+        )
+    if not causes and not assoc:
+        return []
 
     # A pair supported by fewer than min_variants_per_pair distinct variants is dropped.
     # Without this, a gene-disease pair enters the graph on one variant's evidence.
     if pair_variant_counts is not None and gene_ids:
         gene_id = gene_ids[0]
-        disease_ids = {
-            d: v for d, v in disease_ids.items()
-            if pair_variant_counts.get((gene_id, d), 0) >= min_variants_per_pair
-        }
-        assoc_ids = {
-            d: v for d, v in assoc_ids.items()
-            if pair_variant_counts.get((gene_id, d), 0) >= min_variants_per_pair
-        }
+        causes = tuple(
+            c for c in causes if pair_variant_counts.get((gene_id, c[0]), 0) >= min_variants_per_pair
+        )
+        assoc = tuple(
+            a for a in assoc if pair_variant_counts.get((gene_id, a[0]), 0) >= min_variants_per_pair
+        )
 
     # Corroboration check: at least one disease derived from the submission records must
     # also appear in the VCF's own aggregate CLNDISDB list for this variant. This gate
@@ -640,12 +1440,13 @@ def process_row(
     diss_info, _ = map_CLNDISDB_to_mondo(diss_info, map_to_mondo)
     # Both tiers are subject to the gate -- a publication-tier disease must be echoed in
     # CLNDISDB just as a causes-tier one must, so the union is what gets checked.
-    corroborated = map_mondo_to_hp(diss_info, {**disease_ids, **assoc_ids})
+    corroborated = map_mondo_to_hp(diss_info, {d for d, _ in causes + assoc})
 
     if len(corroborated) == 0:
         return []
 
-    seq_var = SequenceVariant(
+    node_class, gene_edge_class, _ = _ENTITY_CLASSES[entity_mode]
+    seq_var = node_class(
         id="CLINVAR:{}".format(row["ID"]),
         name=row["CLNHGVS"],
         # RS is "." on variants with no dbSNP mapping -- emitting "DBSNP:." would be a junk CURIE
@@ -659,25 +1460,26 @@ def process_row(
 
     for gene_id in gene_ids:
         entities.append(
-            VariantToGeneAssociation(
-                id=str(uuid.uuid4()),
+            gene_edge_class(
+                id=edge_id(seq_var.id, IS_SEQUENCE_VARIANT_OF, gene_id),
                 subject=seq_var.id,
                 predicate=IS_SEQUENCE_VARIANT_OF,
                 object=gene_id,
                 primary_knowledge_source="infores:clinvar",
                 aggregator_knowledge_source=["infores:monarchinitiative"],
-                knowledge_level=KnowledgeLevelEnum.knowledge_assertion,
-                agent_type=AgentTypeEnum.manual_agent,
+                knowledge_level=KnowledgeLevelEnum.knowledge_assertion.value,
+                agent_type=AgentTypeEnum.manual_agent.value,
             )
         )
 
-    for dis_id in disease_ids:
-        og_preds = sorted(list(org_predicates[dis_id].keys()))
+    for dis_id, og_preds in causes:
         entities.append(_disease_edge(seq_var.id, dis_id, CAUSES, og_preds, row))
 
     # <=1 star with published support: a weaker claim, so a weaker predicate
-    for dis_id in assoc_ids:
-        og_preds = sorted(list(assoc_org[dis_id].keys()))
+    for dis_id, og_preds in assoc:
         entities.append(_disease_edge(seq_var.id, dis_id, ASSOCIATED_WITH, og_preds, row))
 
+    if entity_mode == "validated_records":
+        for entity in entities:
+            check_record(entity)
     return entities
@@ -0,0 +1,150 @@
+"""The preprocessed ClinVar table as Parquet or Arrow IPC, and reading it by column.
+
+scripts/vcf_to_tsv.py --fields all writes a 43-column TSV, which every consumer
+re-tokenises in full even when it needs three of its columns. Given an output path
+ending in .parquet or .arrow it writes the same table in a columnar file instead
+(ColumnarWriter), with the low-cardinality columns in DICTIONARY_COLUMNS
+dictionary-encoded.
+
+read_columns() loads just the named columns of such a file -- memory-mapped, so Arrow
+IPC columns are used in place without a copy. table_rows() yields {column: value} dicts
+for the named columns of either a columnar file or clinvar.tsv, so row-at-a-time
+consumers (analysis/clinvar_report.py) take whichever exists.
+
+pyarrow -- the columnar extra, clinvar_ingest[columnar] -- is imported only when a
+columnar file is written or read.
+"""
+
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+
+COLUMNAR_FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+# Columns with a handful of distinct values across millions of rows
+DICTIONARY_COLUMNS = ("CHROM", "CLNREVSTAT", "CLNVC", "CLNSIG")
+
+# Rows per record batch / Parquet row group
+BATCH_ROWS = 1 << 16
+
+
+def columnar_format(path):
+    """The format of a columnar table path, "parquet" or "arrow"; None for anything else (a TSV)."""
+    return COLUMNAR_FORMATS.get(Path(path).suffix)
+
+
+def require_pyarrow():
+    """The pyarrow module; ImportError naming the columnar extra when it is not installed."""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            "Parquet/Arrow tables need the pyarrow package (pip install 'clinvar_ingest[columnar]')"
+        ) from None
+    return pyarrow
+
+
+class ColumnarWriter:
+    """Writes rows of string values -- in `columns` order -- to a Parquet or Arrow IPC
+    file, chosen by the path's suffix."""
+
+    def __init__(self, path, columns, batch_rows=BATCH_ROWS):
+        pa = self._pa = require_pyarrow()
+        self.path = Path(path)
+        self.format = columnar_format(path)
+        if self.format is None:
+            raise ValueError("{} is not a .parquet or .arrow path".format(path))
+        self.columns = list(columns)
+        self.batch_rows = batch_rows
+        # one dictionary per encoded column for the whole file, only ever appended to, so
+        # each batch's dictionary extends the previous one (an IPC file allows deltas but
+        # not replacements)
+        self._codes = {c: {} for c in self.columns if c in DICTIONARY_COLUMNS}
+        self._pending = [[] for _ in self.columns]
+        self.schema = pa.schema(
+            [
+                pa.field(c, pa.dictionary(pa.int32(), pa.string()) if c in self._codes else pa.string())
+                for c in self.columns
+            ]
+        )
+        if self.format == "parquet":
+            import pyarrow.parquet as pq
+
+            self._sink = None
+            self._writer = pq.ParquetWriter(str(self.path), self.schema, compression="zstd")
+        else:
+            self._sink = pa.OSFile(str(self.path), "wb")
+            options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            self._writer = pa.ipc.new_file(self._sink, self.schema, options=options)
+        self.rows = 0
+
+    def write_row(self, values):
+        for pending, value in zip(self._pending, values):
+            pending.append(value)
+        if len(self._pending[0]) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._pending[0]:
+            return
+        pa = self._pa
+        arrays = []
+        for name, values in zip(self.columns, self._pending):
+            codes = self._codes.get(name)
+            if codes is None:
+                arrays.append(pa.array(values, pa.string()))
+                continue
+            indices = [codes.setdefault(v, len(codes)) for v in values]
+            arrays.append(
+                pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(list(codes), pa.string()))
+            )
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self.rows += len(self._pending[0])
+        self._pending = [[] for _ in self.columns]
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_columns(path, columns=None):
+    """The named columns (all when None) of a .parquet or .arrow table as a pyarrow Table,
+    read through a memory map."""
+    pa = require_pyarrow()
+    if columnar_format(path) == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_table(str(path), columns=None if columns is None else list(columns), memory_map=True)
+    # the table's buffers point into the map, which stays open for as long as they live
+    table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    return table if columns is None else table.select(list(columns))
+
+
+def table_rows(path, columns=None):
+    """{column: value} for the named columns (all when None) of every row of a columnar
+    table or of clinvar.tsv, in file order. Values are strings either way."""
+    if columnar_format(path) is None:
+        with open(path, newline="") as fh:
+            rows = csv.DictReader(fh, delimiter="\t")
+            if columns is None:
+                yield from rows
+            else:
+                columns = list(columns)
+                for row in rows:
+                    yield {c: row[c] for c in columns}
+        return
+
+    table = read_columns(path, columns)
+    names = table.column_names
+    for batch in table.to_batches():
+        for values in zip(*(column.to_pylist() for column in batch.columns)):
+            yield dict(zip(names, values))
@@ -0,0 +1,109 @@
+"""Rows for process_row() read straight from clinvar.vcf.gz, without clinvar.tsv.
+
+scripts/vcf_to_tsv.py expands every variant into a row of data/clinvar.tsv, which the
+pre-pass and Koza then parse again. process_row() and build_pair_variant_counts() only
+ever read ROW_FIELDS, which are the columns transform.yaml's reader lists and so the
+columns vcf_to_tsv.py writes by default. read_vcf_rows() yields dicts holding just
+those, formatted exactly as vcf_to_tsv.py writes them and Koza's reader returns them --
+a row from here and the same variant's clinvar.tsv row give the same entities.
+
+transform.yaml selects it with `row_source: "vcf"` under `transform:`.
+
+tabix_contigs() and region_windows() cut an indexed VCF into genomic regions, in file
+order, for work that is split across processes (scripts/vcf_to_tsv.py --jobs).
+"""
+
+from __future__ import annotations
+
+import gzip
+import struct
+
+# The row keys process_row() and the pre-pass read; ID is the VCF's own column
+ROW_FIELDS = ("ID", "CLNDISDB", "CLNHGVS", "CLNREVSTAT", "CLNVC", "CLNVCSO", "RS")
+
+VCF_SUFFIXES = (".vcf", ".vcf.gz", ".bcf")
+
+
+def is_vcf(path) -> bool:
+    return str(path).endswith(VCF_SUFFIXES)
+
+
+def info_value(info, field):
+    """An INFO field, from a variant's INFO, as clinvar.tsv holds it: "." when absent,
+    list values "|"-joined. Take variant.INFO once per variant -- each access builds a
+    new wrapper."""
+    try:
+        value = info.get(field)
+    except KeyError:
+        return "."
+    if value is None:
+        return "."
+    if isinstance(value, tuple):
+        return "|".join(str(v) for v in value)
+    return str(value)
+
+
+def read_vcf_rows(vcf_path, fields=ROW_FIELDS, region=None):
+    """Yield one {field: value} dict per variant in vcf_path, or in `region` ("chr",
+    "chr:start-end") of an indexed one. Values are stripped, as Koza strips clinvar.tsv's."""
+    # imported here, so clinvar.tsv runs never load cyvcf2
+    from cyvcf2 import VCF
+
+    info_fields = [f for f in fields if f != "ID"]
+    with_id = "ID" in fields
+    vcf = VCF(str(vcf_path))
+    try:
+        for variant in vcf(region) if region else vcf:
+            row = {"ID": (variant.ID or ".").strip()} if with_id else {}
+            info = variant.INFO
+            for field in info_fields:
+                row[field] = info_value(info, field).strip()
+            yield row
+    finally:
+        vcf.close()
+
+
+# A tabix linear-index interval spans 2**14 bases
+_TBI_INTERVAL_SHIFT = 14
+
+
+def tabix_contigs(tbi_path):
+    """[(contig, approximate length in bases)] from a tabix (.tbi) index, in the order the
+    contigs appear in the indexed file. The length is rounded up to the index's 16 kb
+    intervals; it only sizes region_windows(), never limits a query."""
+    with gzip.open(tbi_path, "rb") as fh:
+        data = fh.read()
+    if data[:4] != b"TBI\1":
+        raise ValueError("{} is not a tabix index".format(tbi_path))
+    n_ref, _fmt, _col_seq, _col_beg, _col_end, _meta, _skip, l_nm = struct.unpack_from("<8i", data, 4)
+    offset = 36
+    names = data[offset : offset + l_nm].split(b"\0")[:n_ref]
+    offset += l_nm
+    contigs = []
+    for name in names:
+        (n_bin,) = struct.unpack_from("<i", data, offset)
+        offset += 4
+        for _ in range(n_bin):
+            _bin, n_chunk = struct.unpack_from("<Ii", data, offset)
+            offset += 8 + 16 * n_chunk
+        (n_intv,) = struct.unpack_from("<i", data, offset)
+        offset += 4 + 8 * n_intv
+        contigs.append((name.decode(), max(1, n_intv) << _TBI_INTERVAL_SHIFT))
+    return contigs
+
+
+def region_windows(contigs, n_windows):
+    """Cut [(contig, length)] into about n_windows (contig, start, end) windows of similar
+    size -- 1-based and inclusive, covering every position of each contig once, in order.
+    The last window of a contig is open-ended (end None), so nothing past the estimated
+    length is missed."""
+    total = sum(length for _, length in contigs)
+    size = max(1, -(-total // max(1, n_windows)))
+    windows = []
+    for name, length in contigs:
+        start = 1
+        while start + size <= length:
+            windows.append((name, start, start + size - 1))
+            start += size
+        windows.append((name, start, None))
+    return windows
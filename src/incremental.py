@@ -0,0 +1,294 @@
+"""Release-to-release incremental run of the transform.
+
+From one weekly ClinVar release to the next, most variants keep the same clinvar.tsv row
+and the same submission records, yet a full run repeats the tier logic, the pair counts
+and process_row() for every one of them. run_incremental() leaves a snapshot of each
+build beside its output (<name>.snapshot.pickle) holding, for every variant the
+transform can act on -- one with P/LP submission records and a kept variant class:
+
+  - a digest of its row (clinvar_vcf.ROW_FIELDS) and of its submission records,
+  - its gene attribution and its tier result (pack_qualification()),
+  - the node and edge lines it wrote,
+
+and the build's pair_variant_counts. The next run reads the new inputs and
+
+  1. runs qualifying_diseases() only for the variants whose row, records or gene differ
+     from the snapshot; every other variant keeps its stored tier result,
+  2. updates the previous pair_variant_counts by what those variants -- and variants no
+     longer there -- contributed before and contribute now, and finds the (gene,
+     disease) pairs whose count crossed min_variants_per_pair,
+  3. runs process_row() again for the changed variants and for every variant supporting
+     a pair that crossed, and writes the stored lines of all the others,
+
+in clinvar.tsv order, so the output is what a full run over the new inputs writes.
+
+A snapshot applies only while everything else an entity depends on is unchanged: the
+MONDO and MedGen mapping files, transform.yaml's transform and writer settings, and the
+source of the modules that build the lines (clinvar_helpers, kgx_records, kgx_writer and
+this one). Otherwise -- and on the first run -- every variant counts as changed, which
+is a full run that leaves a snapshot for the next one.
+
+Run from the repo root (data/ paths are relative, as for Koza):
+
+    PYTHONPATH=src uv run python -m incremental --output-dir output
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import time
+from importlib.metadata import version
+from pathlib import Path
+
+import clinvar_helpers
+import kgx_records
+import kgx_writer
+from aux_cache import load_transform_maps
+from clinvar_helpers import (
+    KEPT_VARIANT_CLASSES,
+    configure_from,
+    literature_only_variants,
+    pack_qualification,
+    process_row,
+    qualifying_diseases,
+)
+from clinvar_vcf import ROW_FIELDS
+from run import source_rows
+from sharded_transform import check_min_counts
+from transform_config import TRANSFORM_YAML, load_transform_config
+from vcf_manifest import file_sha256, source_sha256
+
+# Bump when the layout of a snapshot changes
+SNAPSHOT_FORMAT = 1
+
+SUBMISSIONS = "submission_summary.txt.gz"
+SSSOM = "mondo.sssom.tsv"
+MEDGEN = "MedGenIDMappings.txt.gz"
+VARIANT_SUMMARY = "variant_summary.txt.gz"
+
+# The snapshot entry of one variant
+_ROW, _RECORDS, _GENE, _QUALIFIED, _NODE_LINES, _EDGE_LINES = range(6)
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def row_digest(row) -> bytes:
+    """Digest of the row fields process_row() and the tier logic read."""
+    return _digest("\t".join(row[f] for f in ROW_FIELDS))
+
+
+def records_digest(records) -> bytes:
+    """Digest of a variant's submission records, every kept column, in file order."""
+    return _digest("\n".join("\t".join(rec[c] for c in rec) for rec in records))
+
+
+def inputs_key(config, sssom_path, medgen_path) -> dict:
+    """What every variant's lines depend on besides its own row, records and gene."""
+    modules = (clinvar_helpers, kgx_records, kgx_writer, sys.modules[__name__])
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "code": source_sha256(m.__file__ for m in modules),
+        "koza": version("koza"),
+        "mondo": file_sha256(sssom_path),
+        "medgen": file_sha256(medgen_path),
+        "transform": config.get("transform") or {},
+        "node_properties": list(config["writer"]["node_properties"]),
+        "edge_properties": list(config["writer"]["edge_properties"]),
+    }
+
+
+def load_snapshot(path, key):
+    """The snapshot at path if it was taken under the same inputs_key(), else None."""
+    try:
+        with open(path, "rb") as fh:
+            snapshot = pickle.load(fh)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("key") != key:
+        return None
+    return snapshot
+
+
+def write_snapshot(path, snapshot):
+    """Write via a temporary file and rename, so an interrupted run keeps the old one."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump(snapshot, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _add_pairs(counts, touched, gene_entry, qualification, delta):
+    """Add `delta` to the count of each (gene, disease) pair a variant supports, as
+    build_pair_variant_counts() counts it."""
+    if gene_entry is None:
+        return
+    causes, assoc = qualification
+    for disease, _ in causes + assoc:
+        pair = (gene_entry[0], disease)
+        n = counts.get(pair, 0) + delta
+        if n:
+            counts[pair] = n
+        else:
+            counts.pop(pair, None)
+        touched.add(pair)
+
+
+def run_incremental(config_path=TRANSFORM_YAML, output_dir="output", data_dir="data", compression=None, snapshot=None):
+    """Run the transform described by config_path into output_dir, reusing what the
+    snapshot of the previous build (`snapshot`, default <output_dir>/<name>.snapshot.pickle)
+    says is unchanged, and leave a snapshot of this build. Returns a dict of counts --
+    rows, variants (the ones the transform can act on), changed, reprocessed, pairs_crossed,
+    nodes, edges -- whether the run was full, and its seconds in total."""
+    started = time.perf_counter()
+    config_path, output_dir, data_dir = Path(config_path), Path(output_dir), Path(data_dir)
+    config = load_transform_config(config_path)
+    settings = config.get("transform") or {}
+    configure_from(settings)
+    if settings.get("row_source", "tsv") == "vcf":
+        source = data_dir / "clinvar.vcf.gz"
+    else:
+        # reader paths are relative to the config file, as Koza resolves them
+        [source] = [config_path.parent / f for f in config["reader"]["files"]]
+
+    var_records, map_to_mondo, variant_genes = load_transform_maps(
+        data_dir / SUBMISSIONS, data_dir / SSSOM, data_dir / MEDGEN, data_dir / VARIANT_SUMMARY
+    )
+    lit_only_variants = literature_only_variants(var_records)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    snapshot_path = Path(snapshot) if snapshot else output_dir / "{}.snapshot.pickle".format(config["name"])
+    key = inputs_key(config, data_dir / SSSOM, data_dir / MEDGEN)
+    previous = load_snapshot(snapshot_path, key)
+    old_variants = previous["variants"] if previous else {}
+    old_counts = previous["pair_variant_counts"] if previous else {}
+
+    # Pass 1: each variant's tier result, reused when its own inputs are unchanged, and
+    # the pair counts moved by the variants whose result may have changed
+    counts = dict(old_counts)
+    touched = set()
+    variants = {}
+    qualified = {}
+    changed = set()
+    pool = {}
+    n_rows = 0
+    for row in source_rows(source):
+        n_rows += 1
+        varid = row["ID"]
+        records = var_records.get(varid)
+        if records is None or row["CLNVC"] not in KEPT_VARIANT_CLASSES:
+            continue
+        if varid in variants:
+            raise ValueError(
+                "VariationID {} is on more than one row of {}; run the full transform".format(varid, source)
+            )
+        inputs = (row_digest(row), records_digest(records), variant_genes.get(varid))
+        old = old_variants.get(varid)
+        if old is not None and old[:_QUALIFIED] == inputs:
+            qualification = old[_QUALIFIED]
+            variants[varid] = old
+        else:
+            qualification = pack_qualification(
+                *qualifying_diseases(row, records, map_to_mondo, lit_only_variants), pool
+            )
+            if old is not None:
+                _add_pairs(counts, touched, old[_GENE], old[_QUALIFIED], -1)
+            _add_pairs(counts, touched, inputs[2], qualification, 1)
+            changed.add(varid)
+            variants[varid] = (*inputs, qualification, (), ())
+        if qualification[0] or qualification[1]:
+            qualified[varid] = qualification
+    for varid, old in old_variants.items():
+        if varid not in variants:
+            _add_pairs(counts, touched, old[_GENE], old[_QUALIFIED], -1)
+
+    # A pair crossing min_variants_per_pair adds or drops an edge of every variant behind it
+    threshold = clinvar_helpers.min_variants_per_pair
+    crossed = {p for p in touched if (old_counts.get(p, 0) >= threshold) != (counts.get(p, 0) >= threshold)}
+    reprocess = set(changed)
+    if crossed:
+        for varid, entry in variants.items():
+            gene_entry = entry[_GENE]
+            if varid in reprocess or gene_entry is None:
+                continue
+            causes, assoc = entry[_QUALIFIED]
+            if any((gene_entry[0], disease) in crossed for disease, _ in causes + assoc):
+                reprocess.add(varid)
+
+    # Pass 2: the new lines of the variants to reprocess, the stored lines of the rest, in
+    # row order
+    writer_config = config["writer"]
+    with kgx_writer.KGXStreamWriter(
+        output_dir,
+        config["name"],
+        writer_config["node_properties"],
+        writer_config["edge_properties"],
+        compression=compression,
+    ) as writer:
+        rows = source_rows(source) if reprocess else ({"ID": varid} for varid in variants)
+        for row in rows:
+            varid = row["ID"]
+            entry = variants.get(varid)
+            if entry is None:
+                continue
+            if varid in reprocess:
+                entities = process_row(
+                    row, var_records, map_to_mondo, variant_genes, lit_only_variants, counts, qualified
+                )
+                node_lines, edge_lines = writer.render(entities)
+                entry = variants[varid] = (*entry[:_NODE_LINES], tuple(node_lines), tuple(edge_lines))
+            writer.write_lines(entry[_NODE_LINES], entry[_EDGE_LINES])
+
+    write_snapshot(snapshot_path, {"key": key, "variants": variants, "pair_variant_counts": counts})
+    return {
+        "rows": n_rows,
+        "variants": len(variants),
+        "changed": len(changed),
+        "reprocessed": len(reprocess),
+        "pairs_crossed": len(crossed),
+        "nodes": writer.n_nodes,
+        "edges": writer.n_edges,
+        "full": previous is None,
+        "total": time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rerun the ClinVar transform, reprocessing only changed variants")
+    parser.add_argument("--config", type=Path, default=TRANSFORM_YAML, help="Koza transform config")
+    parser.add_argument("--output-dir", type=Path, default=Path("output"), help="Where the KGX TSVs go")
+    parser.add_argument("--data-dir", type=Path, default=Path("data"), help="Where the downloaded files are")
+    parser.add_argument("--compression", choices=["gzip", "zstd"], help="Compress the output TSVs")
+    parser.add_argument("--snapshot", type=Path, help="Snapshot file (default: <output-dir>/<name>.snapshot.pickle)")
+    args = parser.parse_args()
+    try:
+        kgx_writer.check_compression(args.compression)
+    except ImportError as e:
+        parser.error(str(e))
+
+    stats = run_incremental(args.config, args.output_dir, args.data_dir, args.compression, args.snapshot)
+    print(
+        "Wrote {nodes:,} nodes and {edges:,} edges to {out} in {total:.1f}s: {kind} run, {changed:,} of "
+        "{variants:,} variants changed, {reprocessed:,} reprocessed, {pairs_crossed:,} pairs crossed the "
+        "threshold".format(out=args.output_dir, kind="full" if stats["full"] else "incremental", **stats)
+    )
+    try:
+        check_min_counts(stats["nodes"], stats["edges"], load_transform_config(args.config)["writer"])
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
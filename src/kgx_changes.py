@@ -0,0 +1,154 @@
+"""What changed in the KGX output between two builds, as a TSV a KG loader can apply.
+
+A downstream KG reloading clinvar_variant_nodes.tsv / clinvar_variant_edges.tsv after
+every build replaces ~56k nodes and ~137k edges to pick up the few that changed.
+write_changes() compares a previous build's output directory with the current one and
+writes <name>_changes.tsv, one line per node or edge that was added, removed or changed:
+
+  - nodes are matched on id, edges on (subject, predicate, object) -- the identity the
+    uuid5 edge ids are minted from, so it holds whichever edge_id_scheme either build
+    used,
+  - a matched node or edge whose other properties differ is "changed", and the
+    properties that differ are listed in changed_properties,
+  - id / subject / predicate / object identify the node or edge; an added or changed
+    one's full row is the current build's, a removed one's the previous build's.
+
+The previous build's rows are held in a dict keyed on identity and the current build's
+streamed past it (a hash join), so memory is one build's output, not two. Either side
+may be gzip- or zstd-compressed, as kgx_writer writes them.
+
+    PYTHONPATH=src uv run python -m kgx_changes previous-output/ output/
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import io
+from collections import Counter
+from pathlib import Path
+
+from kgx_writer import COMPRESSIONS
+
+CHANGES_COLUMNS = ("change", "element", "id", "subject", "predicate", "object", "changed_properties")
+
+SOURCE_NAME = "clinvar_variant"
+
+
+def kgx_path(out_dir, source_name, kind) -> Path:
+    """The <source_name>_<kind>s.tsv in out_dir, compressed or not."""
+    base = Path(out_dir) / "{}_{}s.tsv".format(source_name, kind)
+    for suffix in COMPRESSIONS.values():
+        path = base.with_name(base.name + suffix)
+        if path.exists():
+            return path
+    raise FileNotFoundError("no {} (or compressed copy) in {}".format(base.name, out_dir))
+
+
+def _open_text(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", newline="")
+    if path.suffix == ".zst":
+        import zstandard
+
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True), newline="")
+    return open(path, newline="")
+
+
+def read_kgx(path):
+    """(header, {column: value} per row) of a KGX TSV written by TSVWriter/kgx_writer."""
+    fh = _open_text(Path(path))
+    header = fh.readline().rstrip("\r\n").split("\t")
+
+    def rows():
+        with fh:
+            for line in fh:
+                yield dict(zip(header, line.rstrip("\r\n").split("\t")))
+
+    return header, rows()
+
+
+def _key(kind, row):
+    return row["id"] if kind == "node" else (row["subject"], row["predicate"], row["object"])
+
+
+def _change(change, kind, row, changed=()):
+    return {
+        "change": change,
+        "element": kind,
+        "id": row.get("id", ""),
+        "subject": row.get("subject", ""),
+        "predicate": row.get("predicate", ""),
+        "object": row.get("object", ""),
+        "changed_properties": "|".join(changed),
+    }
+
+
+def diff_kgx(previous_path, current_path, kind):
+    """Yield a changes row (CHANGES_COLUMNS) for every node or edge (`kind`) added,
+    removed or changed from previous_path to current_path: added and changed ones in the
+    current file's order, then removed ones in the previous file's."""
+    previous_header, previous_rows = read_kgx(previous_path)
+    previous = {}
+    for row in previous_rows:
+        key = _key(kind, row)
+        if key in previous:
+            raise ValueError("{} lists {} {!r} twice".format(previous_path, kind, key))
+        previous[key] = row
+
+    current_header, current_rows = read_kgx(current_path)
+    columns = list(dict.fromkeys(current_header + previous_header))
+    seen = set()
+    for row in current_rows:
+        key = _key(kind, row)
+        if key in seen:
+            raise ValueError("{} lists {} {!r} twice".format(current_path, kind, key))
+        seen.add(key)
+        old = previous.pop(key, None)
+        if old is None:
+            yield _change("added", kind, row)
+        elif old != row:
+            changed = [c for c in columns if old.get(c, "") != row.get(c, "")]
+            if changed:
+                yield _change("changed", kind, row, changed)
+    for row in previous.values():
+        yield _change("removed", kind, row)
+
+
+def write_changes(previous_dir, current_dir, source_name=SOURCE_NAME, output=None) -> Counter:
+    """Write the changes from previous_dir's build to current_dir's, nodes then edges, to
+    `output` (default <current_dir>/<source_name>_changes.tsv). Returns a Counter of
+    (element, change) -> rows."""
+    output = Path(output) if output else Path(current_dir) / "{}_changes.tsv".format(source_name)
+    counts = Counter()
+    with open(output, "w") as out:
+        out.write("\t".join(CHANGES_COLUMNS) + "\n")
+        for kind in ("node", "edge"):
+            changes = diff_kgx(
+                kgx_path(previous_dir, source_name, kind), kgx_path(current_dir, source_name, kind), kind
+            )
+            for change in changes:
+                counts[kind, change["change"]] += 1
+                out.write("\t".join(change[c] for c in CHANGES_COLUMNS) + "\n")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the node/edge changes between two builds' KGX output")
+    parser.add_argument("previous", type=Path, help="The previous build's output directory")
+    parser.add_argument("current", type=Path, help="This build's output directory")
+    parser.add_argument("--name", default=SOURCE_NAME, help="Source name the KGX files are prefixed with")
+    parser.add_argument("--output", type=Path, help="Changes TSV (default: <current>/<name>_changes.tsv)")
+    args = parser.parse_args()
+
+    counts = write_changes(args.previous, args.current, args.name, args.output)
+    for kind in ("node", "edge"):
+        print(
+            "{}s: {:,} added, {:,} removed, {:,} changed".format(
+                kind, counts[kind, "added"], counts[kind, "removed"], counts[kind, "changed"]
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Plain slotted records for process_row()'s "records" entity mode.
+
+The biolink pydantic classes validate every field on construction, and Koza then dumps
+each model back to a dict to write it -- together most of the cost of emitting a row.
+The records here carry the same field names, holding exactly the values model_dump(
+mode="json", exclude_none=True) would produce (enum members as their string values,
+the class's default category filled in), and only the properties transform.yaml's
+writer writes. Koza's KGXConverter accepts dataclasses as they are, so the written TSV
+is unchanged; nothing is validated on the way.
+
+Handing records to Koza's writer still costs a dataclasses.asdict() deep copy and a
+build_export_row() pass per entity, as much as the validation saved. tsv_line() renders
+a record straight to the line TSVWriter would write, which is what kgx_writer does.
+
+to_pydantic() and check_record() rebuild the biolink class from a record, which is how
+the "validated_records" mode and the tests prove the two modes write the same rows.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+
+from biolink_model.datamodel.pydanticmodel_v2 import (
+    SequenceVariant,
+    VariantToDiseaseAssociation,
+    VariantToGeneAssociation,
+)
+from koza.io.utils import build_export_row
+
+# model_dump(mode="json") values of the enums process_row() uses
+KNOWLEDGE_ASSERTION = "knowledge_assertion"
+MANUAL_AGENT = "manual_agent"
+
+
+@dataclass(slots=True)
+class SequenceVariantRecord:
+    id: str
+    name: str
+    xref: list
+    has_gene: list
+    in_taxon: list
+    in_taxon_label: str
+    type: list
+    category: tuple = ("biolink:SequenceVariant",)
+
+
+@dataclass(slots=True)
+class VariantToGeneAssociationRecord:
+    id: str
+    subject: str
+    predicate: str
+    object: str
+    primary_knowledge_source: str
+    aggregator_knowledge_source: list
+    knowledge_level: str = KNOWLEDGE_ASSERTION
+    agent_type: str = MANUAL_AGENT
+    category: tuple = ("biolink:VariantToGeneAssociation",)
+
+
+@dataclass(slots=True)
+class VariantToDiseaseAssociationRecord:
+    id: str
+    subject: str
+    predicate: str
+    object: str
+    qualifiers: list
+    negated: bool
+    original_predicate: str
+    primary_knowledge_source: str
+    aggregator_knowledge_source: list
+    knowledge_level: str = KNOWLEDGE_ASSERTION
+    agent_type: str = MANUAL_AGENT
+    category: tuple = ("biolink:VariantToDiseaseAssociation",)
+
+
+PYDANTIC_CLASS = {
+    SequenceVariantRecord: SequenceVariant,
+    VariantToGeneAssociationRecord: VariantToGeneAssociation,
+    VariantToDiseaseAssociationRecord: VariantToDiseaseAssociation,
+}
+
+
+def record_dict(record) -> dict:
+    """The record's fields as model_dump(mode="json", exclude_none=True) would give them."""
+    out = {}
+    for f in fields(record):
+        value = getattr(record, f.name)
+        if value is not None:
+            out[f.name] = list(value) if isinstance(value, tuple) else value
+    return out
+
+
+def to_pydantic(record):
+    """The biolink pydantic object a record stands for, validated on construction."""
+    return PYDANTIC_CLASS[type(record)](**record_dict(record))
+
+
+def check_record(record, columns=None):
+    """Raise ValueError unless the record validates as its biolink class and carries the
+    same values that object dumps, restricted to `columns` (the writer's properties) when
+    given -- i.e. unless writing either one gives the same row."""
+    # compared as Koza's writer renders them, so e.g. an enum member that equals its
+    # string value but is written as "KnowledgeLevelEnum.knowledge_assertion" is caught
+    dumped = build_export_row(to_pydantic(record).model_dump(mode="json", exclude_none=True), "|")
+    mine = build_export_row(record_dict(record), "|")
+    if columns is not None:
+        dumped = {k: v for k, v in dumped.items() if k in columns}
+        mine = {k: v for k, v in mine.items() if k in columns}
+    if dumped != mine:
+        raise ValueError("{} differs from its pydantic form: {!r} != {!r}".format(type(record).__name__, mine, dumped))
+    return record
+
+
+NODE_RECORDS = (SequenceVariantRecord,)
+EDGE_RECORDS = (VariantToGeneAssociationRecord, VariantToDiseaseAssociationRecord)
+_RECORDS = NODE_RECORDS + EDGE_RECORDS
+
+# build_export_row() drops these values, alone or as list items (koza.io.utils.is_null)
+_NULLS = (None, "", " ")
+
+
+def _cell(value) -> str:
+    """One TSV cell as Koza's build_export_row(..., list_delimiter="|") renders the value."""
+    if value in _NULLS:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return "|".join(
+            v.replace("\n", " ").replace('\\"', "").replace("\t", " ") if isinstance(v, str) else str(v)
+            for v in value
+            if v not in _NULLS
+        )
+    return str(value).replace("\n", " ").replace('\\"', "").replace("\t", " ")
+
+
+def tsv_line(record, columns, node=False) -> str:
+    """The line TSVWriter writes for `record` under `columns` (its node_columns or
+    edge_columns), newline included. A node's id is written as is, as TSVWriter does."""
+    cells = [_cell(getattr(record, c, None)) for c in columns]
+    if node and "id" in columns:
+        # columns is an OrderedSet, so its index() is a dict lookup
+        cells[columns.index("id")] = str(record.id)
+    return "\t".join(cells) + "\n"
+
@@ -0,0 +1,269 @@
+"""Batched KGX TSV writer for clinvar_variant_nodes.tsv / clinvar_variant_edges.tsv.
+
+Koza's TSVWriter formats and writes every entity on its own. KGXStreamWriter renders
+entities in the same way -- kgx_records.tsv_line() for records, Koza's own converter and
+build_export_row() for pydantic models, columns ordered by TSVWriter._order_columns()
+from transform.yaml's node_properties / edge_properties -- but collects the lines and
+hands them on batch_rows at a time, as one string:
+
+  - KGXStreamWriter(output_dir, source_name, node_properties, edge_properties) opens its
+    own files with large write buffers, optionally gzip- or zstd-compressed
+    (compression="gzip" / "zstd"; zstd needs the zstd extra, clinvar_ingest[zstd], for
+    the zstandard package -- check_compression() tells up front). Compressed output
+    is compressed and written by a background thread per file, so compressing overlaps
+    with rendering the next batch.
+  - KGXStreamWriter.over(tsv_writer) writes into the files a Koza TSVWriter has already
+    opened and headed, which is how src/transform.py uses it under `koza transform`.
+
+Either way the bytes on disk (before compression) are those TSVWriter would write, in
+the same order. close() flushes what is left; call it before the files are read.
+"""
+
+from __future__ import annotations
+
+import gzip
+import queue
+import threading
+from pathlib import Path
+
+from koza.converter.kgx_converter import KGXConverter
+from koza.io.utils import build_export_row
+from koza.io.writer.tsv_writer import TSVWriter
+
+from kgx_records import EDGE_RECORDS, NODE_RECORDS, tsv_line
+
+COMPRESSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+# Lines collected per file before they are written out, and the write buffer under them
+BATCH_ROWS = 4096
+BUFFER_SIZE = 1 << 20
+
+# Batches waiting for a compressor thread; bounds memory when compression falls behind
+_PENDING_BATCHES = 8
+_DONE = object()
+
+
+def _koza_line(converter, entity, columns, node) -> str:
+    """The line TSVWriter.write_row() writes for a pydantic (or any non-record) entity."""
+    record = converter.convert_node(entity) if node else converter.convert_association(entity)
+    row = build_export_row(record, list_delimiter="|")
+    if node:
+        row["id"] = record["id"]
+    return "\t".join(str(row[c]) if c in row else "" for c in columns) + "\n"
+
+
+def check_compression(compression):
+    """Raise ValueError for a compression not in COMPRESSIONS, and ImportError for one
+    whose package is not installed -- before any file is opened."""
+    if compression not in COMPRESSIONS:
+        raise ValueError(
+            "compression must be one of {}, not {!r}".format(", ".join(map(repr, COMPRESSIONS)), compression)
+        )
+    if compression == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "compression='zstd' needs the zstandard package (pip install 'clinvar_ingest[zstd]')"
+            ) from None
+
+
+def _open_compressed(path: Path, compression, level):
+    raw = open(path, "wb", buffering=BUFFER_SIZE)
+    if compression == "gzip":
+        # mtime=0 keeps the output byte-identical from run to run
+        return gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6 if level is None else level, mtime=0), raw
+    try:
+        check_compression(compression)
+    except ImportError:
+        raw.close()
+        path.unlink(missing_ok=True)
+        raise
+    import zstandard
+
+    compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+    return compressor.stream_writer(raw, closefd=False), raw
+
+
+class _CompressedSink:
+    """A write-only file whose writes are encoded here and compressed and written by a
+    background thread, in order."""
+
+    def __init__(self, path: Path, compression, level=None):
+        self._stream, self._raw = _open_compressed(path, compression, level)
+        self._queue = queue.Queue(maxsize=_PENDING_BATCHES)
+        self._error = None
+        self._thread = threading.Thread(target=self._drain, name="kgx-compress-" + path.name, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while (data := self._queue.get()) is not _DONE:
+            if self._error is None:
+                try:
+                    self._stream.write(data)
+                except BaseException as e:  # reported by the next write() or close()
+                    self._error = e
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+    def write(self, data):
+        """Queue str (encoded as UTF-8) or bytes for writing."""
+        self._check()
+        self._queue.put(data.encode("utf-8") if isinstance(data, str) else data)
+
+    def close(self):
+        self._queue.put(_DONE)
+        self._thread.join()
+        try:
+            self._check()
+        finally:
+            self._stream.close()
+            self._raw.close()
+
+
+def open_compressed(path, compression, compresslevel=None):
+    """A write-only file at path, compressed ("gzip" or "zstd") and written by a background
+    thread; write() takes str or bytes. Closing it waits for the thread."""
+    if compression not in COMPRESSIONS or compression is None:
+        raise ValueError("compression must be 'gzip' or 'zstd', not {!r}".format(compression))
+    return _CompressedSink(Path(path), compression, compresslevel)
+
+
+class _Output:
+    """One of the two files: its columns, its sink and the lines not yet written."""
+
+    __slots__ = ("columns", "sink", "owned", "lines", "rows")
+
+    def __init__(self, columns, sink, owned):
+        self.columns = columns
+        self.sink = sink
+        self.owned = owned
+        self.lines = []
+        self.rows = 0
+
+    def flush(self):
+        if self.lines:
+            self.sink.write("".join(self.lines))
+            self.rows += len(self.lines)
+            self.lines = []
+
+
+class KGXStreamWriter:
+    """Batched writer of process_row()'s entities to KGX node and edge TSVs."""
+
+    def __init__(
+        self,
+        output_dir,
+        source_name,
+        node_properties,
+        edge_properties,
+        compression=None,
+        compresslevel=None,
+        batch_rows=BATCH_ROWS,
+    ):
+        check_compression(compression)
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_rows = batch_rows
+        self.converter = KGXConverter()
+        self.paths = {}
+        outputs = {}
+        for kind, properties in (("node", node_properties), ("edge", edge_properties)):
+            columns = TSVWriter._order_columns(list(properties), kind)
+            path = output_dir / "{}_{}s.tsv{}".format(source_name, kind, COMPRESSIONS[compression])
+            if compression is None:
+                sink = open(path, "w", buffering=BUFFER_SIZE)
+            else:
+                sink = _CompressedSink(path, compression, compresslevel)
+            sink.write("\t".join(columns) + "\n")
+            self.paths[kind] = path
+            outputs[kind] = _Output(columns, sink, owned=True)
+        self._nodes = outputs["node"]
+        self._edges = outputs["edge"]
+
+    @classmethod
+    def over(cls, tsv_writer: TSVWriter, batch_rows=BATCH_ROWS):
+        """A writer batching into a Koza TSVWriter's open node and edge files. close()
+        flushes them but leaves closing to the TSVWriter's finalize()."""
+        self = cls.__new__(cls)
+        self.batch_rows = batch_rows
+        self.converter = tsv_writer.converter
+        self.paths = {"node": tsv_writer.nodes_file_name, "edge": tsv_writer.edges_file_name}
+        self._nodes = _Output(tsv_writer.node_columns, tsv_writer.nodeFH, owned=False)
+        self._edges = _Output(tsv_writer.edge_columns, tsv_writer.edgeFH, owned=False)
+        return self
+
+    @classmethod
+    def for_koza(cls, writer, batch_rows=BATCH_ROWS):
+        """over(writer) when writer is a TSVWriter this can stand in for -- writing both
+        files, with no SSSOM mapping to apply -- otherwise None."""
+        if not isinstance(writer, TSVWriter) or writer.sssom_config:
+            return None
+        if not (hasattr(writer, "nodeFH") and hasattr(writer, "edgeFH")):
+            return None
+        return cls.over(writer, batch_rows)
+
+    @property
+    def n_nodes(self):
+        return self._nodes.rows + len(self._nodes.lines)
+
+    @property
+    def n_edges(self):
+        return self._edges.rows + len(self._edges.lines)
+
+    def render(self, entities):
+        """The lines write() adds for `entities`, as (node lines, edge lines); nodes and
+        edges are told apart as Koza's KGXConverter.split_entities() does."""
+        node_columns, edge_columns = self._nodes.columns, self._edges.columns
+        node_lines, edge_lines = [], []
+        for entity in entities:
+            if isinstance(entity, NODE_RECORDS):
+                node_lines.append(tsv_line(entity, node_columns, node=True))
+            elif isinstance(entity, EDGE_RECORDS):
+                edge_lines.append(tsv_line(entity, edge_columns))
+            elif hasattr(entity, "subject") and hasattr(entity, "predicate") and hasattr(entity, "object"):
+                edge_lines.append(_koza_line(self.converter, entity, edge_columns, node=False))
+            else:
+                node_lines.append(_koza_line(self.converter, entity, node_columns, node=True))
+        return node_lines, edge_lines
+
+    def write(self, entities):
+        """Add one row's (or any number of rows') entities."""
+        self.write_lines(*self.render(entities))
+
+    def write_lines(self, node_lines, edge_lines):
+        """Add lines render() produced -- by this writer or one with the same columns."""
+        nodes, edges = self._nodes, self._edges
+        nodes.lines.extend(node_lines)
+        edges.lines.extend(edge_lines)
+        if len(nodes.lines) >= self.batch_rows:
+            nodes.flush()
+        if len(edges.lines) >= self.batch_rows:
+            edges.flush()
+
+    def flush(self):
+        self._nodes.flush()
+        self._edges.flush()
+
+    def close(self):
+        """Write out what is left and close the files this writer opened."""
+        errors = []
+        for output in (self._nodes, self._edges):
+            try:
+                output.flush()
+                if output.owned:
+                    output.sink.close()
+                else:
+                    output.sink.flush()
+            except BaseException as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
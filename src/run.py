@@ -0,0 +1,216 @@
+"""Standalone run of the ClinVar transform, without Koza's row loop.
+
+`koza transform src/transform.yaml` builds a dict per row, dispatches the transform hook
+for it and writes its entities one at a time. This produces the same
+clinvar_variant_nodes.tsv / clinvar_variant_edges.tsv from the same transform.yaml, but
+drives process_row() itself:
+
+  - the transform module next to transform.yaml is executed exactly as Koza executes it,
+    so the auxiliary maps and the pre-pass are the ones a Koza run builds,
+  - transform.yaml's reader files are read with read_rows(), which yields the row dicts
+    Koza's CSV reader would, batch_rows rows at a time -- or, with row_source "vcf",
+    clinvar.vcf.gz is read with clinvar_vcf.read_vcf_rows(),
+  - entities go to kgx_writer.KGXStreamWriter in transform.yaml's column order,
+    optionally gzip/zstd-compressed,
+  - --jobs N > 1 hands the rows to sharded_transform.run_sharded() instead,
+  - time spent loading, reading, in process_row() and writing is reported at the end,
+    and writer.min_node_count / min_edge_count are checked as for the sharded run,
+  - --changes-from DIR also writes clinvar_variant_changes.tsv, the nodes and edges
+    added, removed or changed since the build in DIR (kgx_changes.write_changes()).
+
+Run from the repo root (data/ paths are relative, as for Koza):
+
+    PYTHONPATH=src uv run python -m run --jobs 1 --compression gzip
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import importlib.util
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+from kgx_changes import write_changes
+from kgx_writer import check_compression
+from sharded_transform import check_min_counts, run_sharded
+from transform_config import TRANSFORM_YAML, load_transform_config
+
+BATCH_ROWS = 10_000
+
+
+def load_transform_module(config_path=TRANSFORM_YAML):
+    """Execute the transform module Koza would pick for config_path -- <name>.py beside it,
+    else transform.py -- loading the auxiliary maps and running the pre-pass."""
+    config_path = Path(config_path)
+    path = config_path.with_suffix(".py")
+    if not path.exists():
+        path = config_path.parent / "transform.py"
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def transform_context(module):
+    """process_row()'s arguments after the row, as the transform module's hook passes them."""
+    return (
+        module.var_records,
+        module.map_to_mondo,
+        module.variant_genes,
+        module.lit_only_variants,
+        module.pair_variant_counts,
+        module.qualified,
+    )
+
+
+def read_rows(fh, header=None):
+    """The rows of a clinvar.tsv as Koza's CSV reader yields them under transform.yaml's
+    reader config: tab-delimited, "excel" quoting, values stripped, blank and "#" lines
+    skipped, surplus values dropped. The header is the first line unless given."""
+    rows = csv.reader(fh, delimiter="\t")
+    if header is None:
+        header = next(rows)
+    width = len(header)
+    for values in rows:
+        if not values or values[0].startswith("#"):
+            continue
+        if len(values) < width:
+            raise ValueError(
+                "{} is missing {} column(s) at line {}".format(
+                    getattr(fh, "name", "clinvar.tsv"), width - len(values), rows.line_num
+                )
+            )
+        yield dict(zip(header, [v.strip() for v in values]))
+
+
+def source_rows(path):
+    """read_rows() of a clinvar.tsv, or read_vcf_rows() of a VCF."""
+    from clinvar_vcf import is_vcf, read_vcf_rows
+
+    if is_vcf(path):
+        yield from read_vcf_rows(path)
+        return
+    with open(path, newline="") as fh:
+        yield from read_rows(fh)
+
+
+def run(
+    config_path=TRANSFORM_YAML,
+    output_dir="output",
+    jobs=1,
+    compression=None,
+    batch_rows=BATCH_ROWS,
+    module=None,
+):
+    """Run the transform described by config_path into output_dir. Returns a dict of
+    counts (rows, nodes, edges) and seconds spent per stage (load, read, process, write,
+    total). `module` is an already loaded transform module, to skip loading it again."""
+    from clinvar_helpers import configure_from, process_row
+    from clinvar_vcf import is_vcf
+    from kgx_writer import KGXStreamWriter
+
+    started = time.perf_counter()
+    config_path = Path(config_path)
+    config = load_transform_config(config_path)
+    if module is None:
+        module = load_transform_module(config_path)
+    configure_from(config.get("transform") or {})
+    context = transform_context(module)
+    if is_vcf(module.clinvar_source):
+        files = [Path(module.clinvar_source)]
+    else:
+        # reader paths are relative to the config file, as Koza resolves them
+        files = [config_path.parent / f for f in config["reader"]["files"]]
+    stats = {"rows": 0, "load": time.perf_counter() - started, "read": 0.0, "process": 0.0, "write": 0.0}
+
+    if jobs > 1:
+        if len(files) != 1 or is_vcf(files[0]):
+            raise ValueError("a sharded run splits exactly one clinvar.tsv; run row_source 'vcf' with jobs=1")
+        t = time.perf_counter()
+        counts = run_sharded(files[0], output_dir, context, jobs, config, compression=compression)
+        stats["nodes"], stats["edges"] = counts
+        stats["process"] = time.perf_counter() - t
+        stats["total"] = time.perf_counter() - started
+        return stats
+
+    writer_config = config["writer"]
+    with KGXStreamWriter(
+        output_dir,
+        config["name"],
+        writer_config["node_properties"],
+        writer_config["edge_properties"],
+        compression=compression,
+    ) as writer:
+        for path in files:
+            rows = source_rows(path)
+            while True:
+                t0 = time.perf_counter()
+                batch = list(islice(rows, batch_rows))
+                t1 = time.perf_counter()
+                if not batch:
+                    break
+                out = []
+                for row in batch:
+                    entities = process_row(row, *context)
+                    if entities:
+                        out.extend(entities)
+                t2 = time.perf_counter()
+                writer.write(out)
+                t3 = time.perf_counter()
+                stats["rows"] += len(batch)
+                stats["read"] += t1 - t0
+                stats["process"] += t2 - t1
+                stats["write"] += t3 - t2
+        t = time.perf_counter()
+    stats["write"] += time.perf_counter() - t
+    stats["nodes"], stats["edges"] = writer.n_nodes, writer.n_edges
+    stats["total"] = time.perf_counter() - started
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the ClinVar transform without Koza's row loop")
+    parser.add_argument("--config", type=Path, default=TRANSFORM_YAML, help="Koza transform config")
+    parser.add_argument("--output-dir", type=Path, default=Path("output"), help="Where the KGX TSVs go")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes (>1 runs sharded)")
+    parser.add_argument("--compression", choices=["gzip", "zstd"], help="Compress the output TSVs")
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS, help="Rows read and written per batch")
+    parser.add_argument("--changes-from", type=Path, help="A previous build's output dir to write the changes since")
+    args = parser.parse_args()
+    try:
+        check_compression(args.compression)
+    except ImportError as e:
+        parser.error(str(e))
+
+    stats = run(args.config, args.output_dir, args.jobs, args.compression, args.batch_rows)
+    print(
+        "Wrote {nodes:,} nodes and {edges:,} edges to {out} in {total:.1f}s "
+        "(load {load:.1f}s, read {read:.1f}s, process_row {process:.1f}s, write {write:.1f}s)".format(
+            out=args.output_dir, **stats
+        )
+    )
+    if stats["rows"]:
+        rate = stats["rows"] / (stats["total"] - stats["load"])
+        print("{:,} rows, {:.0f} rows/s after loading".format(stats["rows"], rate))
+    if args.changes_from:
+        name = load_transform_config(args.config)["name"]
+        counts = write_changes(args.changes_from, args.output_dir, name)
+        print(
+            "Changes since {}: {:,} nodes and {:,} edges added, removed or changed".format(
+                args.changes_from,
+                sum(n for (kind, _), n in counts.items() if kind == "node"),
+                sum(n for (kind, _), n in counts.items() if kind == "edge"),
+            )
+        )
+    try:
+        check_min_counts(stats["nodes"], stats["edges"], load_transform_config(args.config)["writer"])
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
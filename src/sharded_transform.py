@@ -0,0 +1,218 @@
+"""Sharded, multi-process run of the transform, outside Koza's one-row-at-a-time loop.
+
+`koza transform src/transform.yaml` streams clinvar.tsv through process_row() on one
+core. This runs the same process_row() calls over byte ranges of clinvar.tsv in forked
+worker processes instead:
+
+  - the auxiliary maps are built once, by importing transform (exactly as Koza does),
+    and reach the workers through fork -- shared copy-on-write, never pickled -- or,
+    with --aux-store, are written once to an aux_store file every worker maps instead,
+    so lookups never touch (and so never un-share) the parent's objects,
+  - every shard writes its own nodes/edges TSVs with kgx_writer.KGXStreamWriter and the
+    transform.yaml writer config, so rows are formatted exactly as Koza would,
+  - the shards are concatenated in file order, so the merged output lists rows in the
+    order a single-process run writes them, gzip/zstd-compressed if asked for,
+  - writer.min_node_count / min_edge_count from transform.yaml are checked against the
+    merged output, and transform.edge_id_scheme / entity_mode are honoured as under Koza.
+
+Run from the repo root (data/ paths are relative, as for Koza):
+
+    PYTHONPATH=src uv run python src/sharded_transform.py --jobs 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from transform_config import load_transform_config
+
+# process_row()'s arguments after the row, set before the pool forks
+_CONTEXT = None
+
+
+def shard_ranges(path, n_shards):
+    """Split the data rows of a headed TSV into up to n_shards (start, end) byte ranges,
+    each starting and ending on a line boundary. Returns (header fields, ranges)."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as fh:
+        header = fh.readline().decode("utf-8").rstrip("\r\n").split("\t")
+        data_start = fh.tell()
+        bounds = [data_start]
+        for i in range(1, n_shards):
+            target = data_start + (size - data_start) * i // n_shards
+            if target <= bounds[-1]:
+                continue
+            fh.seek(target - 1)
+            fh.readline()  # finish the line `target` falls in
+            if fh.tell() >= size:
+                break
+            if fh.tell() > bounds[-1]:
+                bounds.append(fh.tell())
+        bounds.append(size)
+    return header, [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def _init_worker(settings, aux_store):
+    """Worker setup: the transform section's settings, as Koza's on_data_begin hook
+    applies them, and the mapped aux_store's views in place of the forked maps."""
+    global _CONTEXT
+
+    from clinvar_helpers import configure_from
+
+    configure_from(settings)
+    if aux_store is not None:
+        from aux_store import attach
+
+        _CONTEXT = (*attach(aux_store).maps(), *_CONTEXT[3:])
+
+
+def _run_shard(task):
+    """Worker: process_row() over one byte range, written to shard_dir."""
+    from clinvar_helpers import process_row
+    from kgx_writer import KGXStreamWriter
+    from run import read_rows
+
+    clinvar_tsv, header, start, end, shard_dir, source_name, writer_config = task
+    with open(clinvar_tsv, "rb") as fh:
+        fh.seek(start)
+        block = fh.read(end - start).decode("utf-8")
+    with KGXStreamWriter(
+        shard_dir, source_name, writer_config["node_properties"], writer_config["edge_properties"]
+    ) as writer:
+        # parsed as Koza's reader parses the same rows
+        for row in read_rows(io.StringIO(block, newline=""), header):
+            entities = process_row(row, *_CONTEXT)
+            if entities:
+                writer.write(entities)
+    return shard_dir
+
+
+def _concatenate(parts, target, compression=None):
+    """Concatenate TSVs sharing one header line; returns the number of data rows."""
+    from kgx_writer import open_compressed
+
+    rows = 0
+    out = open(target, "wb") if compression is None else open_compressed(target, compression)
+    try:
+        for i, part in enumerate(parts):
+            with open(part, "rb") as fh:
+                header = fh.readline()
+                if i == 0:
+                    out.write(header)
+                body = fh.read()
+            rows += body.count(b"\n")
+            out.write(body)
+    finally:
+        out.close()
+    return rows
+
+
+def run_sharded(
+    clinvar_tsv, output_dir, context, jobs, config=None, shards_per_job=4, compression=None, aux_store=None
+):
+    """Run process_row(row, *context) over every row of clinvar_tsv in `jobs` forked
+    workers and write the merged KGX TSVs to output_dir, compressed when compression is
+    "gzip" or "zstd". Returns (n_nodes, n_edges).
+
+    With aux_store (a path), context's first three maps -- var_records, map_to_mondo,
+    variant_genes -- are written there with aux_store.write_store() and every worker
+    reads them through attach() instead.
+
+    clinvar_tsv is cut into jobs * shards_per_job ranges, so a shard of unusually heavy
+    rows does not leave the other workers idle at the end.
+    """
+    global _CONTEXT
+
+    from kgx_writer import COMPRESSIONS
+
+    if compression not in COMPRESSIONS:
+        raise ValueError("compression must be None, 'gzip' or 'zstd', not {!r}".format(compression))
+    config = load_transform_config() if config is None else config
+    source_name = config["name"]
+    writer_config = config["writer"]
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    header, ranges = shard_ranges(clinvar_tsv, max(1, jobs * shards_per_job))
+
+    work_dir = Path(tempfile.mkdtemp(prefix=".shards-", dir=output_dir))
+    try:
+        tasks = [
+            (str(clinvar_tsv), header, start, end, str(work_dir / "{:05d}".format(i)), source_name, writer_config)
+            for i, (start, end) in enumerate(ranges)
+        ]
+        _CONTEXT = tuple(context)
+        if aux_store is not None:
+            from aux_store import write_store
+
+            write_store(aux_store, *_CONTEXT[:3])
+        try:
+            # every worker applies the transform section's settings, as Koza's on_data_begin
+            # hook does, so all shards build entities and ids the same way
+            with multiprocessing.get_context("fork").Pool(
+                max(1, jobs), initializer=_init_worker, initargs=(config.get("transform") or {}, aux_store)
+            ) as pool:
+                shard_dirs = pool.map(_run_shard, tasks, chunksize=1)
+        finally:
+            _CONTEXT = None
+
+        counts = []
+        for kind in ("nodes", "edges"):
+            name = "{}_{}.tsv".format(source_name, kind)
+            target = output_dir / (name + COMPRESSIONS[compression])
+            counts.append(_concatenate([Path(d) / name for d in shard_dirs], target, compression))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return tuple(counts)
+
+
+def check_min_counts(n_nodes, n_edges, writer_config):
+    """Raise ValueError when the merged output falls below transform.yaml's floors."""
+    problems = []
+    for what, n, floor in (
+        ("nodes", n_nodes, writer_config.get("min_node_count")),
+        ("edges", n_edges, writer_config.get("min_edge_count")),
+    ):
+        if floor is not None and n < floor:
+            problems.append("{:,} {} is below min_{}_count {:,}".format(n, what, what[:-1], floor))
+    if problems:
+        raise ValueError("; ".join(problems))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the ClinVar transform sharded across worker processes")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--output-dir", type=Path, default=Path("output"), help="Where the KGX TSVs go")
+    parser.add_argument("--aux-store", type=Path, help="Write the auxiliary maps here for the workers to map")
+    args = parser.parse_args()
+
+    config = load_transform_config()
+    if (config.get("transform") or {}).get("row_source", "tsv") != "tsv":
+        print("Error: a sharded run splits clinvar.tsv; set transform.row_source to 'tsv'", file=sys.stderr)
+        sys.exit(1)
+
+    # Importing the transform builds the auxiliary maps and runs the pre-pass, exactly as
+    # `koza transform` does before streaming the first row.
+    import transform
+    from run import transform_context
+
+    context = transform_context(transform)
+    n_nodes, n_edges = run_sharded(
+        transform.clinvar_tsv_path, args.output_dir, context, args.jobs, config, aux_store=args.aux_store
+    )
+    print(f"Wrote {n_nodes:,} nodes and {n_edges:,} edges to {args.output_dir}")
+    try:
+        check_min_counts(n_nodes, n_edges, config["writer"])
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
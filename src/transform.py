@@ -1,14 +1,17 @@
+from pathlib import Path
+
 import koza
 
+from aux_cache import load_transform_maps
 from clinvar_helpers import (
-    make_medgen_to_mondo_map,
-    make_mondo_map,
     build_pair_variant_counts,
+    configure_from,
     literature_only_variants,
-    make_variant_gene_map,
-    make_variant_record_map,
     process_row,
 )
+from clinvar_vcf import is_vcf, read_vcf_rows
+from kgx_writer import KGXStreamWriter
+from transform_config import load_transform_config
 
 # File paths to accessory data
 sub_path = "./data/submission_summary.txt.gz"
@@ -16,6 +19,17 @@ sssom_path = "./data/mondo.sssom.tsv"
 medgen_path = "./data/MedGenIDMappings.txt.gz"
 variant_summary_path = "./data/variant_summary.txt.gz"
 clinvar_tsv_path = "./data/clinvar.tsv"
+clinvar_vcf_path = "./data/clinvar.vcf.gz"
+
+# transform.yaml's transform.row_source, read here rather than in a hook because the
+# pre-pass below runs at import: "vcf" streams the rows straight from clinvar.vcf.gz, so
+# clinvar.tsv is neither needed nor read (see clinvar_vcf)
+row_source = (load_transform_config(Path(__file__).with_name("transform.yaml")).get("transform") or {}).get(
+    "row_source", "tsv"
+)
+if row_source not in ("tsv", "vcf"):
+    raise ValueError("row_source must be 'tsv' or 'vcf', not {!r}".format(row_source))
+clinvar_source = clinvar_vcf_path if row_source == "vcf" else clinvar_tsv_path
 
 @koza.on_data_begin()
 def load_auxiliary_data(koza_transform):
@@ -25,19 +39,38 @@ def load_auxiliary_data(koza_transform):
     sssom_path = "./data/mondo.sssom.tsv"
     medgen_path = "./data/MedGenIDMappings.txt.gz"
 
-# Map records to each clinvar variant id
-var_records = make_variant_record_map(sub_path)
 
-# Make general map back to mondo terms
-map_to_mondo = make_mondo_map(sssom_path)
+@koza.prepare_data()
+def select_rows(koza_transform, data):
+    """With row_source "vcf", hand the transform the VCF's rows instead of Koza's reader's
+    -- Koza opens the reader's files only once `data` is iterated, so it never is."""
+    if is_vcf(clinvar_source):
+        return read_vcf_rows(clinvar_source)
+    return data
+
+
+# Batches rows into Koza's output files; set up once Koza's writer exists
+kgx_out = None
+
+
+@koza.on_data_begin()
+def configure_run(koza_transform):
+    """Apply transform.yaml's transform.edge_id_scheme / transform.entity_mode, if set,
+    and batch the output through KGXStreamWriter when Koza writes plain KGX TSVs."""
+    global kgx_out
+    configure_from(koza_transform.extra_fields)
+    kgx_out = KGXStreamWriter.for_koza(koza_transform.writer)
+
 
-# Make medgen to mondo map and merge
-medgen_to_mondo = make_medgen_to_mondo_map(medgen_path)
-map_to_mondo.update(medgen_to_mondo)
+@koza.on_data_end()
+def flush_output(koza_transform):
+    if kgx_out is not None:
+        kgx_out.close()
 
-# ClinVar's own per-variant gene attribution -- see make_variant_gene_map for why this
-# replaces the VCF's positional GENEINFO field as the source of variant-gene edges
-variant_genes = make_variant_gene_map(variant_summary_path)
+# The four maps read independent files, so they are built at the same time, one worker
+# process each, and served from data/.cache/ when their source files and the code that
+# builds them are unchanged since the last run -- see aux_cache.load_transform_maps.
+var_records, map_to_mondo, variant_genes = load_transform_maps(sub_path, sssom_path, medgen_path, variant_summary_path)
 
 # Variants whose P/LP call was recorded as coming from the literature -- the evidence
 # behind the <=1-star associated_with tier (see publication_star_max)
@@ -45,16 +78,21 @@ lit_only_variants = literature_only_variants(var_records)
 
 # Pre-pass: how many distinct variants support each (gene, disease). Inclusion is
 # otherwise a per-variant decision, so without this a pair enters the graph on one
-# variant's evidence -- see min_variants_per_pair.
+# variant's evidence -- see min_variants_per_pair. It also keeps each variant's tier
+# result in `qualified`, so the emit pass below does not run the tier logic again.
+qualified = {}
 pair_variant_counts = build_pair_variant_counts(
-    clinvar_tsv_path, var_records, map_to_mondo, variant_genes, lit_only_variants
+    clinvar_source, var_records, map_to_mondo, variant_genes, lit_only_variants, qualified
 )
 
 
 @koza.transform_record()
 def transform(koza_transform, row):
     entities = process_row(
-        row, var_records, map_to_mondo, variant_genes, lit_only_variants, pair_variant_counts
+        row, var_records, map_to_mondo, variant_genes, lit_only_variants, pair_variant_counts, qualified
     )
     if entities:
-        koza_transform.write(*entities)
+        if kgx_out is not None:
+            kgx_out.write(entities)
+        else:
+            koza_transform.write(*entities)
@@ -0,0 +1,16 @@
+"""transform.yaml, read the same way by the Koza transform module and the runners beside it.
+
+Kept apart from the runners so that transform.py -- which Koza imports -- can read its
+own settings without importing a runner that in turn imports transform.
+"""
+
+from pathlib import Path
+
+import yaml
+
+TRANSFORM_YAML = Path(__file__).resolve().parent / "transform.yaml"
+
+
+def load_transform_config(path=TRANSFORM_YAML) -> dict:
+    with open(path) as fh:
+        return yaml.safe_load(fh)
@@ -0,0 +1,153 @@
+"""variant_genes as a sorted, memory-mapped VariationID index.
+
+make_variant_gene_map() returns a dict of ~4.5M VariationID -> (hgnc_id, symbol) tuples,
+of which the transform looks up a few hundred thousand; even unpickled from the aux
+cache that is millions of objects to rebuild on every run. write_gene_index() stores the
+same answers as
+
+  - the VariationIDs as sorted unsigned ints,
+  - a parallel array of indexes into a gene table,
+  - the gene table itself -- one (hgnc_id, symbol) per distinct gene, a few tens of
+    thousands,
+
+and VariantGeneIndex maps the file and binary-searches it, so opening it costs the
+gene table and nothing per variant. Its .get(varid) answers exactly as the dict does --
+same ASSEMBLY_PREFERENCE choice, same GeneID == -1 / missing HGNC_ID omissions, since
+it is built from make_variant_gene_map()'s result.
+
+load_gene_index() keeps the index in data/.cache/ beside the aux cache's entries, keyed
+the same way (the file's content hash, make_variant_gene_map()'s code, the assembly
+preference), so only the first run after a download parses variant_summary.txt.gz.
+build_gene_index() is that build alone, returning the index's path, for a worker process
+to run beside the other auxiliary loads.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from pathlib import Path
+
+from aux_cache import cache_enabled, code_version, content_hash, default_cache_dir
+from clinvar_helpers import ASSEMBLY_PREFERENCE, make_variant_gene_map
+
+MAGIC = b"CVGENES1"
+
+# magic, number of variants, length of the JSON gene table
+_HEADER = struct.Struct("<8sQQ")
+_ALIGN = 8
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _align(n):
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_gene_index(path, variant_genes):
+    """Write a VariationID -> (hgnc_id, symbol) mapping to `path` (atomically)."""
+    genes = {}
+    entries = sorted(
+        (int(varid), genes.setdefault(tuple(entry[:2]), len(genes))) for varid, entry in variant_genes.items()
+    )
+    varids = array("I", (varid for varid, _ in entries))
+    codes = array("I", (code for _, code in entries))
+    table = json.dumps(list(genes)).encode("utf-8")
+
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(_HEADER.pack(MAGIC, len(varids), len(table)))
+            fh.write(table)
+            fh.write(b"\0" * (_align(fh.tell()) - fh.tell()))
+            fh.write(varids.tobytes())
+            fh.write(codes.tobytes())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class VariantGeneIndex(Mapping):
+    """VariationID (str) -> (hgnc_id, symbol), read from a write_gene_index() file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n, table_length = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError("{} is not a variant gene index".format(path))
+        self._genes = [tuple(gene) for gene in json.loads(self._mmap[_HEADER.size : _HEADER.size + table_length])]
+        start = _align(_HEADER.size + table_length)
+        itemsize = array("I").itemsize
+        view = memoryview(self._mmap)
+        self._varids = view[start : start + n * itemsize].cast("I")
+        self._codes = view[start + n * itemsize : start + 2 * n * itemsize].cast("I")
+
+    def _find(self, varid):
+        if not isinstance(varid, str) or not varid.isdigit():
+            return -1
+        key = int(varid)
+        i = bisect_left(self._varids, key)
+        return i if i < len(self._varids) and self._varids[i] == key else -1
+
+    def __getitem__(self, varid):
+        i = self._find(varid)
+        if i < 0:
+            raise KeyError(varid)
+        return self._genes[self._codes[i]]
+
+    def __contains__(self, varid):
+        return self._find(varid) >= 0
+
+    def __iter__(self):
+        return map(str, self._varids)
+
+    def __len__(self):
+        return len(self._varids)
+
+    def __reduce__(self):
+        # a worker reopens the same file rather than receiving its contents
+        return (type(self), (str(self.path),))
+
+
+def build_gene_index(variant_summary_path, assembly_preference=ASSEMBLY_PREFERENCE, cache_dir=None) -> str:
+    """Write the index for variant_summary_path to data/.cache/ unless it is already there,
+    and return its path. Opening it is left to the caller, so the build can run in a worker
+    process (aux_cache.load_concurrently) while only the path comes back."""
+    cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir(variant_summary_path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    prefix = "variant_genes-{}-{}".format(
+        Path(variant_summary_path).name, _digest(repr(tuple(assembly_preference)).encode())[:12]
+    )
+    # the loader's code decides the answers, this module's the file layout
+    versions = (content_hash(variant_summary_path, cache_dir), code_version(make_variant_gene_map))
+    key = _digest(":".join(versions + (code_version(write_gene_index),)).encode())
+    path = cache_dir / "{}-{}.index".format(prefix, key)
+    if not path.exists():
+        write_gene_index(path, make_variant_gene_map(variant_summary_path, assembly_preference))
+        for stale in cache_dir.glob(prefix + "-*.index"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+    return str(path)
+
+
+def load_gene_index(variant_summary_path, assembly_preference=ASSEMBLY_PREFERENCE, cache_dir=None):
+    """variant_genes for variant_summary_path as a VariantGeneIndex, built on first use and
+    reopened from data/.cache/ afterwards; the plain make_variant_gene_map() dict when the
+    cache is off (CLINVAR_INGEST_CACHE=0)."""
+    if not cache_enabled():
+        return make_variant_gene_map(variant_summary_path, assembly_preference)
+    return VariantGeneIndex(build_gene_index(variant_summary_path, assembly_preference, cache_dir))
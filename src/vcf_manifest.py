@@ -0,0 +1,143 @@
+"""The manifest scripts/vcf_to_tsv.py leaves beside its output, so a rerun can skip work.
+
+<output>.manifest.json records what the output was built from:
+
+  - input_sha256: the VCF's content hash,
+  - fields: the columns written,
+  - converter: a hash of the converter's own source files, so a change to how values
+    are written invalidates earlier output,
+  - output_size: the output's size when it was finished,
+  - contigs: for a TSV output, each contig's data-line hash and the byte range its rows
+    take up in the output, in file order.
+
+is_current() says whether the output can be kept as it is. When the VCF changed only in
+part, reusable_contigs() names the contigs whose rows can be copied from the previous
+output -- same data lines, same fields, same converter.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+_CHUNK = 1 << 20
+
+
+def manifest_path(output_path) -> Path:
+    return Path(str(output_path) + MANIFEST_SUFFIX)
+
+
+def file_sha256(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while chunk := fh.read(_CHUNK):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_sha256(paths) -> str:
+    """One hash over the contents of several files, in the order given."""
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(Path(path).read_bytes())
+    return h.hexdigest()
+
+
+def contig_sha256s(vcf_path):
+    """{contig: sha256 of its data lines} of a plain or (b)gzipped VCF, in file order; None
+    if the VCF is not sorted by contig, so a contig's rows are not one block."""
+    with open(vcf_path, "rb") as fh:
+        gzipped = fh.read(2) == b"\x1f\x8b"
+    digests = {}
+    contig, h = None, None
+    with gzip.open(vcf_path, "rb") if gzipped else open(vcf_path, "rb") as fh:
+        for line in fh:
+            if line.startswith(b"#"):
+                continue
+            name = line[: line.find(b"\t")]
+            if name != contig:
+                if h is not None:
+                    digests[contig.decode()] = h.hexdigest()
+                if name.decode() in digests:
+                    return None
+                contig, h = name, hashlib.sha256()
+            h.update(line)
+    if h is not None:
+        digests[contig.decode()] = h.hexdigest()
+    return digests
+
+
+def build_manifest(output_path, input_sha256, fields, converter, digests=None, ranges=None) -> dict:
+    """The manifest of a just-written output_path. `digests` ({contig: sha256}) and
+    `ranges` ({contig: (start, end)} byte offsets in the output) are recorded per contig
+    for the contigs in both."""
+    manifest = {
+        "input_sha256": input_sha256,
+        "fields": list(fields),
+        "converter": converter,
+        "output_size": os.path.getsize(output_path),
+    }
+    if digests and ranges:
+        manifest["contigs"] = {
+            name: {"sha256": digest, "range": list(ranges[name])} for name, digest in digests.items() if name in ranges
+        }
+    return manifest
+
+
+def load_manifest(output_path):
+    """The manifest beside output_path, or None if there is none or it cannot be read."""
+    try:
+        with open(manifest_path(output_path)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(output_path, manifest):
+    path = manifest_path(output_path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2) + "\n")
+    os.replace(tmp, path)
+
+
+def remove_manifest(output_path):
+    """Drop the manifest before output_path is rewritten, so an interrupted conversion is
+    never taken for a finished one."""
+    manifest_path(output_path).unlink(missing_ok=True)
+
+
+def _output_matches(manifest, output_path, fields, converter) -> bool:
+    try:
+        size = os.path.getsize(output_path)
+    except OSError:
+        return False
+    return (
+        manifest.get("output_size") == size
+        and manifest.get("fields") == list(fields)
+        and manifest.get("converter") == converter
+    )
+
+
+def is_current(manifest, output_path, input_sha256, fields, converter) -> bool:
+    """Whether output_path, as the manifest describes it, is what converting the VCF with
+    input_sha256 to `fields` would write now."""
+    return (
+        bool(manifest)
+        and manifest.get("input_sha256") == input_sha256
+        and _output_matches(manifest, output_path, fields, converter)
+    )
+
+
+def reusable_contigs(manifest, output_path, digests, fields, converter) -> dict:
+    """{contig: (start, end)} byte ranges in output_path of the contigs whose data lines
+    hash as in `digests` ({contig: sha256}) -- rows a new conversion can copy as they are."""
+    if not manifest or not manifest.get("contigs") or not _output_matches(manifest, output_path, fields, converter):
+        return {}
+    return {
+        name: tuple(old["range"]) for name, old in manifest["contigs"].items() if digests.get(name) == old["sha256"]
+    }
@@ -15,6 +15,19 @@ from koza.runner import KozaTransform, PassthroughWriter
 from clinvar_helpers import process_row
 
 
+@pytest.fixture(autouse=True)
+def pydantic_entities():
+    """Build entities as the biolink pydantic classes the assertions below check for,
+    rather than transform.yaml's (and the module's) default "records"; a test that wants
+    another entity_mode sets it itself. The default is restored afterwards."""
+    import clinvar_helpers
+
+    default = clinvar_helpers.entity_mode
+    clinvar_helpers.set_entity_mode("pydantic")
+    yield
+    clinvar_helpers.set_entity_mode(default)
+
+
 def _make_record(
     clinsig="Pathogenic",
     medgen_cui="CN000000",
@@ -1028,3 +1041,1192 @@ def test_gene_edges_use_hgnc_ids():
                    if isinstance(e, VariantToGeneAssociation)]
     assert len(gene_assocs) == 1
     assert gene_assocs[0].object.startswith("HGNC:")
+
+
+SUBMISSION_HEADER = list(_make_record())
+
+
+def _write_submission_summary(path, records):
+    """Write `records` (dicts shaped like _make_record()'s) as a submission_summary.txt.gz,
+    preceded by the file's "#"-prefixed header line."""
+    import gzip
+
+    with gzip.open(path, "wt") as fh:
+        fh.write("#" + "\t".join(SUBMISSION_HEADER) + "\n")
+        for rec in records:
+            fh.write("\t".join(rec[k] for k in SUBMISSION_HEADER) + "\n")
+    return path
+
+
+def _submission_rows():
+    """Records for three variants, deliberately NOT contiguous by VariationID."""
+    rows = []
+    for varid, clinsig, cui, submitter, method in (
+        ("101", "Pathogenic", "C2981140", "LabA", "clinical testing"),
+        ("102", "Benign", "C0854723", "LabB", "clinical testing"),
+        ("101", "Likely pathogenic", "C2981140", "LabB", "literature only"),
+        ("103", "Pathogenic", "CN300503", "LabC", "research"),
+        ("101", "Pathogenic", "C2973725", "LabC", "clinical testing"),
+    ):
+        rec = _make_record(clinsig, cui, "disease", submitter=submitter)
+        rec.update(VariationID=varid, CollectionMethod=method)
+        rows.append(rec)
+    return rows
+
+
+def test_submission_store_reads_like_record_dicts(tmp_path):
+    """make_variant_record_map() stores records column-wise, but a variant's records must
+    read exactly like the per-row dicts it replaced -- same values, same file order, even
+    when the file interleaves variants."""
+    from clinvar_helpers import make_variant_record_map
+
+    rows = _submission_rows()
+    store = make_variant_record_map(_write_submission_summary(tmp_path / "ss.txt.gz", rows))
+
+    assert list(store) == ["101", "102", "103"]
+    assert len(store) == 3 and store.n_records == 5
+    assert [dict(r) for r in store["101"]] == [rows[0], rows[2], rows[4]]
+    assert [dict(r) for r in store["102"]] == [rows[1]]
+    assert store["101"][-1]["Submitter"] == "LabC"
+    assert "999" not in store and store.get("999") is None
+
+
+def test_submission_store_feeds_helpers_unchanged(tmp_path):
+    from clinvar_helpers import (
+        concordant_disease_pairs,
+        literature_only_variants,
+        make_variant_record_map,
+        variant_records_to_disease,
+    )
+
+    rows = _submission_rows()
+    store = make_variant_record_map(_write_submission_summary(tmp_path / "ss.txt.gz", rows))
+    as_dicts = {}
+    for rec in rows:
+        as_dicts.setdefault(rec["VariationID"], []).append(rec)
+
+    assert literature_only_variants(store) == literature_only_variants(as_dicts) == {"101"}
+    for varid, records in as_dicts.items():
+        assert variant_records_to_disease(store[varid], MAP_TO_MONDO, star_min=0) == (
+            variant_records_to_disease(records, MAP_TO_MONDO, star_min=0)
+        )
+        assert concordant_disease_pairs(store[varid], MAP_TO_MONDO, 2) == (
+            concordant_disease_pairs(records, MAP_TO_MONDO, 2)
+        )
+
+
+def test_submission_columns_are_projected_at_load(tmp_path):
+    """Only the requested columns are kept; their values and record order are unchanged."""
+    from clinvar_helpers import SUBMISSION_COLUMNS, make_variant_record_map
+
+    rows = _submission_rows()
+    path = _write_submission_summary(tmp_path / "ss.txt.gz", rows)
+    store = make_variant_record_map(path, columns=SUBMISSION_COLUMNS)
+
+    assert store.columns == SUBMISSION_COLUMNS
+    first = store["101"][0]
+    assert dict(first) == {k: rows[0][k] for k in SUBMISSION_COLUMNS}
+    with pytest.raises(KeyError):
+        first["SCV"]
+
+    with pytest.raises(ValueError):
+        make_variant_record_map(path, columns=("NoSuchColumn",))
+
+
+def test_ragged_rows_do_not_shift_later_cells(tmp_path):
+    """A row with an extra column and a row short of the last one, in the same block, must
+    not cancel out: every row still reads its own cells."""
+    import gzip
+
+    from clinvar_helpers import make_variant_record_map
+
+    rows = _submission_rows()
+    lines = ["\t".join(rec[k] for k in SUBMISSION_HEADER) for rec in rows]
+    lines[0] += "\textra"
+    lines[1] = lines[1].rsplit("\t", 1)[0]
+    path = tmp_path / "ss.txt.gz"
+    with gzip.open(path, "wt") as fh:
+        fh.write("#" + "\t".join(SUBMISSION_HEADER) + "\n" + "\n".join(lines) + "\n")
+
+    store = make_variant_record_map(path, columns=("VariationID", "Submitter"))
+    assert [r["Submitter"] for r in store["101"]] == ["LabA", "LabB", "LabC"]
+    assert [r["Submitter"] for r in store["102"]] == ["LabB"]
+    assert [r["Submitter"] for r in store["103"]] == ["LabC"]
+
+
+def test_resolved_diseases_match_per_record_mapping(tmp_path):
+    """resolve_diseases() precomputes each record's MONDO ids; the tier logic must reach the
+    same decisions as mapping each record on the spot -- including the Submitted fallback,
+    which the aggregate-star path does not accept."""
+    from clinvar_helpers import (
+        make_variant_record_map,
+        record_diseases,
+        record_stars,
+        variant_records_to_disease,
+    )
+
+    rows = _submission_rows()
+    fallback = _make_record("Pathogenic", "CN000000", "unmapped", review_status="criteria provided, single submitter")
+    fallback.update(VariationID="104", SubmittedPhenotypeInfo="MONDO:0019118")
+    rows.append(fallback)
+    store = make_variant_record_map(_write_submission_summary(tmp_path / "ss.txt.gz", rows))
+    as_dicts = {}
+    for rec in rows:
+        as_dicts.setdefault(rec["VariationID"], []).append(rec)
+
+    mapping = dict(MAP_TO_MONDO)
+    assert store["104"][0].diseases(mapping) is None  # not resolved yet
+    store.resolve_diseases(mapping)
+    assert store["104"][0].diseases(mapping) == (("MONDO:0019118",), False)
+    assert store["104"][0].diseases(MAP_TO_MONDO) is None  # resolved against another map
+    assert record_diseases(store["101"][2], mapping) == (("MONDO:0015924",), True)
+    assert [record_stars(r) for r in store["101"]] == [3, 3, 3]
+    assert record_stars(store["104"][0]) == 1
+
+    for varid, records in as_dicts.items():
+        for kwargs in ({}, {"star_min": 0}, {"aggregate_stars": 2}, {"rescue_min_submitters": 2}):
+            assert variant_records_to_disease(store[varid], mapping, **kwargs) == (
+                variant_records_to_disease(records, mapping, **kwargs)
+            )
+    dis, _, _ = variant_records_to_disease(store["104"], mapping, aggregate_stars=2)
+    assert not dis
+
+
+def _write_clinvar_tsv(path, rows):
+    """Write VCF-shaped row dicts as a clinvar.tsv in the column order of transform.yaml."""
+    columns = _transform_config()["reader"]["columns"]
+    with open(path, "w") as fh:
+        fh.write("\t".join(columns) + "\n")
+        for row in rows:
+            fh.write("\t".join(row.get(c, ".") for c in columns) + "\n")
+    return path
+
+
+def _transform_config():
+    from pathlib import Path
+
+    import yaml
+
+    with open(Path(__file__).resolve().parents[1] / "src" / "transform.yaml") as fh:
+        return yaml.safe_load(fh)
+
+
+def _run_to_kgx(out_dir, clinvar_tsv, var_records, variant_genes, cached=False, direct=False):
+    """Drive process_row() the way src/transform.py does and write the result with Koza's
+    own TSV writer. Edge ids are derived from the edge (edge_id_scheme "uuid5"), so two
+    runs can be compared byte for byte. `cached` hands process_row() the pre-pass's
+    qualification cache; `direct` batches the output through kgx_writer.KGXStreamWriter
+    as the transform does. Returns (nodes bytes, edges bytes)."""
+    import csv
+
+    from koza.io.writer.tsv_writer import TSVWriter
+    from koza.model.writer import WriterConfig
+
+    from clinvar_helpers import build_pair_variant_counts, literature_only_variants
+    from kgx_writer import KGXStreamWriter
+
+    writer_config = _transform_config()["writer"]
+    writer = TSVWriter(
+        out_dir,
+        "clinvar_variant",
+        WriterConfig(
+            node_properties=list(writer_config["node_properties"]),
+            edge_properties=list(writer_config["edge_properties"]),
+        ),
+    )
+    # a small batch, so the fixture spans several
+    stream = KGXStreamWriter.for_koza(writer, batch_rows=3) if direct else None
+    lit_only = literature_only_variants(var_records)
+    qualified = {} if cached else None
+    counts = build_pair_variant_counts(
+        clinvar_tsv, var_records, MAP_TO_MONDO, variant_genes, lit_only, qualified=qualified
+    )
+    with open(clinvar_tsv, newline="") as fh:
+        for row in csv.DictReader(fh, delimiter="\t"):
+            entities = process_row(
+                row, var_records, MAP_TO_MONDO, variant_genes, lit_only, counts, qualified
+            )
+            if entities:
+                if direct:
+                    stream.write(entities)
+                else:
+                    writer.write(entities)
+    if direct:
+        stream.close()
+    writer.finalize()
+    return (
+        (out_dir / "clinvar_variant_nodes.tsv").read_bytes(),
+        (out_dir / "clinvar_variant_edges.tsv").read_bytes(),
+    )
+
+
+def _kgx_fixture(tmp_path):
+    """A submission_summary.txt.gz and clinvar.tsv where P/LP records are interleaved with
+    Benign/VUS ones, covering every tier: expert-panel, concordance, aggregate and
+    literature, plus a variant ClinVar attributes to no gene. Returns (submission path,
+    clinvar.tsv path, variant_genes)."""
+    records = []
+
+    def add(varid, clinsig, cui, review="reviewed by expert panel", submitter="LabA", method="clinical testing"):
+        rec = _make_record(clinsig, cui, "disease", review_status=review, submitter=submitter)
+        rec.update(VariationID=varid, CollectionMethod=method)
+        records.append(rec)
+
+    one_star = "criteria provided, single submitter"
+    add("201", "Benign", "C2981140", submitter="LabZ")
+    add("201", "Pathogenic", "C2981140")
+    add("202", "Uncertain significance", "C2981140", review=one_star)
+    add("202", "Likely pathogenic", "C2981140", review=one_star, submitter="LabA")
+    add("202", "Likely pathogenic", "C2981140", review=one_star, submitter="LabB")
+    add("203", "Pathogenic", "C2981140", review=one_star, method="literature only")
+    add("203", "Benign", "C2981140", review=one_star, method="literature only")
+    add("204", "Benign", "C2981140")
+    add("204", "Likely benign", "C2981140", submitter="LabB")
+    add("205", "Pathogenic", "CN300503", review=one_star)
+    add("206", "Pathogenic", "CN300503")
+    add("207", "Pathogenic", "CN300503")
+
+    rows = [
+        {**_TEST_ROW_TEMPLATE, "ID": "201"},
+        {**_TEST_ROW_TEMPLATE, "ID": "202"},
+        {**_TEST_ROW_TEMPLATE, "ID": "203"},
+        {**_TEST_ROW_TEMPLATE, "ID": "204"},
+        {**_TEST_ROW_TEMPLATE, "ID": "205", "CLNDISDB": "MONDO:MONDO:0100283,MedGen:CN300503",
+         "CLNREVSTAT": "criteria_provided,_multiple_submitters,_no_conflicts"},
+        {**_TEST_ROW_TEMPLATE, "ID": "206", "CLNDISDB": "MONDO:MONDO:0100283,MedGen:CN300503",
+         "RS": "12345"},
+        {**_TEST_ROW_TEMPLATE, "ID": "207", "CLNDISDB": "MONDO:MONDO:0100283,MedGen:CN300503"},
+    ]
+    genes = {v: ("HGNC:7610", "MYOC") for v in ("201", "202", "203", "204")}
+    genes.update({v: ("HGNC:3942", "MTOR") for v in ("205", "206")})
+    return (
+        _write_submission_summary(tmp_path / "submission_summary.txt.gz", records),
+        _write_clinvar_tsv(tmp_path / "clinvar.tsv", rows),
+        genes,
+    )
+
+
+def test_pathogenic_only_load_emits_identical_kgx(tmp_path):
+    """Dropping non-P/LP records at load must not change a single byte of the output --
+    every consumer discards them anyway, literature_only_variants() included."""
+    from clinvar_helpers import SUBMISSION_COLUMNS, make_variant_record_map
+
+    sub_path, clinvar_tsv, genes = _kgx_fixture(tmp_path)
+    full = make_variant_record_map(sub_path)
+    filtered = make_variant_record_map(sub_path, columns=SUBMISSION_COLUMNS, pathogenic_only=True)
+    assert filtered.n_records < full.n_records
+    assert "204" in full and "204" not in filtered
+
+    (tmp_path / "full").mkdir()
+    (tmp_path / "filtered").mkdir()
+    expected = _run_to_kgx(tmp_path / "full", clinvar_tsv, full, genes)
+    actual = _run_to_kgx(tmp_path / "filtered", clinvar_tsv, filtered, genes)
+    assert expected[1].count(b"\n") > 4, "fixture should emit edges on several tiers"
+    assert actual == expected
+
+
+def test_qualification_cache_emits_identical_kgx(tmp_path):
+    """process_row() reading the pre-pass's per-variant tier results must emit exactly what
+    it emits when it reruns the tier logic itself -- gene-less variants included."""
+    from clinvar_helpers import (
+        SUBMISSION_COLUMNS,
+        build_pair_variant_counts,
+        literature_only_variants,
+        make_variant_record_map,
+    )
+
+    sub_path, clinvar_tsv, genes = _kgx_fixture(tmp_path)
+    var_records = make_variant_record_map(sub_path, columns=SUBMISSION_COLUMNS, pathogenic_only=True)
+
+    qualified = {}
+    build_pair_variant_counts(
+        clinvar_tsv, var_records, MAP_TO_MONDO, genes, literature_only_variants(var_records), qualified
+    )
+    assert "207" in qualified and "207" not in genes
+    assert "204" not in qualified
+    assert qualified["201"] == ((("MONDO:0020367", ("Pathogenic",)),), ())
+
+    (tmp_path / "rerun").mkdir()
+    (tmp_path / "cached").mkdir()
+    expected = _run_to_kgx(tmp_path / "rerun", clinvar_tsv, var_records, genes)
+    actual = _run_to_kgx(tmp_path / "cached", clinvar_tsv, var_records, genes, cached=True)
+    assert b"CLINVAR:207" in expected[1]
+    assert actual == expected
+
+
+def test_cached_load_reuses_and_invalidates(tmp_path, monkeypatch):
+    """A second load of an unchanged file comes from data/.cache/; changing the file or the
+    loader's arguments builds afresh, and a replaced entry does not linger."""
+    import aux_cache
+    from clinvar_helpers import SUBMISSION_COLUMNS, make_variant_record_map
+
+    monkeypatch.delenv("CLINVAR_INGEST_CACHE", raising=False)
+    rows = _submission_rows()
+    path = _write_submission_summary(tmp_path / "ss.txt.gz", rows)
+    calls = []
+
+    def loader(p, *args, **kwargs):
+        calls.append(kwargs)
+        return make_variant_record_map(p, *args, **kwargs)
+
+    first = aux_cache.cached_load(loader, path, columns=SUBMISSION_COLUMNS)
+    again = aux_cache.cached_load(loader, path, columns=SUBMISSION_COLUMNS)
+    assert len(calls) == 1
+    assert again is not first
+    assert {v: [dict(r) for r in again[v]] for v in again} == {v: [dict(r) for r in first[v]] for v in first}
+    assert (tmp_path / ".cache").is_dir()
+
+    aux_cache.cached_load(loader, path, columns=SUBMISSION_COLUMNS, pathogenic_only=True)
+    assert len(calls) == 2
+
+    _write_submission_summary(path, rows[:2])
+    changed = aux_cache.cached_load(loader, path, columns=SUBMISSION_COLUMNS)
+    assert len(calls) == 3 and changed.n_records == 2
+    assert len(list((tmp_path / ".cache").glob("loader-*.pickle"))) == 2
+
+    monkeypatch.setenv("CLINVAR_INGEST_CACHE", "0")
+    aux_cache.cached_load(loader, path, columns=SUBMISSION_COLUMNS)
+    assert len(calls) == 4
+
+
+def test_resolution_is_not_pickled(tmp_path):
+    import pickle
+
+    from clinvar_helpers import make_variant_record_map
+
+    store = make_variant_record_map(_write_submission_summary(tmp_path / "ss.txt.gz", _submission_rows()))
+    store.resolve_diseases(MAP_TO_MONDO)
+    copy = pickle.loads(pickle.dumps(store))
+    assert copy["101"][0].diseases(MAP_TO_MONDO) is None
+    copy.resolve_diseases(MAP_TO_MONDO)
+    assert copy["101"][0].diseases(MAP_TO_MONDO) == store["101"][0].diseases(MAP_TO_MONDO)
+
+
+def test_load_concurrently_matches_sequential_loads(tmp_path, monkeypatch):
+    """Misses are built in worker processes, hits are read in-process, and either way the
+    results come back under their names exactly as cached_load() would build them."""
+    import aux_cache
+    from clinvar_helpers import SUBMISSION_COLUMNS, make_variant_record_map
+
+    monkeypatch.delenv("CLINVAR_INGEST_CACHE", raising=False)
+    path = _write_submission_summary(tmp_path / "ss.txt.gz", _submission_rows())
+    calls = {
+        "full": (make_variant_record_map, path, {}),
+        "plp": (make_variant_record_map, path, {"columns": SUBMISSION_COLUMNS, "pathogenic_only": True}),
+    }
+
+    def as_dicts(store):
+        return {v: [dict(r) for r in store[v]] for v in store}
+
+    built = aux_cache.load_concurrently(calls, max_workers=2)
+    assert list(built) == ["full", "plp"]
+    assert as_dicts(built["full"]) == as_dicts(make_variant_record_map(path))
+    assert as_dicts(built["plp"]) == as_dicts(make_variant_record_map(path, **calls["plp"][2]))
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("cache hits must not start worker processes")
+
+    monkeypatch.setattr(aux_cache, "ProcessPoolExecutor", no_pool)
+    cached = aux_cache.load_concurrently(calls)
+    assert {k: as_dicts(v) for k, v in cached.items()} == {k: as_dicts(v) for k, v in built.items()}
+
+
+def test_parallel_submission_parse_matches_single_process(tmp_path, monkeypatch):
+    """Blocks parsed in worker processes are merged back in file order: the store, record
+    order within a variant included, is the one a single-process load builds."""
+    import clinvar_helpers
+    from clinvar_helpers import SUBMISSION_COLUMNS, make_variant_record_map
+
+    # a few hundred bytes per block, so the five-record file spans several of them
+    monkeypatch.setattr(clinvar_helpers, "_SUBMISSION_BATCH_BYTES", 200)
+    path = _write_submission_summary(tmp_path / "ss.txt.gz", _submission_rows() * 3)
+
+    def as_dicts(store):
+        return [(v, [dict(r) for r in store[v]]) for v in store]
+
+    for kwargs in ({}, {"columns": SUBMISSION_COLUMNS, "pathogenic_only": True}):
+        assert as_dicts(make_variant_record_map(path, jobs=3, **kwargs)) == (
+            as_dicts(make_variant_record_map(path, **kwargs))
+        )
+
+
+def test_shard_ranges_cover_every_row_once(tmp_path):
+    from sharded_transform import shard_ranges
+
+    path = tmp_path / "rows.tsv"
+    lines = ["a\tb\n"] + ["{}\t{}\n".format(i, "x" * (i % 7)) for i in range(50)]
+    path.write_text("".join(lines))
+    for n in (1, 3, 8, 200):
+        header, ranges = shard_ranges(path, n)
+        assert header == ["a", "b"]
+        assert len(ranges) <= n
+        data = path.read_bytes()
+        assert b"".join(data[s:e] for s, e in ranges) == "".join(lines[1:]).encode()
+        assert all(data[s - 1:s] == b"\n" for s, _ in ranges)
+
+
+def test_sharded_run_matches_single_process(tmp_path):
+    """Rows processed in forked shards and concatenated in file order give exactly the
+    output a single-process run writes."""
+    from clinvar_helpers import (
+        SUBMISSION_COLUMNS,
+        build_pair_variant_counts,
+        literature_only_variants,
+        make_variant_record_map,
+    )
+    from sharded_transform import check_min_counts, run_sharded
+
+    sub_path, clinvar_tsv, genes = _kgx_fixture(tmp_path)
+    var_records = make_variant_record_map(sub_path, columns=SUBMISSION_COLUMNS, pathogenic_only=True)
+    lit_only = literature_only_variants(var_records)
+    qualified = {}
+    counts = build_pair_variant_counts(clinvar_tsv, var_records, MAP_TO_MONDO, genes, lit_only, qualified)
+
+    (tmp_path / "serial").mkdir()
+    nodes, edges = _run_to_kgx(tmp_path / "serial", clinvar_tsv, var_records, genes)
+    context = (var_records, MAP_TO_MONDO, genes, lit_only, counts, qualified)
+    n_nodes, n_edges = run_sharded(clinvar_tsv, tmp_path / "sharded", context, jobs=2, config=_transform_config())
+
+    assert (tmp_path / "sharded" / "clinvar_variant_nodes.tsv").read_bytes() == nodes
+    assert (tmp_path / "sharded" / "clinvar_variant_edges.tsv").read_bytes() == edges
+    assert (n_nodes, n_edges) == (nodes.count(b"\n") - 1, edges.count(b"\n") - 1)
+    assert [p.name for p in (tmp_path / "sharded").iterdir() if p.name.startswith(".")] == []
+
+    check_min_counts(n_nodes, n_edges, {"min_node_count": n_nodes, "min_edge_count": None})
+    with pytest.raises(ValueError, match="min_edge_count"):
+        check_min_counts(n_nodes, n_edges, {"min_node_count": 1, "min_edge_count": n_edges + 1})
+
+
+def test_edge_ids_are_uuid5_of_the_edge(test_case1_row):
+    """Ids are stable across runs, equal to uuid.uuid5 of the edge's parts, and distinct per
+    (subject, predicate, object); "uuid4" restores random ids."""
+    import uuid
+
+    from clinvar_helpers import EDGE_ID_NAMESPACE, edge_id, set_edge_id_scheme
+
+    edge_types = (VariantToGeneAssociation, VariantToDiseaseAssociation)
+    edges, again = (
+        [e for e in process_row(test_case1_row, VAR_RECORDS, MAP_TO_MONDO, VARIANT_GENES) if isinstance(e, edge_types)]
+        for _ in range(2)
+    )
+    assert len(edges) == 2
+    assert [e.id for e in edges] == [e.id for e in again]
+    for e in edges:
+        name = "\t".join((e.subject, e.predicate, e.object, "infores:clinvar"))
+        assert e.id == str(uuid.uuid5(EDGE_ID_NAMESPACE, name))
+    assert edges[0].id != edges[1].id
+    assert edge_id("a", "b", "c") != edge_id("a", "b", "d")
+
+    try:
+        set_edge_id_scheme("uuid4")
+        assert edge_id("a", "b", "c") != edge_id("a", "b", "c")
+        with pytest.raises(ValueError):
+            set_edge_id_scheme("sequential")
+    finally:
+        set_edge_id_scheme("uuid5")
+
+
+@pytest.mark.parametrize("mode", ["records", "validated_records"])
+@pytest.mark.parametrize("direct", [False, True])
+def test_record_entities_write_identical_kgx(tmp_path, mode, direct):
+    """The plain-record entity modes write exactly the rows the pydantic models write, both
+    through Koza's own writer and batched through KGXStreamWriter."""
+    from clinvar_helpers import SUBMISSION_COLUMNS, make_variant_record_map, set_entity_mode
+
+    sub_path, clinvar_tsv, genes = _kgx_fixture(tmp_path)
+    var_records = make_variant_record_map(sub_path, columns=SUBMISSION_COLUMNS, pathogenic_only=True)
+    (tmp_path / "pydantic").mkdir()
+    (tmp_path / mode).mkdir()
+    expected = _run_to_kgx(tmp_path / "pydantic", clinvar_tsv, var_records, genes)
+    try:
+        set_entity_mode(mode)
+        actual = _run_to_kgx(tmp_path / mode, clinvar_tsv, var_records, genes, direct=direct)
+    finally:
+        set_entity_mode("pydantic")
+    assert expected[1].count(b"\n") > 4
+    assert actual == expected
+
+
+def test_check_record_rejects_values_pydantic_would_write_differently(test_case1_row):
+    from biolink_model.datamodel.pydanticmodel_v2 import KnowledgeLevelEnum
+
+    from clinvar_helpers import set_entity_mode
+    from kgx_records import VariantToDiseaseAssociationRecord, check_record, to_pydantic
+
+    try:
+        set_entity_mode("records")
+        entities = process_row(test_case1_row, VAR_RECORDS, MAP_TO_MONDO, VARIANT_GENES)
+    finally:
+        set_entity_mode("pydantic")
+    columns = set(_transform_config()["writer"]["edge_properties"])
+    edge = next(e for e in entities if isinstance(e, VariantToDiseaseAssociationRecord))
+    assert isinstance(to_pydantic(edge), VariantToDiseaseAssociation)
+    check_record(edge, columns)
+
+    edge.knowledge_level = KnowledgeLevelEnum.knowledge_assertion  # an enum, not its value
+    with pytest.raises(ValueError):
+        check_record(edge, columns)
+    edge.knowledge_level = "not_a_level"
+    with pytest.raises(Exception):
+        check_record(edge, columns)
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "zstd"])
+def test_stream_writer_matches_koza_tsv_writer(tmp_path, monkeypatch, test_case1_row, compression):
+    """KGXStreamWriter's own files hold exactly what Koza's TSVWriter writes for the same
+    entities -- pydantic models and records alike -- compressed or not; without zstandard
+    a zstd writer fails before it creates anything."""
+    import gzip
+    import sys
+
+    from koza.io.writer.tsv_writer import TSVWriter
+    from koza.model.writer import WriterConfig
+
+    from clinvar_helpers import set_entity_mode
+    from kgx_writer import COMPRESSIONS, KGXStreamWriter, check_compression
+
+    if compression == "zstd":
+        zstandard = pytest.importorskip("zstandard")
+
+        def decompress(data):
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+    else:
+        decompress = gzip.decompress if compression else bytes
+    writer_config = _transform_config()["writer"]
+    entities = process_row(test_case1_row, VAR_RECORDS, MAP_TO_MONDO, VARIANT_GENES)
+    try:
+        set_entity_mode("records")
+        entities += process_row(test_case1_row, VAR_RECORDS, MAP_TO_MONDO, VARIANT_GENES)
+    finally:
+        set_entity_mode("pydantic")
+
+    koza = TSVWriter(
+        tmp_path / "koza",
+        "clinvar_variant",
+        WriterConfig(
+            node_properties=list(writer_config["node_properties"]),
+            edge_properties=list(writer_config["edge_properties"]),
+        ),
+    )
+    koza.write(entities * 3)
+    koza.finalize()
+
+    with KGXStreamWriter(
+        tmp_path / "stream",
+        "clinvar_variant",
+        writer_config["node_properties"],
+        writer_config["edge_properties"],
+        compression=compression,
+        batch_rows=2,
+    ) as stream:
+        for _ in range(3):
+            stream.write(entities)
+    assert (stream.n_nodes, stream.n_edges) == (6, 12)
+
+    for kind in ("node", "edge"):
+        path = stream.paths[kind]
+        assert path.name == "clinvar_variant_{}s.tsv{}".format(kind, COMPRESSIONS[compression])
+        written = decompress(path.read_bytes())
+        assert written == (tmp_path / "koza" / "clinvar_variant_{}s.tsv".format(kind)).read_bytes()
+
+    with pytest.raises(ValueError):
+        KGXStreamWriter(tmp_path / "bad", "x", ["id"], ["id"], compression="bz2")
+    monkeypatch.setitem(sys.modules, "zstandard", None)
+    with pytest.raises(ImportError, match=r"clinvar_ingest\[zstd\]"):
+        check_compression("zstd")
+    with pytest.raises(ImportError):
+        KGXStreamWriter(tmp_path / "no_zstd", "x", ["id"], ["id"], compression="zstd")
+    assert not (tmp_path / "no_zstd").exists()
+
+
+def _ingest_tree(root):
+    """A copy of src/transform.yaml and src/transform.py under root/src, and a data/ dir
+    beside it holding every file the transform reads, built from _kgx_fixture() and
+    MAP_TO_MONDO -- a miniature checkout `koza transform` can run in from root."""
+    import gzip
+    import shutil
+    from pathlib import Path
+
+    src = Path(__file__).resolve().parent.parent / "src"
+    (root / "src").mkdir(parents=True)
+    for name in ("transform.yaml", "transform.py"):
+        shutil.copy(src / name, root / "src" / name)
+    data = root / "data"
+    data.mkdir()
+    _sub_path, _clinvar_tsv, genes = _kgx_fixture(data)
+
+    with gzip.open(data / "MedGenIDMappings.txt.gz", "wt") as fh:
+        fh.write("#CUI|pref_name|source_id|source|\n")
+        for key, targets in MAP_TO_MONDO.items():
+            if key.startswith("MedGen:"):
+                for mondo in targets:
+                    fh.write("{}|name|{}|MONDO|\n".format(key.split(":", 1)[1], mondo))
+    with open(data / "mondo.sssom.tsv", "w") as fh:
+        fh.write("# curie_map: {}\nsubject_id\tpredicate_id\tobject_id\n")
+        for key, targets in MAP_TO_MONDO.items():
+            if not key.startswith(("MedGen:", "MONDO:")):
+                for mondo in targets:
+                    fh.write("{}\tskos:exactMatch\t{}\n".format(mondo, key))
+    with gzip.open(data / "variant_summary.txt.gz", "wt") as fh:
+        fh.write("#AlleleID\tGeneID\tGeneSymbol\tHGNC_ID\tAssembly\tVariationID\n")
+        for varid, (hgnc, symbol) in genes.items():
+            fh.write("1\t1\t{}\t{}\tGRCh38\t{}\n".format(symbol, hgnc, varid))
+    return root / "src" / "transform.yaml"
+
+
+def test_standalone_runner_matches_koza_transform(tmp_path, monkeypatch):
+    """run.py writes exactly what `koza transform src/transform.yaml` writes from the same
+    inputs -- single-process, compressed and sharded."""
+    import gzip
+
+    from koza.runner import KozaRunner
+
+    from clinvar_helpers import set_edge_id_scheme, set_entity_mode
+    from run import load_transform_module, run
+
+    config_path = _ingest_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CLINVAR_INGEST_CACHE", "0")
+    names = ("clinvar_variant_nodes.tsv", "clinvar_variant_edges.tsv")
+    try:
+        _config, runner = KozaRunner.from_config_file(str(config_path), output_dir=str(tmp_path / "koza"))
+        runner.run()
+        expected = [(tmp_path / "koza" / name).read_bytes() for name in names]
+        assert b"CLINVAR:207" in expected[1]
+
+        module = load_transform_module(config_path)
+        stats = run(config_path, tmp_path / "serial", batch_rows=2, module=module)
+        assert [(tmp_path / "serial" / name).read_bytes() for name in names] == expected
+        assert (stats["rows"], stats["nodes"], stats["edges"]) == (
+            7,
+            expected[0].count(b"\n") - 1,
+            expected[1].count(b"\n") - 1,
+        )
+
+        run(config_path, tmp_path / "gzip", compression="gzip", module=module)
+        assert [gzip.decompress((tmp_path / "gzip" / (name + ".gz")).read_bytes()) for name in names] == expected
+
+        run(config_path, tmp_path / "sharded", jobs=2, module=module)
+        assert [(tmp_path / "sharded" / name).read_bytes() for name in names] == expected
+    finally:
+        set_entity_mode("pydantic")
+        set_edge_id_scheme("uuid5")
+
+
+def _write_clinvar_vcf(path, rows, step=1):
+    """Write VCF-shaped row dicts as a minimal plain-text VCF carrying ROW_FIELDS' INFO
+    fields, `step` bases apart; "." values are left out, as ClinVar leaves unset INFO
+    fields out."""
+    from clinvar_vcf import ROW_FIELDS
+
+    info_fields = [f for f in ROW_FIELDS if f != "ID"]
+    with open(path, "w") as fh:
+        fh.write("##fileformat=VCFv4.1\n##contig=<ID=1>\n")
+        for field in info_fields:
+            fh.write('##INFO=<ID={},Number=.,Type=String,Description="{}">\n'.format(field, field))
+        fh.write("#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n")
+        for pos, row in enumerate(rows, 1):
+            info = ";".join("{}={}".format(f, row[f]) for f in info_fields if row.get(f, ".") != ".")
+            fh.write("1\t{}\t{}\tG\tC\t.\t.\t{}\n".format(pos * step, row["ID"], info or "."))
+    return path
+
+
+def test_vcf_rows_match_clinvar_tsv_rows(tmp_path):
+    """read_vcf_rows() gives, for every field process_row() reads, the values the same
+    variant's clinvar.tsv row holds."""
+    pytest.importorskip("cyvcf2")
+    from clinvar_helpers import clinvar_rows
+    from clinvar_vcf import ROW_FIELDS
+
+    _sub_path, clinvar_tsv, _genes = _kgx_fixture(tmp_path)
+    tsv_rows = list(clinvar_rows(clinvar_tsv))
+    vcf_rows = list(clinvar_rows(_write_clinvar_vcf(tmp_path / "clinvar.vcf", tsv_rows)))
+    assert vcf_rows == [{f: row[f] for f in ROW_FIELDS} for row in tsv_rows]
+
+
+def test_vcf_row_source_matches_koza_transform(tmp_path, monkeypatch):
+    """With transform.row_source "vcf" and no clinvar.tsv at all, `koza transform` and the
+    standalone runner write what the clinvar.tsv run writes."""
+    pytest.importorskip("cyvcf2")
+    import gzip
+
+    from koza.runner import KozaRunner
+
+    from clinvar_helpers import clinvar_rows, set_edge_id_scheme, set_entity_mode
+    from run import run
+
+    config_path = _ingest_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CLINVAR_INGEST_CACHE", "0")
+    names = ("clinvar_variant_nodes.tsv", "clinvar_variant_edges.tsv")
+    try:
+        _config, runner = KozaRunner.from_config_file(str(config_path), output_dir=str(tmp_path / "tsv"))
+        runner.run()
+        expected = [(tmp_path / "tsv" / name).read_bytes() for name in names]
+
+        clinvar_tsv = tmp_path / "data" / "clinvar.tsv"
+        vcf = _write_clinvar_vcf(tmp_path / "clinvar.vcf", list(clinvar_rows(clinvar_tsv)))
+        # transform.py reads data/clinvar.vcf.gz; htslib reads plain gzip as well as bgzip
+        (tmp_path / "data" / "clinvar.vcf.gz").write_bytes(gzip.compress(vcf.read_bytes()))
+        clinvar_tsv.unlink()
+        config_path.write_text(config_path.read_text().replace('row_source: "tsv"', 'row_source: "vcf"'))
+
+        _config, runner = KozaRunner.from_config_file(str(config_path), output_dir=str(tmp_path / "vcf"))
+        runner.run()
+        assert [(tmp_path / "vcf" / name).read_bytes() for name in names] == expected
+        run(config_path, tmp_path / "standalone")
+        assert [(tmp_path / "standalone" / name).read_bytes() for name in names] == expected
+    finally:
+        set_entity_mode("pydantic")
+        set_edge_id_scheme("uuid5")
+
+
+def test_tabix_windows_cover_each_contig_in_file_order(tmp_path):
+    """tabix_contigs() lists an index's contigs in file order with their indexed span, and
+    region_windows() tiles each contig from position 1 with no gaps or overlaps."""
+    import gzip
+    import struct
+
+    from clinvar_vcf import region_windows, tabix_contigs
+
+    names = b"2\0X\0"
+    tbi = b"TBI\1" + struct.pack("<8i", 2, 2, 1, 2, 0, ord("#"), 0, len(names)) + names
+    # contig "2": one bin with one chunk, three 16 kb linear-index intervals
+    tbi += struct.pack("<iIiQQ", 1, 4681, 1, 0, 100) + struct.pack("<i3Q", 3, 0, 0, 0)
+    # contig "X": no bins, no intervals
+    tbi += struct.pack("<ii", 0, 0)
+    (tmp_path / "x.vcf.gz.tbi").write_bytes(gzip.compress(tbi))
+
+    contigs = tabix_contigs(tmp_path / "x.vcf.gz.tbi")
+    assert contigs == [("2", 3 << 14), ("X", 1 << 14)]
+
+    windows = region_windows(contigs, 10)
+    assert [w[0] for w in windows] == sorted((w[0] for w in windows), key=["2", "X"].index)
+    for contig, _length in contigs:
+        mine = [(start, end) for name, start, end in windows if name == contig]
+        assert mine[0][0] == 1 and mine[-1][1] is None
+        assert all(end + 1 == nxt for (_, end), (nxt, _) in zip(mine, mine[1:]))
+    assert 8 <= len(windows) <= 12
+
+    with pytest.raises(ValueError):
+        (tmp_path / "bad.tbi").write_bytes(gzip.compress(b"CSI\1"))
+        tabix_contigs(tmp_path / "bad.tbi")
+
+
+def test_parallel_vcf_to_tsv_matches_single_process(tmp_path, monkeypatch):
+    """vcf_to_tsv.py --jobs writes the same file as a single-process conversion."""
+    pytest.importorskip("cyvcf2")
+    pysam = pytest.importorskip("pysam")
+    import importlib.util
+    import sys
+    from pathlib import Path
+
+    script = Path(__file__).resolve().parent.parent / "scripts" / "vcf_to_tsv.py"
+    spec = importlib.util.spec_from_file_location("vcf_to_tsv", script)
+    vcf_to_tsv = importlib.util.module_from_spec(spec)
+    # registered, so the --jobs pool can pickle _convert_window by reference
+    monkeypatch.setitem(sys.modules, "vcf_to_tsv", vcf_to_tsv)
+    spec.loader.exec_module(vcf_to_tsv)
+
+    rows = [{**_TEST_ROW_TEMPLATE, "ID": str(i)} for i in range(1, 400)]
+    # spread over several tabix intervals, so the VCF is cut into many windows
+    plain = _write_clinvar_vcf(tmp_path / "clinvar.vcf", rows, step=97)
+    vcf_gz = pysam.tabix_index(str(plain), preset="vcf", force=True)
+
+    serial_ranges = vcf_to_tsv.convert_vcf_to_tsv(Path(vcf_gz), tmp_path / "serial.tsv")
+    n, ranges = vcf_to_tsv.convert_vcf_to_tsv_parallel(Path(vcf_gz), tmp_path / "parallel.tsv", jobs=3)
+    assert n == len(rows)
+    assert ranges == serial_ranges
+    assert (tmp_path / "parallel.tsv").read_bytes() == (tmp_path / "serial.tsv").read_bytes()
+
+
+def test_table_rows_projects_clinvar_tsv(tmp_path):
+    """table_rows() of clinvar.tsv gives the DictReader rows, cut to the named columns."""
+    import csv
+
+    from clinvar_table import table_rows
+
+    _, clinvar_tsv, _ = _kgx_fixture(tmp_path)
+    with open(clinvar_tsv, newline="") as fh:
+        rows = list(csv.DictReader(fh, delimiter="\t"))
+    assert list(table_rows(clinvar_tsv)) == rows
+    assert list(table_rows(clinvar_tsv, ("CLNREVSTAT", "ID"))) == [
+        {"CLNREVSTAT": r["CLNREVSTAT"], "ID": r["ID"]} for r in rows
+    ]
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow"])
+def test_columnar_table_reads_like_clinvar_tsv(tmp_path, suffix):
+    """A Parquet/Arrow copy of clinvar.tsv, written over several batches, yields the same
+    rows, with the low-cardinality columns dictionary-encoded."""
+    pa = pytest.importorskip("pyarrow")
+    from clinvar_table import ColumnarWriter, read_columns, table_rows
+
+    _, clinvar_tsv, _ = _kgx_fixture(tmp_path)
+    rows = list(table_rows(clinvar_tsv))
+    columns = list(rows[0])
+    table = tmp_path / ("clinvar" + suffix)
+    with ColumnarWriter(table, columns, batch_rows=3) as writer:
+        for row in rows:
+            writer.write_row([row[c] for c in columns])
+
+    assert list(table_rows(table)) == rows
+    assert list(table_rows(table, ("ID", "CLNVC"))) == [{"ID": r["ID"], "CLNVC": r["CLNVC"]} for r in rows]
+    loaded = read_columns(table, ("CLNREVSTAT", "RS"))
+    assert loaded.column_names == ["CLNREVSTAT", "RS"]
+    assert pa.types.is_dictionary(loaded.schema.field("CLNREVSTAT").type)
+    assert loaded.schema.field("RS").type == pa.string()
+
+
+def test_reader_columns_are_the_fields_the_transform_reads():
+    """transform.yaml's reader columns -- and so vcf_to_tsv.py's default output -- are
+    exactly the row fields process_row() and the pre-pass read."""
+    from clinvar_vcf import ROW_FIELDS
+
+    assert _transform_config()["reader"]["columns"] == list(ROW_FIELDS)
+
+
+def test_manifest_skips_unchanged_input_and_reuses_unchanged_contigs(tmp_path):
+    """A manifest matches only the same VCF, fields and converter; when the VCF changed,
+    the contigs whose lines did not keep their rows' byte ranges in the old output."""
+    import gzip
+
+    from vcf_manifest import (
+        build_manifest,
+        contig_sha256s,
+        file_sha256,
+        is_current,
+        load_manifest,
+        reusable_contigs,
+        write_manifest,
+    )
+
+    def write_vcf(path, lines):
+        text = "##fileformat=VCFv4.1\n#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n" + "".join(lines)
+        path.write_bytes(gzip.compress(text.encode()))
+        return path
+
+    lines = ["1\t10\t1\tG\tC\t.\t.\t.\n", "1\t20\t2\tG\tC\t.\t.\t.\n", "2\t5\t3\tG\tC\t.\t.\t.\n"]
+    vcf = write_vcf(tmp_path / "clinvar.vcf.gz", lines)
+    digests = contig_sha256s(vcf)
+    assert list(digests) == ["1", "2"]
+
+    output = tmp_path / "clinvar.tsv"
+    output.write_text("ID\n1\n2\n3\n")
+    ranges = {"1": (3, 7), "2": (7, 9)}
+    fields = ["ID"]
+    write_manifest(output, build_manifest(output, file_sha256(vcf), fields, "v1", digests, ranges))
+    manifest = load_manifest(output)
+
+    assert is_current(manifest, output, file_sha256(vcf), fields, "v1")
+    assert not is_current(manifest, output, file_sha256(vcf), fields, "v2")
+    assert not is_current(manifest, output, file_sha256(vcf), ["ID", "RS"], "v1")
+
+    lines[2] = "2\t5\t3\tG\tT\t.\t.\t.\n"
+    changed = write_vcf(tmp_path / "clinvar.vcf.gz", lines)
+    assert not is_current(manifest, output, file_sha256(changed), fields, "v1")
+    assert reusable_contigs(manifest, output, contig_sha256s(changed), fields, "v1") == {"1": (3, 7)}
+    assert reusable_contigs(manifest, output, contig_sha256s(changed), fields, "v2") == {}
+
+    output.write_text("ID\n1\n2\n")
+    assert not is_current(manifest, output, file_sha256(vcf), fields, "v1")
+    assert reusable_contigs(manifest, output, digests, fields, "v1") == {}
+
+    # a contig whose rows are split in two is not one block to copy
+    assert contig_sha256s(write_vcf(tmp_path / "unsorted.vcf.gz", [lines[0], lines[2], lines[1]])) is None
+
+
+def test_incremental_run_matches_full_run_after_a_release_changes(tmp_path, monkeypatch):
+    """incremental.py writes what a full run writes -- on its first run, on an unchanged
+    rerun, and after a release changes one variant, which drops a pair below
+    min_variants_per_pair and so also the disease edge of the variant sharing it."""
+    from clinvar_helpers import clinvar_rows, set_edge_id_scheme, set_entity_mode
+    from incremental import run_incremental
+    from run import load_transform_module, run
+
+    config_path = _ingest_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CLINVAR_INGEST_CACHE", "0")
+    names = ("clinvar_variant_nodes.tsv", "clinvar_variant_edges.tsv")
+
+    def full_run(out):
+        run(config_path, tmp_path / out, module=load_transform_module(config_path))
+        return [(tmp_path / out / name).read_bytes() for name in names]
+
+    try:
+        expected = full_run("full")
+        assert b"CLINVAR:205\tbiolink:causes" in expected[1]
+        stats = run_incremental(config_path, tmp_path / "inc")
+        assert stats["full"] and stats["reprocessed"] == stats["variants"]
+        assert [(tmp_path / "inc" / name).read_bytes() for name in names] == expected
+
+        stats = run_incremental(config_path, tmp_path / "inc")
+        assert not stats["full"] and (stats["changed"], stats["reprocessed"]) == (0, 0)
+        assert [(tmp_path / "inc" / name).read_bytes() for name in names] == expected
+
+        # 205 and 206 are the only MTOR variants behind MONDO:0100283; 206 dropping to a
+        # 0-star status leaves the pair with one
+        clinvar_tsv = tmp_path / "data" / "clinvar.tsv"
+        rows = list(clinvar_rows(clinvar_tsv))
+        for row in rows:
+            if row["ID"] == "206":
+                row["CLNREVSTAT"] = "no_assertion_criteria_provided"
+        _write_clinvar_tsv(clinvar_tsv, rows)
+        expected = full_run("full-next")
+        assert b"CLINVAR:205\tbiolink:causes" not in expected[1]
+
+        stats = run_incremental(config_path, tmp_path / "inc")
+        assert (stats["changed"], stats["reprocessed"], stats["pairs_crossed"]) == (1, 2, 1)
+        assert [(tmp_path / "inc" / name).read_bytes() for name in names] == expected
+    finally:
+        set_entity_mode("pydantic")
+        set_edge_id_scheme("uuid5")
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+def test_changes_between_two_builds(tmp_path, compression):
+    """kgx_changes matches nodes on id and edges on (subject, predicate, object), whatever
+    their edge ids, and reads a build kgx_writer compressed as readily as a plain one."""
+    from kgx_changes import CHANGES_COLUMNS, write_changes
+    from kgx_writer import COMPRESSIONS, open_compressed
+
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+
+    def build(out, nodes, edges, compression=None):
+        out.mkdir()
+        for kind, header, rows in (
+            ("node", "id\tcategory\tname", nodes),
+            ("edge", "id\tsubject\tpredicate\tobject\tprimary_knowledge_source", edges),
+        ):
+            text = "\n".join([header] + ["\t".join(r) for r in rows]) + "\n"
+            if compression:
+                path = out / "clinvar_variant_{}s.tsv{}".format(kind, COMPRESSIONS[compression])
+                fh = open_compressed(path, compression)
+                fh.write(text)
+                fh.close()
+            else:
+                (out / "clinvar_variant_{}s.tsv".format(kind)).write_text(text)
+
+    build(
+        tmp_path / "previous",
+        [("CLINVAR:1", "biolink:SequenceVariant", "a"), ("CLINVAR:2", "biolink:SequenceVariant", "b")],
+        [
+            ("e1", "CLINVAR:1", "biolink:causes", "MONDO:1", "infores:clinvar"),
+            ("e2", "CLINVAR:2", "biolink:causes", "MONDO:2", "infores:clinvar"),
+        ],
+    )
+    build(
+        tmp_path / "current",
+        [("CLINVAR:2", "biolink:SequenceVariant", "b2"), ("CLINVAR:3", "biolink:SequenceVariant", "c")],
+        [
+            ("x2", "CLINVAR:2", "biolink:causes", "MONDO:2", "infores:clinvar"),
+            ("x3", "CLINVAR:3", "biolink:causes", "MONDO:3", "infores:clinvar"),
+        ],
+        compression=compression,
+    )
+
+    counts = write_changes(tmp_path / "previous", tmp_path / "current")
+    lines = (tmp_path / "current" / "clinvar_variant_changes.tsv").read_text().splitlines()
+    assert lines[0].split("\t") == list(CHANGES_COLUMNS)
+    assert [line.split("\t") for line in lines[1:]] == [
+        ["changed", "node", "CLINVAR:2", "", "", "", "name"],
+        ["added", "node", "CLINVAR:3", "", "", "", ""],
+        ["removed", "node", "CLINVAR:1", "", "", "", ""],
+        ["changed", "edge", "x2", "CLINVAR:2", "biolink:causes", "MONDO:2", "id"],
+        ["added", "edge", "x3", "CLINVAR:3", "biolink:causes", "MONDO:3", ""],
+        ["removed", "edge", "e1", "CLINVAR:1", "biolink:causes", "MONDO:1", ""],
+    ]
+    assert counts["node", "changed"] == counts["edge", "added"] == 1
+
+
+def test_mondo_map_reads_like_the_dict_of_dicts(tmp_path):
+    """make_mondo_map() / make_medgen_to_mondo_map() return MondoMaps that index like the
+    dict of {mondo_id: ""} dicts they used to build, self-mappings included, before and
+    after the MedGen merge and across a pickle."""
+    import gzip
+    import pickle
+
+    from clinvar_helpers import make_medgen_to_mondo_map, make_mondo_map, resolve_phenotype_ids
+
+    sssom = tmp_path / "mondo.sssom.tsv"
+    sssom.write_text(
+        "# curie_map: ...\n"
+        "subject_id\tpredicate_id\tobject_id\n"
+        "MONDO:0000002\tskos:exactMatch\tOMIM:100\n"
+        "MONDO:0000003\tskos:exactMatch\tOrphanet:7\n"
+        "MONDO:0000004\tskos:exactMatch\tOMIM:100\n"
+        # a file row for a key the self-mapping then replaces
+        "MONDO:0000005\tskos:exactMatch\tMONDO:0000002\n"
+    )
+    medgen = tmp_path / "MedGenIDMappings.txt.gz"
+    with gzip.open(medgen, "wt") as fh:
+        fh.write("#CUI|pref_name|source_id|source|\nC1|a|MONDO:0000003|MONDO|\nC2|b|OMIM:100|OMIM|\n")
+
+    expected = {
+        "OMIM:100": {"MONDO:0000002": "", "MONDO:0000004": ""},
+        "Orphanet:7": {"MONDO:0000003": ""},
+    }
+    for n in (2, 3, 4, 5):
+        mondo_id = "MONDO:000000{}".format(n)
+        expected[mondo_id] = expected["MONDO:" + mondo_id] = {mondo_id: ""}
+
+    map_to_mondo = make_mondo_map(sssom)
+    assert {k: dict(v) for k, v in map_to_mondo.items()} == expected
+    assert "MONDO:MONDO:0000004" in map_to_mondo and "MONDO:0000009" not in map_to_mondo
+    with pytest.raises(KeyError):
+        map_to_mondo["MedGen:C1"]
+
+    map_to_mondo.update(make_medgen_to_mondo_map(medgen))
+    expected["MedGen:C1"] = {"MONDO:0000003": ""}
+    assert {k: dict(v) for k, v in map_to_mondo.items()} == expected
+    assert list(map_to_mondo["OMIM:100"].keys()) == ["MONDO:0000002", "MONDO:0000004"]
+
+    restored = pickle.loads(pickle.dumps(map_to_mondo))
+    assert {k: dict(v) for k, v in restored.items()} == expected
+    assert resolve_phenotype_ids("C1:a", "OMIM:100", restored) == (("MONDO:0000003",), True)
+    assert resolve_phenotype_ids("C9:z", "OMIM:100", restored) == (("MONDO:0000002", "MONDO:0000004"), False)
+
+
+def test_aux_store_answers_like_the_loaded_maps(tmp_path):
+    """Maps written with write_store() and attached back read like the loaders' objects --
+    resolved diseases included -- and sharded workers reading them write the same KGX."""
+    from aux_store import attach, write_store
+    from clinvar_helpers import (
+        SUBMISSION_COLUMNS,
+        build_pair_variant_counts,
+        literature_only_variants,
+        make_variant_record_map,
+        record_diseases,
+    )
+    from sharded_transform import run_sharded
+
+    sub_path, clinvar_tsv, genes = _kgx_fixture(tmp_path)
+    var_records = make_variant_record_map(sub_path, columns=SUBMISSION_COLUMNS, pathogenic_only=True)
+    var_records.resolve_diseases(MAP_TO_MONDO)
+    write_store(tmp_path / "aux.store", var_records, MAP_TO_MONDO, genes)
+
+    with attach(tmp_path / "aux.store") as store:
+        stored_records, stored_mondo, stored_genes = store.maps()
+        assert dict(stored_genes) == genes and stored_genes.get("missing") is None
+        assert {k: dict(v) for k, v in stored_mondo.items()} == MAP_TO_MONDO
+        assert "MONDO:MONDO:0100283" in stored_mondo and "MONDO:9" not in stored_mondo
+        assert list(stored_records) == list(var_records)
+        for varid, records in var_records.items():
+            stored = stored_records[varid]
+            assert [dict(r) for r in stored] == [dict(r) for r in records]
+            assert [r.stars() for r in stored] == [r.stars() for r in records]
+            assert [r.diseases(stored_mondo) for r in stored] == [record_diseases(r, MAP_TO_MONDO) for r in records]
+
+    lit_only = literature_only_variants(var_records)
+    qualified = {}
+    counts = build_pair_variant_counts(clinvar_tsv, var_records, MAP_TO_MONDO, genes, lit_only, qualified)
+    (tmp_path / "serial").mkdir()
+    nodes, edges = _run_to_kgx(tmp_path / "serial", clinvar_tsv, var_records, genes)
+    context = (var_records, MAP_TO_MONDO, genes, lit_only, counts, None)
+    run_sharded(
+        clinvar_tsv, tmp_path / "sharded", context, jobs=2, config=_transform_config(), aux_store=tmp_path / "w.store"
+    )
+    assert (tmp_path / "sharded" / "clinvar_variant_nodes.tsv").read_bytes() == nodes
+    assert (tmp_path / "sharded" / "clinvar_variant_edges.tsv").read_bytes() == edges
+
+
+def test_gene_index_answers_like_the_gene_map(tmp_path, monkeypatch):
+    """The memory-mapped index gives make_variant_gene_map()'s answers -- preferred build,
+    GeneID == -1 and missing HGNC_ID rules included -- and is reopened, not rebuilt."""
+    import gzip
+    import pickle
+
+    from clinvar_helpers import make_variant_gene_map
+    from variant_gene_index import VariantGeneIndex, load_gene_index
+
+    summary = tmp_path / "variant_summary.txt.gz"
+    with gzip.open(summary, "wt") as fh:
+        fh.write("#AlleleID\tGeneID\tGeneSymbol\tHGNC_ID\tAssembly\tVariationID\n")
+        for row in (
+            ("1", "11", "A", "HGNC:1", "GRCh37", "10"),
+            ("1", "12", "B", "HGNC:2", "GRCh38", "10"),
+            ("2", "11", "A", "HGNC:1", "GRCh37", "11"),
+            ("3", "-1", "-", "-", "GRCh38", "12"),
+            ("3", "11", "A", "HGNC:1", "GRCh37", "12"),
+            ("4", "13", "LOC1", "-", "GRCh38", "13"),
+            ("5", "11", "A", "HGNC:1", "NCBI36", "14"),
+            ("6", "12", "B", "HGNC:2", "GRCh38", "9"),
+        ):
+            fh.write("\t".join(row) + "\n")
+
+    monkeypatch.setenv("CLINVAR_INGEST_CACHE", "1")
+    expected = make_variant_gene_map(summary)
+    index = load_gene_index(summary)
+    assert isinstance(index, VariantGeneIndex)
+    assert dict(index) == expected == {"9": ("HGNC:2", "B"), "10": ("HGNC:2", "B"), "11": ("HGNC:1", "A")}
+    assert [index.get(v) for v in ("12", "13", "14", "abc", "8", "100")] == [None] * 6
+    assert pickle.loads(pickle.dumps(index)).get("11") == ("HGNC:1", "A")
+
+    built = index.path.stat().st_mtime_ns
+    again = load_gene_index(summary)
+    assert again.path == index.path and again.path.stat().st_mtime_ns == built
+
+
+def test_transform_maps_build_the_gene_index_beside_the_other_loads(tmp_path, monkeypatch):
+    """load_transform_maps() builds the gene index as one of its concurrent loads and maps
+    it; with the cache off the gene map comes back as the plain dict."""
+    from aux_cache import load_transform_maps
+    from clinvar_helpers import make_variant_gene_map
+    from variant_gene_index import VariantGeneIndex
+
+    _ingest_tree(tmp_path)
+    data = tmp_path / "data"
+    paths = [data / name for name in ("submission_summary.txt.gz", "mondo.sssom.tsv", "MedGenIDMappings.txt.gz")]
+    expected = make_variant_gene_map(data / "variant_summary.txt.gz")
+
+    monkeypatch.setenv("CLINVAR_INGEST_CACHE", "1")
+    _, _, variant_genes = load_transform_maps(*paths, data / "variant_summary.txt.gz", submission_jobs=1)
+    assert isinstance(variant_genes, VariantGeneIndex) and dict(variant_genes) == expected
+    assert variant_genes.path.parent == data / ".cache"
+    assert len(list((data / ".cache").glob("build_gene_index-*.pickle"))) == 1
+
+    monkeypatch.setenv("CLINVAR_INGEST_CACHE", "0")
+    _, _, variant_genes = load_transform_maps(*paths, data / "variant_summary.txt.gz", submission_jobs=1)
+    assert type(variant_genes) is dict and variant_genes == expected
+
+
+def test_variant_summary_rows_keep_one_row_per_variant(tmp_path):
+    """variant_summary_rows() yields each variant's first row on its preferred build, in
+    file order, filtered by `where` after that choice; the pyarrow engine (when installed)
+    yields the same rows."""
+    import gzip
+
+    from clinvar_helpers import variant_summary_rows
+
+    summary = tmp_path / "variant_summary.txt.gz"
+    with gzip.open(summary, "wt") as fh:
+        fh.write("#AlleleID\tType\tGeneSymbol\tAssembly\tVariationID\n")
+        for row in (
+            ("1", "SNV", "A", "GRCh37", "10"),
+            ("1", "SNV", "B", "GRCh38", "10"),
+            ("2", "Deletion", "A", "GRCh37", "11"),
+            ("3", "Duplication", "C", "GRCh38", "12"),
+            ("3", "Deletion", "D", "GRCh38", "12"),
+            ("4", "SNV", "E", "NCBI36", "13"),
+        ):
+            fh.write("\t".join(row) + "\n")
+
+    columns = ("VariationID", "GeneSymbol", "Type")
+    cases = [
+        ((columns,), {}, [("10", "B", "SNV"), ("11", "A", "Deletion"), ("12", "C", "Duplication")]),
+        ((("VariationID",),), {"assembly_preference": None}, [(v,) for v in ("10", "10", "11", "12", "12", "13")]),
+        # the filter applies to the chosen row: 12's second row is a Deletion, but not chosen
+        ((("VariationID",),), {"where": {"Type": {"Deletion"}}}, [("11",)]),
+        ((("GeneSymbol",),), {"where": {"VariationID": {"11", "13"}}}, [("A",)]),
+        ((("VariationID",),), {"assembly_preference": None, "where": {"Type": {"Deletion"}}}, [("11",), ("12",)]),
+    ]
+    for args, kwargs, expected in cases:
+        assert list(variant_summary_rows(summary, *args, engine="python", **kwargs)) == expected
+    with pytest.raises(ValueError):
+        variant_summary_rows(summary, columns, engine="polars")
+
+    pytest.importorskip("pyarrow")
+    for args, kwargs, expected in cases:
+        assert list(variant_summary_rows(summary, *args, engine="pyarrow", **kwargs)) == expected